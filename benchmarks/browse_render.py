@@ -0,0 +1,65 @@
+"""
+Time the template render of a 100-card browse page with and without the fragment cache.
+
+Run from the project root:
+
+    python -m benchmarks.browse_render
+
+Uses the in-memory repository. The recipe cards are built once, as the browse view would
+build them, and ``browse.html`` is rendered repeatedly with the same cards: first with
+``FRAGMENT_CACHE_SIZE=0`` (every card rendered each time), then with the default cache (the
+first render fills it, later ones reuse the cached card HTML). Only template time is measured.
+"""
+import os
+import statistics
+import time
+
+from flask import render_template
+
+from recipe import create_app
+
+RUNS = 50
+CARDS = 100
+
+
+def _cards(repo):
+    cards = []
+    for r in repo.get_recipes_by_page(1, CARDS):
+        cards.append({
+            "id": r.id,
+            "name": r.name,
+            "author": r.author.name if r.author else "Unknown",
+            "total_time": (r.cook_time or 0) + (r.preparation_time or 0),
+            "prep_time": r.preparation_time or 0,
+            "calories": r.nutrition.calories if r.nutrition else None,
+            "thumbnail": r.thumbnail,
+            "desc": r.description,
+            "health_star": repo.calculate_health_star_rating(r),
+            "rating": r.rating,
+        })
+    return cards
+
+
+def measure(fragment_cache_size: int) -> float:
+    """Median milliseconds to render browse.html with CARDS cards."""
+    app = create_app({"TESTING": True, "FRAGMENT_CACHE_SIZE": fragment_cache_size})
+    with app.test_request_context("/browse/"):
+        cards = _cards(app.repository)
+        context = dict(recipes=cards, page=1, per_page=CARDS, total=len(cards), total_pages=1,
+                       sort="name", dir="asc", query="", category="", author="", ingredient="",
+                       has_filters=False)
+        render_template("browse.html", **context)  # compile the template (and fill the cache)
+        timings = []
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            render_template("browse.html", **context)
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("REPOSITORY", "memory")
+    uncached = measure(0)
+    cached = measure(4096)
+    print(f"browse.html, {CARDS} cards, uncached: {uncached:.2f} ms")
+    print(f"browse.html, {CARDS} cards, cached:   {cached:.2f} ms ({uncached / cached:.1f}x faster)")
@@ -0,0 +1,75 @@
+"""
+Measure how much work the cyclic garbage collector does because of the in-memory catalog.
+
+Run from the project root:
+
+    python -m benchmarks.gc_pause [--lazy]
+
+Reports the number of GC-tracked objects the catalog adds, the median pause of a full
+(generation 2) collection before and after loading it, the same pause after ``gc.freeze()``
+(the preload mode), and how many objects are left for the cycle collector when the catalog is
+dropped. An acyclic catalog is freed by reference counting alone, so that last figure should
+be zero.
+
+Keeping the catalog acyclic does not shorten collections: a full collection still traverses
+every tracked recipe, nutrition and list object, cycles or not, and the pause measured with
+and without the back-references is the same (about 26-30 ms on CPython 3.11 with 2455
+recipes). What it changes is the drop, which no longer leaves 16,146 objects for the cycle
+collector. Only ``gc.freeze()`` (PRELOAD_CATALOG) takes the catalog out of collections.
+"""
+import gc
+import statistics
+import sys
+import time
+
+from recipe.adapters.memory_repository import MemoryRepository, populate
+
+RUNS = 20
+
+
+def _full_collection_ms() -> float:
+    pauses = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        gc.collect()
+        pauses.append((time.perf_counter() - start) * 1000)
+    return statistics.median(pauses)
+
+
+def measure(lazy_details: bool = False):
+    gc.collect()
+    baseline_objects = len(gc.get_objects())
+    baseline_pause_ms = _full_collection_ms()
+
+    repo = MemoryRepository()
+    populate(repo, lazy_details=lazy_details)
+    gc.collect()
+
+    tracked = len(gc.get_objects()) - baseline_objects
+    pause_ms = _full_collection_ms()
+
+    gc.freeze()
+    try:
+        frozen_pause_ms = _full_collection_ms()
+    finally:
+        gc.unfreeze()
+
+    del repo
+    cyclic_garbage = gc.collect()
+
+    return {
+        "tracked_objects": tracked,
+        "baseline_collection_ms": baseline_pause_ms,
+        "full_collection_ms": pause_ms,
+        "frozen_full_collection_ms": frozen_pause_ms,
+        "cyclic_garbage_on_drop": cyclic_garbage,
+    }
+
+
+if __name__ == "__main__":
+    result = measure(lazy_details="--lazy" in sys.argv[1:])
+    print(f"GC-tracked catalog objects:     {result['tracked_objects']:,}")
+    print(f"full collection, no catalog:    {result['baseline_collection_ms']:.1f} ms")
+    print(f"full collection (median):       {result['full_collection_ms']:.1f} ms")
+    print(f"full collection after freeze:   {result['frozen_full_collection_ms']:.1f} ms")
+    print(f"cyclic garbage when dropped:    {result['cyclic_garbage_on_drop']:,}")
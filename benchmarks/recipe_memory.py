@@ -0,0 +1,71 @@
+"""
+Report how much memory the in-memory catalog costs per recipe.
+
+Run from the project root:
+
+    python -m benchmarks.recipe_memory [--lazy]
+
+``retained`` is everything the populated MemoryRepository keeps alive (traced with
+tracemalloc after a full collection), divided by the number of recipes. ``objects`` is the
+cost of the domain objects alone: each recipe and its nutrition are rebuilt from the values
+already in memory, so only the instances (and any ``__dict__`` or lists they allocate) count.
+That is the part ``__slots__`` shrinks.
+
+``--lazy`` loads the catalog with ``lazy_details`` (detail columns stay in the mapped CSV,
+which the OS page cache holds rather than the Python heap); the objects figure is skipped.
+"""
+import gc
+import sys
+import tracemalloc
+
+from recipe.adapters.memory_repository import MemoryRepository, populate
+from recipe.domainmodel.nutrition import Nutrition
+from recipe.domainmodel.recipe import Recipe
+
+
+def _rebuild(recipe: Recipe) -> Recipe:
+    n = recipe.nutrition
+    nutrition = Nutrition(n.id, n.calories, n.fat, n.saturated_fat, n.cholesterol, n.sodium,
+                          n.carbohydrates, n.fiber, n.sugar, n.protein)
+    return Recipe(recipe.id, recipe.name, recipe.author, recipe.cook_time,
+                  recipe.preparation_time, recipe.date, recipe.description,
+                  recipe._Recipe__images,
+                  recipe.category, recipe.ingredient_quantities, recipe.ingredients,
+                  recipe.rating, nutrition, recipe.servings, recipe.recipe_yield,
+                  recipe.instructions)
+
+
+def measure(lazy_details: bool = False):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    repo = MemoryRepository()
+    populate(repo, lazy_details=lazy_details)
+    gc.collect()
+
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    recipes = repo.get_all_recipes()
+    objects = None
+    if not lazy_details:
+        tracemalloc.start()
+        rebuilt = [_rebuild(recipe) for recipe in recipes]
+        objects = tracemalloc.get_traced_memory()[0] - sys.getsizeof(rebuilt)
+        tracemalloc.stop()
+
+    count = len(recipes)
+    return {
+        "recipes": count,
+        "retained_bytes_per_recipe": retained / count,
+        "object_bytes_per_recipe": None if objects is None else objects / count,
+    }
+
+
+if __name__ == "__main__":
+    result = measure(lazy_details="--lazy" in sys.argv[1:])
+    print(f"recipes loaded:            {result['recipes']}")
+    print(f"retained bytes per recipe: {result['retained_bytes_per_recipe']:,.0f}")
+    if result["object_bytes_per_recipe"] is not None:
+        print(f"object bytes per recipe:   {result['object_bytes_per_recipe']:,.0f}")
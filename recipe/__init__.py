@@ -1,3 +1,4 @@
+import gc
 import os
 from pathlib import Path
 from flask import Flask
@@ -10,7 +11,7 @@ from sqlalchemy.pool import NullPool
 csrf = CSRFProtect()
 
 
-def create_app():
+def create_app(test_config=None):
     """Construct the core application."""
     app = Flask(__name__)
 
@@ -19,6 +20,23 @@ def create_app():
     repo_mode = os.getenv("REPOSITORY", "database").lower()
     database_uri = os.getenv("DATABASE_URL", "sqlite:///recipes.db")
     database_path = Path(database_uri.replace("sqlite:///", "")).name
+    preload_catalog = os.getenv("PRELOAD_CATALOG", "0").lower() in ("1", "true", "yes")
+    database_engine = None
+    lazy_details = os.getenv("LAZY_DETAILS", "0").lower() in ("1", "true", "yes")
+    app.config["REPOSITORY_CACHE"] = os.getenv("REPOSITORY_CACHE", "0").lower() in ("1", "true", "yes")
+    app.config["REPOSITORY_CACHE_POLICIES"] = {}
+    app.config["PAGE_CACHE"] = os.getenv("PAGE_CACHE", "0").lower() in ("1", "true", "yes")
+    app.config["PAGE_CACHE_TTL"] = float(os.getenv("PAGE_CACHE_TTL", "60"))
+    app.config["FRAGMENT_CACHE_SIZE"] = int(os.getenv("FRAGMENT_CACHE_SIZE", "4096"))
+    app.config["COMPRESS"] = os.getenv("COMPRESS", "1").lower() in ("1", "true", "yes")
+    app.config["COMPRESS_MIN_SIZE"] = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    app.config["COMPRESS_LEVEL"] = int(os.getenv("COMPRESS_LEVEL", "6"))
+    app.config["SERVER_TIMING"] = os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+    app.config["METRICS"] = os.getenv("METRICS", "0").lower() in ("1", "true", "yes")
+    app.config["METRICS_DIR"] = os.getenv("METRICS_DIR") or None
+    app.config["STATIC_FINGERPRINTS"] = os.getenv("STATIC_FINGERPRINTS", "1").lower() in ("1", "true", "yes")
+    if test_config:
+        app.config.update(test_config)
 
     csrf.init_app(app)
 
@@ -26,8 +44,8 @@ def create_app():
     print(f"🗄️  REPOSITORY MODE: {repo_mode.upper()}")
     print("=" * 60)
 
-    if repo_mode == "database":
-        # ===== DATABASE MODE =====
+    if repo_mode in ("database", "hybrid"):
+        # ===== DATABASE MODE (hybrid mode shares the database setup) =====
         from recipe.adapters.database_repository import DatabaseRepository
         from recipe.adapters import database_populate, orm
 
@@ -43,9 +61,13 @@ def create_app():
         # ----- Map models BEFORE creating tables -----
         orm.map_model_to_tables()
         orm.metadata.create_all(database_engine)
+        orm.upgrade_schema(database_engine)
 
         # Create session factory
-        SessionFactory = sessionmaker(bind=database_engine, autoflush=True, autocommit=False, future=True)
+        # expire_on_commit=False: recipes handed out (and possibly cached) stay readable after
+        # the request that loaded them commits and closes its session.
+        SessionFactory = sessionmaker(bind=database_engine, autoflush=True, autocommit=False,
+                                      expire_on_commit=False, future=True)
 
         # Create repository instance
         app.repository = DatabaseRepository(SessionFactory)
@@ -73,16 +95,19 @@ def create_app():
             print(f"✓ Database ready: {app.repository.get_total_recipe_count()} recipes loaded")
 
         # ===== Session management per HTTP request =====
-        @app.before_request
-        def _before_request_reset_session():
-            # Reset the SQLAlchemy scoped session each request
-            if isinstance(app.repository, DatabaseRepository):
-                app.repository.reset_session()
+        # Sessions are thread-local (scoped_session); the app removes the current thread's
+        # session when each request's app context ends, so requests can be served concurrently.
+        database_repository = app.repository
 
         @app.teardown_appcontext
         def _teardown_close_session(exception=None):
-            if isinstance(app.repository, DatabaseRepository):
-                app.repository.close_session()
+            database_repository.close_session()
+
+        if repo_mode == "hybrid":
+            # Catalog reads from an in-memory copy; users, reviews and favourites stay in the database
+            from recipe.adapters.hybrid_repository import HybridRepository
+            app.repository = HybridRepository(database_repository)
+            print(f"✓ Catalog loaded into memory: {app.repository.get_total_recipe_count()} recipes")
 
         # Friendly file existence log for SQLite
         if database_uri.startswith("sqlite:///"):
@@ -94,16 +119,84 @@ def create_app():
     elif repo_mode == "memory":
         # ===== MEMORY MODE =====
         print("⚠ Using IN-MEMORY repository (data will be lost on restart)")
-        from recipe.adapters.memory_repository import MemoryRepository, populate
+        from recipe.adapters.memory_repository import MemoryRepository, populate, freeze_catalog
 
         repository = MemoryRepository()
-        populate(repository)
+        if preload_catalog:
+            # Build the catalog without intermediate collections, then freeze it so forked
+            # workers share its pages instead of each dirtying a private copy.
+            gc.disable()
+            try:
+                populate(repository, lazy_details=lazy_details)
+                freeze_catalog()
+            finally:
+                gc.enable()
+            print(f"✓ Catalog frozen for sharing with forked workers ({gc.get_freeze_count()} objects)")
+        else:
+            populate(repository, lazy_details=lazy_details)
         app.repository = repository
 
         print(f"✓ Memory repository ready: {repository.get_total_recipe_count()} recipes loaded")
 
     else:
-        raise ValueError(f"Invalid REPOSITORY mode: {repo_mode}. Use 'database' or 'memory'")
+        raise ValueError(f"Invalid REPOSITORY mode: {repo_mode}. Use 'database', 'memory' or 'hybrid'")
+
+    if app.config["REPOSITORY_CACHE"]:
+        from recipe.adapters.caching_repository import CachingRepository
+        app.repository = CachingRepository(app.repository, app.config["REPOSITORY_CACHE_POLICIES"])
+        print("✓ Repository reads cached (CachingRepository)")
+
+    from recipe.services.recipe_services import RecipeDetailViewCache
+    recipe_detail_views = RecipeDetailViewCache()
+    app.extensions["recipe_detail_views"] = recipe_detail_views
+
+    # {% cache %} template tag for recipe cards
+    from recipe.fragment_cache import FragmentCache, FragmentCacheExtension
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = FragmentCache(app.config["FRAGMENT_CACHE_SIZE"])
+
+    page_cache = None
+    if app.config["PAGE_CACHE"]:
+        from recipe.page_cache import PageCache
+        page_cache = PageCache(ttl=app.config["PAGE_CACHE_TTL"])
+
+    change_listeners = []
+    if database_engine is not None and app.repository is not database_repository:
+        change_listeners.append(app.repository)
+    change_listeners.append(recipe_detail_views)
+    change_listeners.append(app.jinja_env.fragment_cache)
+    if page_cache is not None:
+        change_listeners.append(page_cache)
+    from recipe.conditional import ContentVersions, release_token
+    release = release_token(app.root_path)
+    change_watcher = None
+    if database_engine is not None:
+        # Process-local caches in front of a shared database: apply other workers' writes
+        # before serving each request (registered before the page cache looks anything up)
+        from recipe.adapters.change_watcher import ChangeWatcher
+        change_watcher = ChangeWatcher(database_engine, *change_listeners)
+        app.change_watcher = change_watcher
+
+        @app.before_request
+        def _apply_database_changes():
+            change_watcher.poll()
+
+        print("✓ Cross-worker cache invalidation enabled (cache_changes log)")
+
+    # Versions behind the ETags of the catalog pages
+    if change_watcher is not None:
+        content_versions = ContentVersions(release, lambda: change_watcher.last_seq)
+        change_watcher.add_listener(content_versions)
+    else:
+        content_versions = ContentVersions(release)
+    app.extensions["content_versions"] = content_versions
+
+    # Told about this process's own writes immediately (other workers' arrive via the watcher)
+    app.extensions["local_change_listeners"] = [recipe_detail_views, content_versions]
+
+    if page_cache is not None:
+        page_cache.init_app(app)
+        print(f"✓ Anonymous page cache enabled (ttl {app.config['PAGE_CACHE_TTL']:g}s)")
 
     print("=" * 60)
 
@@ -127,14 +220,58 @@ def create_app():
     from recipe.browse.api import api as browse_api
     app.register_blueprint(browse_api, url_prefix="/api/browse")
 
+    # ===== Static assets and response compression =====
+    from recipe.assets import init_static
+    init_static(app)
+    if app.config["COMPRESS"]:
+        from recipe.compression import CompressionMiddleware
+        app.wsgi_app = CompressionMiddleware(app.wsgi_app, min_size=app.config["COMPRESS_MIN_SIZE"],
+                                             level=app.config["COMPRESS_LEVEL"])
+
+    # ===== Request timing (Server-Timing header, /debug/timings) =====
+    if app.config["SERVER_TIMING"]:
+        from recipe import timing
+        timing.init_app(app, database_engine)
+        print("✓ Request timing enabled (Server-Timing header, /debug/timings)")
+
+    # ===== Prometheus metrics (/metrics) =====
+    if app.config["METRICS"]:
+        from recipe import metrics
+        metrics.init_app(app, database_engine, app.config["METRICS_DIR"])
+        print("✓ Metrics enabled (/metrics"
+              + (f", aggregated across workers in {app.config['METRICS_DIR']})" if app.config["METRICS_DIR"] else ")"))
+
+    from recipe.metrics import unwrap_repository
+
     # ===== Debug route =====
     @app.route("/debug/repository")
     def debug_repository():
         """Debug endpoint to check repository status."""
-        repo = app.repository
+        repo = unwrap_repository(app.repository)
         repo_type = type(repo).__name__
         recipe_count = repo.get_total_recipe_count()
 
+        cache_rows = ""
+        if hasattr(type(repo), "cache_stats"):
+            repo_type = f"{repo_type} → {type(repo.wrapped).__name__}"
+            cache_rows = "".join(
+                f"<li><strong>Cache {name}:</strong> {stats['hits']} hits / {stats['misses']} misses, "
+                f"{stats['size']}/{stats['maxsize']} entries</li>"
+                for name, stats in repo.cache_stats().items()
+            )
+
+        fragment_stats = app.jinja_env.fragment_cache.stats()
+        cache_rows += (f"<li><strong>Template fragments:</strong> {fragment_stats['hits']} hits / "
+                       f"{fragment_stats['misses']} misses, {fragment_stats['size']}/{fragment_stats['maxsize']} cards</li>")
+
+        page_cache = app.extensions.get("page_cache")
+        if page_cache is not None:
+            cache_rows += "".join(
+                f"<li><strong>Page cache {endpoint}:</strong> {stats['hits']} hits / {stats['misses']} misses, "
+                f"{stats['size']}/{stats['maxsize']} pages</li>"
+                for endpoint, stats in page_cache.stats().items()
+            )
+
         info = f"""
         <h1>Repository Debug Info</h1>
         <ul>
@@ -142,6 +279,7 @@ def create_app():
             <li><strong>Total Recipes:</strong> {recipe_count}</li>
             <li><strong>Database File:</strong> {'recipes.db exists' if os.path.exists('recipes.db') else 'No database file'}</li>
             <li><strong>DB URI:</strong> {database_uri}</li>
+            {cache_rows}
         </ul>
         <p><a href="/">← Back to Home</a></p>
         """
@@ -0,0 +1,261 @@
+# recipe/adapters/caching_repository.py
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from recipe.adapters.repository import AbstractRepository
+from recipe.domainmodel.recipe import Recipe
+from recipe.domainmodel.review import Review
+
+
+class CachePolicy(NamedTuple):
+    """Size limit (entries) and time-to-live (seconds, None = until invalidated) of one method cache."""
+    maxsize: int
+    ttl: Optional[float] = None
+
+
+DEFAULT_POLICIES: Dict[str, CachePolicy] = {
+    "get_recipe": CachePolicy(maxsize=1024, ttl=300),
+    "get_recipes_by_page": CachePolicy(maxsize=256, ttl=60),
+    "search_recipes_paged": CachePolicy(maxsize=256, ttl=60),
+    "get_total_recipe_count": CachePolicy(maxsize=1, ttl=300),
+    "average_rating": CachePolicy(maxsize=2048, ttl=300),
+    "rating_distribution": CachePolicy(maxsize=2048, ttl=300),
+    "calculate_health_star_rating": CachePolicy(maxsize=4096),
+    "distinct_values": CachePolicy(maxsize=512, ttl=300),
+}
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU with optional per-entry TTL and hit/miss counters (also used by the page cache)."""
+
+    def __init__(self, policy: CachePolicy, clock: Callable[[], float]):
+        self.__policy = policy
+        self.__clock = clock
+        self.__entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key: Hashable, default=_MISSING):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > self.__clock():
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    return value
+                del self.__entries[key]
+            self.__misses += 1
+            return default
+
+    def put(self, key: Hashable, value) -> None:
+        if self.__policy.maxsize <= 0:
+            return
+        expires = None if self.__policy.ttl is None else self.__clock() + self.__policy.ttl
+        with self.__lock:
+            self.__entries[key] = (value, expires)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__policy.maxsize:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "size": len(self.__entries),
+                "maxsize": self.__policy.maxsize,
+                "ttl": self.__policy.ttl,
+            }
+
+
+class CachingRepository(AbstractRepository):
+    """
+    Read-through cache in front of any AbstractRepository.
+
+    Hot catalog reads are answered from per-method LRU caches (see DEFAULT_POLICIES; pass
+    ``policies`` to override or add entries, ``maxsize=0`` disables one). Writes go straight
+    to the wrapped repository and then drop every cached entry they could have changed:
+    a review invalidates that recipe's rating caches and cached recipe, and the rating-sorted
+    listings; a new recipe clears all catalog caches. Recipes are detached from the wrapped
+    repository's session (``detach_recipes``) before they are cached, so they can be shared by
+    every thread. Anything not defined here (users,
+    session management, ...) is forwarded to the wrapped repository unchanged.
+    """
+
+    def __init__(self, repo: AbstractRepository, policies: Optional[Dict[str, CachePolicy]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.__repo = repo
+        merged = dict(DEFAULT_POLICIES)
+        merged.update(policies or {})
+        self.__caches: Dict[str, TTLCache] = {
+            name: TTLCache(policy, clock) for name, policy in merged.items()
+        }
+
+    def __getattr__(self, name):
+        return getattr(self.__repo, name)
+
+    @property
+    def wrapped(self) -> AbstractRepository:
+        return self.__repo
+
+    def __detached(self, recipes: List[Optional[Recipe]]) -> None:
+        self.__repo.detach_recipes([recipe for recipe in recipes if recipe is not None])
+
+    def __cached(self, method: str, key: Hashable, load: Callable[[], Any]):
+        cache = self.__caches.get(method)
+        if cache is None:
+            return load()
+        value = cache.get(key)
+        if value is _MISSING:
+            value = load()
+            cache.put(key, value)
+        return value
+
+    # ---------- Cache management ----------
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: cache.stats() for name, cache in self.__caches.items()}
+
+    def clear_cache(self) -> None:
+        for cache in self.__caches.values():
+            cache.clear()
+
+    def invalidate_recipe(self, recipe_id: int) -> None:
+        """Drop everything cached about one recipe's ratings, plus listings sorted by rating."""
+        for method in ("get_recipe", "average_rating", "rating_distribution"):
+            cache = self.__caches.get(method)
+            if cache is not None:
+                cache.invalidate(recipe_id)
+        for method in ("get_recipes_by_page", "search_recipes_paged"):
+            cache = self.__caches.get(method)
+            if cache is not None:
+                cache.clear()
+
+    def apply_changes(self, changes: Iterable[Tuple[str, Optional[int]]]) -> None:
+        """Invalidate for writes made elsewhere (see ChangeWatcher); ``("*", None)`` clears all."""
+        changes = list(changes)
+        apply = getattr(self.__repo, "apply_changes", None)
+        if apply is not None:
+            apply(changes)
+        for table_name, key in changes:
+            if table_name == "reviews":
+                self.invalidate_recipe(key)
+            elif table_name in ("recipes", "*"):
+                self.clear_cache()
+                return
+
+    # ---------- Recipes ----------
+    def add_recipe(self, recipe: Recipe):
+        result = self.__repo.add_recipe(recipe)
+        self.clear_cache()
+        return result
+
+    def detach_recipes(self, recipes: List[Recipe]) -> None:
+        self.__repo.detach_recipes(recipes)
+
+    def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
+        def load():
+            recipe = self.__repo.get_recipe(recipe_id)
+            self.__detached([recipe])
+            return recipe
+        return self.__cached("get_recipe", recipe_id, load)
+
+    def get_recipe_by_id(self, recipe_id: int) -> Optional[Recipe]:
+        return self.get_recipe(recipe_id)
+
+    def get_all_recipes(self) -> List[Recipe]:
+        return self.__repo.get_all_recipes()
+
+    def get_recipes_by_page(self, page: int, per_page: int, sort_by: Optional[str] = None,
+                            sort_dir: Optional[str] = "asc") -> List[Recipe]:
+        def load():
+            recipes = self.__repo.get_recipes_by_page(page, per_page, sort_by=sort_by, sort_dir=sort_dir)
+            self.__detached(recipes)
+            return recipes
+        return self.__cached("get_recipes_by_page", (page, per_page, sort_by, sort_dir), load)
+
+    def search_recipes_paged(self, query=None, category=None, author=None, ingredient=None, page=1,
+                             per_page=12, sort_by=None, sort_dir="asc") -> Tuple[List[Recipe], int]:
+        def load():
+            recipes, total = self.__repo.search_recipes_paged(
+                query=query, category=category, author=author, ingredient=ingredient,
+                page=page, per_page=per_page, sort_by=sort_by, sort_dir=sort_dir,
+            )
+            self.__detached(recipes)
+            return recipes, total
+        return self.__cached(
+            "search_recipes_paged", (query, category, author, ingredient, page, per_page, sort_by, sort_dir), load,
+        )
+
+    def get_total_recipe_count(self) -> int:
+        return self.__cached("get_total_recipe_count", None, self.__repo.get_total_recipe_count)
+
+    def sample_recipes(self, n: int, seed=None) -> List[Recipe]:
+        return self.__repo.sample_recipes(n, seed)
+
+    def search_recipes(self, query: str, category: str, author: str, ingredient: str) -> List[Recipe]:
+        return self.__repo.search_recipes(query, category, author, ingredient)
+
+    # ---------- Favourites ----------
+    def add_favourite(self, user_id: int, recipe_id: int) -> bool:
+        return self.__repo.add_favourite(user_id, recipe_id)
+
+    def remove_favourite(self, user_id: int, recipe_id: int) -> bool:
+        return self.__repo.remove_favourite(user_id, recipe_id)
+
+    def is_favourite(self, user_id: int, recipe_id: int) -> bool:
+        return self.__repo.is_favourite(user_id, recipe_id)
+
+    def favourites_for_user(self, user_id: int) -> List[Recipe]:
+        return self.__repo.favourites_for_user(user_id)
+
+    # ---------- Reviews ----------
+    def add_review(self, recipe_id: int, user_id: int, rating: int, comment: str) -> bool:
+        try:
+            return self.__repo.add_review(recipe_id, user_id, rating, comment)
+        finally:
+            self.invalidate_recipe(recipe_id)
+
+    def reviews_for_recipe(self, recipe_id: int, cursor: Optional[Tuple[datetime, int]] = None,
+                           limit: Optional[int] = None) -> List[Review]:
+        return self.__repo.reviews_for_recipe(recipe_id, cursor=cursor, limit=limit)
+
+    def has_reviewed(self, user_id: int, recipe_id: int) -> bool:
+        return self.__repo.has_reviewed(user_id, recipe_id)
+
+    def average_rating(self, recipe_id: int) -> float:
+        return self.__cached("average_rating", recipe_id, lambda: self.__repo.average_rating(recipe_id))
+
+    def rating_distribution(self, recipe_id: int) -> Dict[int, int]:
+        return dict(self.__cached(
+            "rating_distribution", recipe_id, lambda: self.__repo.rating_distribution(recipe_id)))
+
+    # ---------- Derived values ----------
+    def calculate_health_star_rating(self, recipe: Recipe) -> Optional[float]:
+        recipe_id = getattr(recipe, "id", None)
+        if recipe_id is None:
+            # Unsaved recipes have nothing to key their score on
+            return self.__repo.calculate_health_star_rating(recipe)
+        return self.__cached(
+            "calculate_health_star_rating", recipe_id,
+            lambda: self.__repo.calculate_health_star_rating(recipe),
+        )
+
+    def distinct_values(self, field: str, query: str = "", limit: int = 10) -> List[str]:
+        return list(self.__cached(
+            "distinct_values", (field, query, limit),
+            lambda: self.__repo.distinct_values(field, query, limit)))
@@ -0,0 +1,124 @@
+# recipe/adapters/change_watcher.py
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.engine import Connection, Engine
+
+from recipe.adapters.orm import cache_changes_table
+
+# Change meaning "the log was pruned past us": drop everything cached
+ALL_CHANGED: Tuple[str, Optional[int]] = ("*", None)
+
+# Seconds a skipped sequence number is re-read in case its transaction commits late; longer
+# than any write transaction, after which it is taken to have rolled back
+GAP_TIMEOUT = 60.0
+# More open gaps than this and the watcher stops tracking them and clears every cache instead
+MAX_GAPS = 1000
+
+
+class ChangeWatcher:
+    """
+    Keeps one process's caches coherent with writes made by other workers.
+
+    DatabaseRepository appends a ``(table, key)`` row to ``cache_changes`` in the same
+    transaction as every write. ``poll()`` (run before each request) reads the rows added
+    since the last poll and hands them to each listener's ``apply_changes``, so every worker
+    invalidates before it serves the first request after a commit. On SQLite the poll first
+    checks ``PRAGMA data_version`` on a dedicated connection, which only changes when another
+    connection has committed, so an idle database costs one pragma per request.
+
+    Sequence numbers are not always committed in order (on PostgreSQL a transaction holding
+    seq 7 can commit after one holding seq 8), so numbers skipped below the newest one seen
+    are remembered as gaps and read again on every poll for ``GAP_TIMEOUT`` seconds.
+    """
+
+    def __init__(self, engine: Engine, *listeners, clock: Callable[[], float] = time.monotonic):
+        self.__engine = engine
+        self.__listeners = list(listeners)
+        self.__lock = threading.Lock()
+        self.__is_sqlite = engine.dialect.name == "sqlite"
+        self.__connection: Optional[Connection] = None
+        self.__pid: Optional[int] = None
+        self.__data_version: Optional[int] = None
+        self.__clock = clock
+        self.__gaps: Dict[int, float] = {}  # skipped seq -> when it was first missed
+        with engine.connect() as connection:
+            self.__last_seq = connection.execute(
+                select(func.coalesce(func.max(cache_changes_table.c.seq), 0))
+            ).scalar_one()
+
+    @property
+    def last_seq(self) -> int:
+        return self.__last_seq
+
+    def add_listener(self, listener) -> None:
+        with self.__lock:
+            self.__listeners.append(listener)
+
+    def __open_connection(self) -> Connection:
+        # A connection opened before a fork belongs to the parent; each worker opens its own
+        if self.__connection is None or self.__pid != os.getpid():
+            self.__connection = self.__engine.connect()
+            self.__pid = os.getpid()
+            self.__data_version = None
+        return self.__connection
+
+    def poll(self) -> int:
+        """Apply every change committed since the last poll; returns how many were applied."""
+        # Only reading the log is serialised: listeners run after the lock is released, so a
+        # slow one (a full catalog reload) does not hold up every other request's poll
+        with self.__lock:
+            connection = self.__open_connection()
+            try:
+                if self.__is_sqlite:
+                    version = connection.exec_driver_sql("PRAGMA data_version").scalar_one()
+                    if version == self.__data_version:
+                        return 0
+                    self.__data_version = version
+                changes = self.__read_changes(connection)
+            finally:
+                connection.rollback()
+            listeners = list(self.__listeners)
+        if changes:
+            for listener in listeners:
+                listener.apply_changes(changes)
+        return len(changes)
+
+    def __read_changes(self, connection: Connection) -> List[Tuple[str, Optional[int]]]:
+        seq = cache_changes_table.c.seq
+        now = self.__clock()
+        self.__gaps = {gap: since for gap, since in self.__gaps.items() if now - since < GAP_TIMEOUT}
+        wanted = seq > self.__last_seq
+        if self.__gaps:
+            wanted = or_(wanted, seq.in_(list(self.__gaps)))
+        rows = connection.execute(
+            select(seq, cache_changes_table.c.table_name, cache_changes_table.c.row_key)
+            .where(wanted)
+            .order_by(seq)
+        ).all()
+        if not rows:
+            return []
+
+        oldest = connection.execute(select(func.min(seq))).scalar_one()
+        missed = oldest > self.__last_seq + 1
+        previous = self.__last_seq
+        for row in rows:
+            if row.seq in self.__gaps:
+                del self.__gaps[row.seq]  # committed late
+            elif row.seq > previous:
+                self.__gaps.update((gap, now) for gap in range(previous + 1, row.seq))
+                previous = row.seq
+        self.__last_seq = previous
+        if missed or len(self.__gaps) > MAX_GAPS:
+            self.__gaps.clear()
+            return [ALL_CHANGED]
+        return [(row.table_name, row.row_key) for row in rows]
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__connection is not None and self.__pid == os.getpid():
+                self.__connection.close()
+            self.__connection = None
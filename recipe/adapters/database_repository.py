@@ -1,6 +1,12 @@
-from typing import List, Optional, Tuple
-from sqlalchemy import func, asc, desc, and_
-from sqlalchemy.orm import scoped_session
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import (
+    func, asc, desc, and_, or_, select, update, delete, exists, literal, case, cast, Float, inspect as sa_inspect
+)
+from sqlalchemy.orm import scoped_session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm.exc import NoResultFound
 
 from recipe.adapters.repository import AbstractRepository
@@ -14,19 +20,45 @@ from recipe.domainmodel.favourite import Favourite
 from recipe.domainmodel.recipe_image import RecipeImage
 from recipe.domainmodel.recipe_ingredient import RecipeIngredient
 from recipe.domainmodel.recipe_instruction import RecipeInstruction
+from recipe.timing import timed
 
+# Entries kept in the cache_changes log; a watcher further behind than this clears its caches
+CHANGE_LOG_SIZE = 10000
+CHANGE_LOG_PRUNE_EVERY = 100
 
 
 class SessionContextManager:
+    """Wraps one scoped_session registry for the lifetime of the repository.
+
+    scoped_session hands every thread its own Session, so concurrent requests served by
+    different threads never share (or replace) each other's session. Ending a unit of
+    work calls remove(), which closes only the calling thread's session; the next access
+    from that thread transparently starts a new one.
+
+    Leaving a ``with`` block rolls back whatever it did not commit. A block that committed
+    is left alone: rolling back would expire every object in the thread's session, including
+    recipes already handed out (and possibly cached).
+    """
+
     def __init__(self, session_factory):
         self.__session_factory = session_factory
         self.__session = scoped_session(self.__session_factory)
+        self.__blocks = threading.local()  # per thread: one "committed?" flag per open block
+
+    def __open_blocks(self):
+        stack = getattr(self.__blocks, "stack", None)
+        if stack is None:
+            stack = self.__blocks.stack = []
+        return stack
 
     def __enter__(self):
+        self.__open_blocks().append(False)
         return self
 
-    def __exit__(self, *args):
-        self.rollback()
+    def __exit__(self, exc_type, exc_value, traceback):
+        committed = self.__open_blocks().pop()
+        if exc_type is not None or not committed:
+            self.rollback()
 
     @property
     def session(self):
@@ -34,17 +66,19 @@ class SessionContextManager:
 
     def commit(self):
         self.__session.commit()
+        stack = self.__open_blocks()
+        if stack:
+            stack[-1] = True
 
     def rollback(self):
         self.__session.rollback()
 
     def reset_session(self):
-        self.close_current_session()
-        self.__session = scoped_session(self.__session_factory)
+        # Drop the calling thread's session; other threads keep theirs.
+        self.__session.remove()
 
     def close_current_session(self):
-        if self.__session is not None:
-            self.__session.close()
+        self.__session.remove()
 
 
 class DatabaseRepository(AbstractRepository):
@@ -59,8 +93,30 @@ class DatabaseRepository(AbstractRepository):
     def reset_session(self):
         self._session_cm.reset_session()
 
+    # ---------- change log for process-local caches ----------
+
+    def _record_change(self, table_name: str, row_key: Optional[int]) -> None:
+        """Log a write in the current transaction so other workers' caches can invalidate it."""
+        from recipe.adapters.orm import cache_changes_table
+        s = self._session_cm.session
+        seq = s.execute(
+            cache_changes_table.insert().values(table_name=table_name, row_key=row_key)
+        ).inserted_primary_key[0]
+        if seq % CHANGE_LOG_PRUNE_EVERY == 0:
+            s.execute(delete(cache_changes_table).where(cache_changes_table.c.seq <= seq - CHANGE_LOG_SIZE))
+
     # ---------- helpers for sorting/filters ----------
 
+    @staticmethod
+    def _with_card_relations(q):
+        """Eager-load what recipe cards and detail pages read, so returned recipes stay usable
+        after their session is closed (e.g. when a CachingRepository shares them)."""
+        return q.options(
+            joinedload(Recipe._Recipe__author),
+            joinedload(Recipe._Recipe__category),
+            joinedload(Recipe._Recipe__nutrition),
+        )
+
     @staticmethod
     def _norm_dir(sort_dir: Optional[str]) -> str:
         return "desc" if str(sort_dir or "asc").lower() == "desc" else "asc"
@@ -78,11 +134,13 @@ class DatabaseRepository(AbstractRepository):
     def add_recipe(self, recipe: Recipe):
         with self._session_cm as scm:
             scm.session.add(recipe)
+            scm.session.flush()
+            self._record_change("recipes", recipe.id)
             scm.commit()
 
     def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
         try:
-            recipe = self._session_cm.session.query(Recipe).filter(
+            recipe = self._with_card_relations(self._session_cm.session.query(Recipe)).filter(
                 Recipe._Recipe__id == recipe_id
             ).one()
             self._populate_recipe_data(recipe)
@@ -94,7 +152,7 @@ class DatabaseRepository(AbstractRepository):
         return self.get_recipe(recipe_id)
 
     def get_all_recipes(self) -> List[Recipe]:
-        recipes = self._session_cm.session.query(Recipe).all()
+        recipes = self._with_card_relations(self._session_cm.session.query(Recipe)).all()
         self._bulk_populate_recipe_data(recipes)  # CHANGED
         return recipes
 
@@ -109,7 +167,7 @@ class DatabaseRepository(AbstractRepository):
         per_page = max(1, int(per_page or 12))
         s = self._session_cm.session
 
-        q = s.query(Recipe)
+        q = self._with_card_relations(s.query(Recipe))
 
         # normalize
         sb = (sort_by or "").lower()
@@ -128,14 +186,9 @@ class DatabaseRepository(AbstractRepository):
             then_col = func.lower(Recipe._Recipe__name)
 
         elif sb in ("rating",):
-            from recipe.adapters.orm import reviews_table, recipes_table
-            q = q.outerjoin(
-                reviews_table,
-                reviews_table.c.recipe_id == recipes_table.c.id
-            )
-            order_col = func.coalesce(func.avg(reviews_table.c.rating), 0.0)
+            # stored average maintained incrementally by add_review
+            order_col = func.coalesce(Recipe._Recipe__rating, 0.0)
             then_col = func.lower(Recipe._Recipe__name)
-            q = q.group_by(Recipe._Recipe__id)
 
 
 
@@ -161,6 +214,52 @@ class DatabaseRepository(AbstractRepository):
     def get_total_recipe_count(self) -> int:
         return self._session_cm.session.query(Recipe).count()
 
+    def detach_recipes(self, recipes: List[Recipe]) -> None:
+        """Expunge recipes, with the author, category and nutrition they show, from the calling
+        thread's session. Every recipe this repository returns has those eagerly loaded, so the
+        detached copies stay readable, and a later rollback of that session cannot expire them."""
+        session = self._session_cm.session
+        for recipe in recipes:
+            for obj in (recipe, recipe.author, recipe.category, recipe.nutrition):
+                if obj is not None and obj in session:
+                    session.expunge(obj)
+
+    def sample_recipes(self, n: int, seed=None) -> List[Recipe]:
+        """Pick random points in [min(id), max(id)] and seek to the next existing id from each.
+
+        Every seek is one primary-key index lookup, so the cost is O(n) lookups plus one query
+        for the chosen rows; the table is never scanned or ordered by RANDOM(). Ids that follow
+        a gap are somewhat likelier to be chosen, which is fine for autoincrement ids.
+        """
+        from recipe.adapters.orm import recipes_table
+        n = max(0, int(n))
+        s = self._session_cm.session
+        lowest, highest = s.execute(select(func.min(recipes_table.c.id), func.max(recipes_table.c.id))).one()
+        if not n or lowest is None:
+            return []
+
+        rng = random.Random(seed)
+        chosen: Dict[int, None] = {}  # insertion-ordered set
+        for _ in range(4 * n + 16):
+            if len(chosen) == n:
+                break
+            start = rng.randint(lowest, highest)
+            chosen[s.execute(
+                select(recipes_table.c.id).where(recipes_table.c.id >= start).order_by(recipes_table.c.id).limit(1)
+            ).scalar_one()] = None
+        if len(chosen) < n:
+            # Only when n is close to the catalog size: top up with the ids not drawn yet
+            chosen.update(dict.fromkeys(s.execute(
+                select(recipes_table.c.id).where(recipes_table.c.id.not_in(list(chosen)))
+                .order_by(recipes_table.c.id).limit(n - len(chosen))
+            ).scalars()))
+
+        ids = list(chosen)
+        by_id = {r.id: r for r in self._with_card_relations(s.query(Recipe)).filter(Recipe._Recipe__id.in_(ids))}
+        recipes = [by_id[i] for i in ids if i in by_id]
+        self._bulk_populate_recipe_data(recipes)
+        return recipes
+
     def search_recipes(self, query: str, category: str, author: str, ingredient: str) -> List[Recipe]:
         """YOUR search_recipes signature."""
         q = self._session_cm.session.query(Recipe)
@@ -203,7 +302,7 @@ class DatabaseRepository(AbstractRepository):
         i_str = self._norm_str(ingredient)
 
         s = self._session_cm.session
-        base = s.query(Recipe)
+        base = self._with_card_relations(s.query(Recipe))
         count_q = s.query(func.count(func.distinct(Recipe._Recipe__id)))
 
         # --- filters (mirror on count_q) ---
@@ -248,15 +347,9 @@ class DatabaseRepository(AbstractRepository):
             then_col = func.lower(Recipe._Recipe__name)
 
         elif sb in ("rating",):
-            # avoid Review→Review join ambiguity by joining via tables explicitly
-            from recipe.adapters.orm import reviews_table, recipes_table
-            base = base.outerjoin(
-                reviews_table,
-                reviews_table.c.recipe_id == recipes_table.c.id
-            )
-            order_col = func.coalesce(func.avg(reviews_table.c.rating), 0.0)
+            # stored average maintained incrementally by add_review
+            order_col = func.coalesce(Recipe._Recipe__rating, 0.0)
             then_col = func.lower(Recipe._Recipe__name)
-            base = base.group_by(Recipe._Recipe__id)
 
 
         elif sb in ("author",):
@@ -276,6 +369,7 @@ class DatabaseRepository(AbstractRepository):
         self._bulk_populate_recipe_data(items)
         return items, total
 
+    @timed("populate")
     def _bulk_populate_recipe_data(self, recipes: List[Recipe]):
         """Load data for multiple recipes in just 3 queries instead of 3*N queries."""
         if not recipes:
@@ -341,11 +435,10 @@ class DatabaseRepository(AbstractRepository):
     # ===========================
 
     def add_user(self, user: User):
+        """Insert a user; when user.id is None the database assigns it and the flush reads it back."""
         with self._session_cm as scm:
-            if user.id is None:
-                max_id = scm.session.query(func.max(User._User__id)).scalar()
-                user.id = (max_id or 0) + 1
             scm.session.add(user)
+            scm.session.flush()
             scm.commit()
 
     def get_user(self, user_id: int) -> Optional[User]:
@@ -364,6 +457,7 @@ class DatabaseRepository(AbstractRepository):
             return None
 
     def next_user_id(self) -> int:
+        """Informational only (debug pages): inserts never use this, ids come from the autoincrement column."""
         max_id = self._session_cm.session.query(func.max(User._User__id)).scalar()
         return (max_id or 0) + 1
 
@@ -371,86 +465,183 @@ class DatabaseRepository(AbstractRepository):
     # REVIEW METHODS
     # ===========================
 
-    def add_review(self, recipe_id: int, user_id: int, rating: int, comment: str):
-        from datetime import datetime
-        with self._session_cm as scm:
-            user = scm.session.query(User).filter(User._User__id == user_id).one()
-            recipe = scm.session.query(Recipe).filter(Recipe._Recipe__id == recipe_id).one()
-
-            # --- UPSERT: try find an existing review by this user for this recipe ---
-            existing = scm.session.query(Review).filter(
-                Review._Review__user == user,
-                Review._Review__recipe == recipe
-            ).one_or_none()
-
-            if existing:
-                # Update existing review (edit)
-                existing._Review__rating = rating
-                existing._Review__text = comment
-                existing._Review__timestamp = datetime.now()
-            else:
-                # Insert new review
-                max_id = scm.session.query(func.max(Review._Review__id)).scalar()
-                review_id = (max_id or 0) + 1
-                review = Review(review_id, user, recipe, datetime.now(), rating, comment)
-                scm.session.add(review)
-
-            # --- Recompute and store the recipe's average rating ---
-            avg = scm.session.query(func.avg(Review._Review__rating)).filter(
-                Review._Review__recipe.has(Recipe._Recipe__id == recipe_id)
-            ).scalar()
-            recipe._Recipe__rating = round(float(avg), 1) if avg else None
+    def _dialect_insert(self, table):
+        """INSERT construct supporting ON CONFLICT for the bound dialect (SQLite or PostgreSQL)."""
+        if self._session_cm.session.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(table)
+
+    def add_review(self, recipe_id: int, user_id: int, rating: int, comment: str) -> bool:
+        return self.add_review_returning_rating(recipe_id, user_id, rating, comment)[0]
+
+    def add_review_returning_rating(self, recipe_id: int, user_id: int, rating: int,
+                                    comment: str) -> Tuple[bool, Optional[float]]:
+        """add_review, also returning the recipe's new stored average (from the UPDATE's RETURNING).
+
+        Upserts the review in one transaction of two statements:
+
+        1. UPDATE the recipe's running rating_sum/rating_count (and stored average) by the delta
+           against the user's previous rating, if any. This takes the write lock before the
+           review row is touched, so concurrent posts serialise instead of double counting.
+        2. INSERT ... ON CONFLICT(user_id, recipe_id) DO UPDATE the review itself; the id comes
+           from the autoincrement column.
+        """
+        from recipe.adapters.orm import reviews_table, recipes_table, users_table
+
+        previous = select(reviews_table.c.rating).where(
+            reviews_table.c.user_id == user_id,
+            reviews_table.c.recipe_id == recipe_id,
+        ).scalar_subquery()
+        new_sum = recipes_table.c.rating_sum + rating - func.coalesce(previous, 0)
+        new_count = recipes_table.c.rating_count + case((previous.is_(None), 1), else_=0)
+
+        update_totals = update(recipes_table).where(
+            recipes_table.c.id == recipe_id,
+            exists().where(users_table.c.id == user_id),
+        ).values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=func.round(cast(new_sum, Float) / new_count, 1),
+        ).returning(previous, recipes_table.c.rating)
+
+        insert_review = self._dialect_insert(reviews_table).values(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            rating=rating,
+            text=comment,
+            timestamp=datetime.now(),
+        )
+        upsert_review = insert_review.on_conflict_do_update(
+            index_elements=[reviews_table.c.user_id, reviews_table.c.recipe_id],
+            set_={
+                "rating": insert_review.excluded.rating,
+                "text": insert_review.excluded.text,
+                "timestamp": insert_review.excluded.timestamp,
+            },
+        )
 
+        with self._session_cm as scm:
+            row = scm.session.execute(update_totals).first()
+            if row is None:
+                raise ValueError("User or Recipe not found")
+            scm.session.execute(upsert_review)
+            self._record_change("reviews", recipe_id)
             scm.commit()
 
-    def reviews_for_recipe(self, recipe_id: int) -> List[Review]:
-        return self._session_cm.session.query(Review).filter(
-            Review._Review__recipe.has(Recipe._Recipe__id == recipe_id)
-        ).order_by(desc(Review._Review__timestamp)).all()
+            # Core statements bypass the identity map; refresh a Recipe this session already holds
+            loaded = scm.session.identity_map.get(sa_inspect(Recipe).identity_key_from_primary_key((recipe_id,)))
+            if loaded is not None:
+                set_committed_value(loaded, "_Recipe__rating", row[1])
+        return row[0] is not None, row[1]
+
+    def reviews_for_recipe(
+            self,
+            recipe_id: int,
+            cursor: Optional[Tuple[datetime, int]] = None,
+            limit: Optional[int] = None,
+    ) -> List[Review]:
+        """Keyset-paged reviews with their reviewers joined in the same query."""
+        from recipe.adapters.orm import reviews_table
+        q = self._session_cm.session.query(Review).options(
+            joinedload(Review._Review__user)
+        ).filter(reviews_table.c.recipe_id == recipe_id)
+
+        if cursor is not None:
+            after_ts, after_id = cursor
+            q = q.filter(or_(
+                reviews_table.c.timestamp < after_ts,
+                and_(reviews_table.c.timestamp == after_ts, reviews_table.c.id < after_id),
+            ))
+
+        q = q.order_by(desc(reviews_table.c.timestamp), desc(reviews_table.c.id))
+        if limit is not None:
+            q = q.limit(max(0, int(limit)))
+        return q.all()
+
+    def has_reviewed(self, user_id: int, recipe_id: int) -> bool:
+        """One EXISTS probe of the (user_id, recipe_id) unique index."""
+        from recipe.adapters.orm import reviews_table
+        return bool(self._session_cm.session.execute(select(exists().where(
+            reviews_table.c.user_id == user_id,
+            reviews_table.c.recipe_id == recipe_id,
+        ))).scalar())
 
     def average_rating(self, recipe_id: int) -> float:
-        avg = self._session_cm.session.query(func.avg(Review._Review__rating)).filter(
-            Review._Review__recipe.has(Recipe._Recipe__id == recipe_id)
-        ).scalar()
-        return float(avg) if avg else 0.0
+        from recipe.adapters.orm import recipes_table
+        row = self._session_cm.session.execute(
+            select(recipes_table.c.rating_sum, recipes_table.c.rating_count).where(recipes_table.c.id == recipe_id)
+        ).first()
+        if not row or not row.rating_count:
+            return 0.0
+        return row.rating_sum / row.rating_count
+
+    def rating_distribution(self, recipe_id: int) -> Dict[int, int]:
+        """One GROUP BY over the reviews index; never loads review rows or text."""
+        from recipe.adapters.orm import reviews_table
+        rows = self._session_cm.session.query(
+            reviews_table.c.rating, func.count(reviews_table.c.id)
+        ).filter(
+            reviews_table.c.recipe_id == recipe_id
+        ).group_by(reviews_table.c.rating).all()
+        return {int(rating): int(count) for rating, count in rows}
 
     # ===========================
     # FAVOURITE METHODS
     # ===========================
 
-    def add_favourite(self, user_id: int, recipe_id: int):
-        with self._session_cm as scm:
-            # Check if exists
-            existing = scm.session.query(Favourite).filter(
-                and_(
-                    Favourite._Favourite__user.has(User._User__id == user_id),
-                    Favourite._Favourite__recipe.has(Recipe._Recipe__id == recipe_id)
-                )
-            ).first()
-
-            if not existing:
-                user = scm.session.query(User).filter(User._User__id == user_id).one()
-                recipe = scm.session.query(Recipe).filter(Recipe._Recipe__id == recipe_id).one()
-
-                max_id = scm.session.query(func.max(Favourite._Favourite__id)).scalar()
-                favourite_id = (max_id or 0) + 1
+    def add_favourite(self, user_id: int, recipe_id: int) -> bool:
+        """Single INSERT ... SELECT ... ON CONFLICT DO NOTHING; the id comes from the autoincrement column."""
+        from recipe.adapters.orm import favourites_table, users_table, recipes_table
 
-                favourite = Favourite(favourite_id, user, recipe)
-                scm.session.add(favourite)
-                scm.commit()
+        both_exist = select(literal(user_id), literal(recipe_id)).where(
+            exists().where(users_table.c.id == user_id),
+            exists().where(recipes_table.c.id == recipe_id),
+        )
+        stmt = self._dialect_insert(favourites_table).from_select(
+            [favourites_table.c.user_id, favourites_table.c.recipe_id], both_exist
+        ).on_conflict_do_nothing(
+            index_elements=[favourites_table.c.user_id, favourites_table.c.recipe_id]
+        )
 
-    def remove_favourite(self, user_id: int, recipe_id: int):
         with self._session_cm as scm:
-            favourite = scm.session.query(Favourite).filter(
-                and_(
-                    Favourite._Favourite__user.has(User._User__id == user_id),
-                    Favourite._Favourite__recipe.has(Recipe._Recipe__id == recipe_id)
+            added = scm.session.execute(stmt).rowcount > 0
+            # Nothing inserted: either it was already a favourite, or the user/recipe is missing.
+            # Probed in the same transaction, before the commit.
+            is_favourite_now = added or scm.session.execute(
+                select(favourites_table.c.id).where(
+                    favourites_table.c.user_id == user_id,
+                    favourites_table.c.recipe_id == recipe_id,
                 )
-            ).first()
+            ).first() is not None
+            if added:
+                self._record_change("favourites", user_id)
+            scm.commit()
+        if not is_favourite_now:
+            raise ValueError("User or Recipe not found")
+        return added
+
+    def remove_favourite(self, user_id: int, recipe_id: int) -> bool:
+        from recipe.adapters.orm import favourites_table
+        stmt = delete(favourites_table).where(
+            favourites_table.c.user_id == user_id,
+            favourites_table.c.recipe_id == recipe_id,
+        )
+        with self._session_cm as scm:
+            removed = scm.session.execute(stmt).rowcount > 0
+            if removed:
+                self._record_change("favourites", user_id)
+            scm.commit()
+        return removed
 
-            if favourite:
-                scm.session.delete(favourite)
-                scm.commit()
+    def is_favourite(self, user_id: int, recipe_id: int) -> bool:
+        """One EXISTS probe of the (user_id, recipe_id) unique index."""
+        from recipe.adapters.orm import favourites_table
+        return bool(self._session_cm.session.execute(select(exists().where(
+            favourites_table.c.user_id == user_id,
+            favourites_table.c.recipe_id == recipe_id,
+        ))).scalar())
 
     def favourites_for_user(self, user_id: int) -> List[Recipe]:
         favourites = self._session_cm.session.query(Favourite).filter(
@@ -465,6 +656,7 @@ class DatabaseRepository(AbstractRepository):
     # UTILITY METHODS
     # ===========================
 
+    @timed("health")
     def calculate_health_star_rating(self, recipe: Recipe) -> Optional[float]:
         """YOUR calculate_health_star_rating - copied from memory_repository."""
         nutrition = getattr(recipe, "nutrition", None)
@@ -2,9 +2,12 @@
 import os
 import csv
 import ast
+import sys
 from datetime import datetime
 from recipe.domainmodel.author import Author
+from recipe.adapters.datareader.csvrowstore import CSVRowStore, LazyRecipe
 from recipe.domainmodel.category import Category
+from recipe.domainmodel.image_urls import CompactImageUrls
 from recipe.domainmodel.nutrition import Nutrition
 from recipe.domainmodel.recipe import Recipe
 from recipe.domainmodel.recipe_image import RecipeImage
@@ -12,10 +15,17 @@ from recipe.domainmodel.recipe_ingredient import RecipeIngredient
 from recipe.domainmodel.recipe_instruction import RecipeInstruction
 
 
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 class CSVDataReader:
-    def __init__(self, csv_filename, database_mode=False):  # ADDED database_mode parameter
+    def __init__(self, csv_filename, database_mode=False, lazy_details=False):  # ADDED database_mode parameter
         self.__csv_filename = csv_filename
         self.__database_mode = database_mode  # ADDED
+        # Lazy mode keeps only a row offset per recipe and reads detail columns back on demand
+        self.__row_store = None
+        self.__lazy_details = lazy_details and not database_mode
         self.__authors = {}
         self.__categories = {}
         self.__recipes = []
@@ -28,6 +38,14 @@ class CSVDataReader:
         self.__recipe_instructions = []
 
     def read_csv_file(self):
+        if self.__lazy_details:
+            self.__row_store = CSVRowStore(self.__csv_filename)
+            for offset, row in self.__row_store.iter_rows():
+                recipe = self._create_recipe_from_row(row, offset)
+                if recipe:
+                    self.__recipes.append(recipe)
+            return
+
         with open(self.__csv_filename, 'r', encoding='utf-8') as file:
             csv_reader = csv.DictReader(file)
             for row in csv_reader:
@@ -35,20 +53,23 @@ class CSVDataReader:
                 if recipe:
                     self.__recipes.append(recipe)
 
-    def _create_recipe_from_row(self, row):
+    def _create_recipe_from_row(self, row, offset=None):
+        lazy = self.__row_store is not None and offset is not None
         try:
             recipe_id = int(row['RecipeId'])
             name = row['Name']
             author_id = int(row['AuthorId'])
-            author_name = row['AuthorName']
+            author_name = sys.intern(row['AuthorName'])
             cook_time = int(row['CookTime'])
             prep_time = int(row['PrepTime'])
             date_pub = self.parse_date(row['DatePublished'])
             description = row['Description']
             images = ast.literal_eval(row['Images'])
-            recipe_category = row['RecipeCategory']
-            ingredient_quantities = ast.literal_eval(row['RecipeIngredientQuantities'])
-            ingredients = [str(i).strip().capitalize() for i in ast.literal_eval(row['RecipeIngredientParts'])]
+            recipe_category = sys.intern(row['RecipeCategory'])
+            # Ingredient names, quantities, servings and yields repeat across thousands of rows
+            ingredient_quantities = [] if lazy else [
+                _intern(q) for q in ast.literal_eval(row['RecipeIngredientQuantities'])]
+            ingredients = [sys.intern(str(i).strip().capitalize()) for i in ast.literal_eval(row['RecipeIngredientParts'])]
             calories = float(row['Calories'])
             fat_content = float(row['FatContent'])
             saturated_fat_content = float(row['SaturatedFatContent'])
@@ -58,9 +79,9 @@ class CSVDataReader:
             fiber = float(row['FiberContent'])
             sugars = float(row['SugarContent'])
             protein = float(row['ProteinContent'])
-            serving_size = row['RecipeServings']
-            recipe_yield = row['RecipeYield']
-            instructions = ast.literal_eval(row['RecipeInstructions'])
+            serving_size = sys.intern(str(row['RecipeServings']))
+            recipe_yield = sys.intern(row['RecipeYield'])
+            instructions = [] if lazy else ast.literal_eval(row['RecipeInstructions'])
 
             author = self._get_create_author(author_id, author_name)
             category = self._get_create_category(recipe_category)
@@ -79,7 +100,15 @@ class CSVDataReader:
             )
             self.__nutrition_id_counter += 1
 
-            recipe = Recipe(
+            if self.__database_mode:
+                stored_images = images
+            elif lazy:
+                stored_images = None
+            else:
+                # Memory mode keeps image URLs as (prefix id, suffix) pairs; the DB stores them whole
+                stored_images = CompactImageUrls(images)
+
+            recipe_fields = dict(
                 recipe_id=recipe_id,
                 name=name,
                 author=author,
@@ -87,34 +116,28 @@ class CSVDataReader:
                 preparation_time=prep_time,
                 created_date=date_pub,
                 description=description,
-                images=images,
+                images=stored_images,
                 category=category,
                 ingredient_quantities=ingredient_quantities,
                 ingredients=ingredients,
                 nutrition=nutrition,
-                servings=str(serving_size),
+                servings=serving_size,
                 recipe_yield=recipe_yield,
                 instructions=instructions
             )
+            if lazy:
+                recipe = LazyRecipe.from_row_store(
+                    self.__row_store, offset, images[0] if images else None, **recipe_fields)
+            else:
+                recipe = Recipe(**recipe_fields)
 
             # Create helper objects for database mode
-            for idx, img_url in enumerate(images):
-                if img_url and img_url.strip():
-                    self.__recipe_images.append(RecipeImage(recipe_id, img_url.strip(), idx))
+            if self.__database_mode:
+                self._create_helper_objects(recipe_id, images, ingredients, ingredient_quantities, instructions)
 
-            for idx, ing in enumerate(ingredients):
-                qty = ingredient_quantities[idx] if idx < len(ingredient_quantities) else ""
-                if ing and ing.strip():
-                    self.__recipe_ingredients.append(RecipeIngredient(recipe_id, qty, ing.strip(), idx))
-
-            for idx, inst in enumerate(instructions):
-                if inst and inst.strip():
-                    self.__recipe_instructions.append(RecipeInstruction(recipe_id, inst.strip(), idx))
-
-            # ONLY maintain bidirectional relationships in memory mode
-            if not self.__database_mode:
-                author.add_recipe(recipe)
-                category.add_recipe(recipe)
+            # Author.recipes / Category.recipes are deliberately left empty: back-references
+            # would tie every recipe into a reference cycle the GC has to keep traversing.
+            # MemoryRepository indexes recipe ids by author and category instead.
 
             return recipe
 
@@ -122,6 +145,20 @@ class CSVDataReader:
             print(f"Error processing recipe {row.get('RecipeId', 'unknown')}: {e}")
             return None
 
+    def _create_helper_objects(self, recipe_id, images, ingredients, ingredient_quantities, instructions):
+        for idx, img_url in enumerate(images):
+            if img_url and img_url.strip():
+                self.__recipe_images.append(RecipeImage(recipe_id, img_url.strip(), idx))
+
+        for idx, ing in enumerate(ingredients):
+            qty = ingredient_quantities[idx] if idx < len(ingredient_quantities) else ""
+            if ing and ing.strip():
+                self.__recipe_ingredients.append(RecipeIngredient(recipe_id, qty, ing.strip(), idx))
+
+        for idx, inst in enumerate(instructions):
+            if inst and inst.strip():
+                self.__recipe_instructions.append(RecipeInstruction(recipe_id, inst.strip(), idx))
+
     def _get_create_author(self, author_id, author_name):
         if author_id not in self.__authors:
             self.__authors[author_id] = Author(author_id, author_name)
@@ -0,0 +1,139 @@
+# recipe/adapters/datareader/csvrowstore.py
+import ast
+import csv
+import mmap
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from recipe.domainmodel.recipe import Recipe
+
+# How many recipes keep their detail columns parsed at once
+DETAIL_CACHE_SIZE = 128
+
+
+class RecipeDetails(NamedTuple):
+    images: List[str]
+    ingredient_quantities: List[str]
+    instructions: List[str]
+
+
+class CSVRowStore:
+    """
+    Read-only, memory-mapped view of a recipes CSV file addressed by row byte offset.
+
+    The catalog keeps one integer offset per recipe instead of its heavy columns; the columns
+    are parsed again from the mapped file on demand and the most recently used results are
+    kept in a small LRU. The mapping is shared by every thread (and, after a fork, by every
+    worker) through the OS page cache.
+    """
+
+    def __init__(self, csv_filename: str, cache_size: int = DETAIL_CACHE_SIZE):
+        with open(csv_filename, "rb") as file:
+            self.__data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__cache_size = cache_size
+        self.__cache: "OrderedDict[int, RecipeDetails]" = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+        cursor = [0]
+        self.__header = next(csv.reader(self.__lines(0, cursor)))
+        self.__data_start = cursor[0]
+
+    def __lines(self, start: int, cursor: List[int]) -> Iterator[str]:
+        """Yield decoded lines from ``start``; ``cursor[0]`` tracks the end of the last one."""
+        data = self.__data
+        size = len(data)
+        pos = start
+        while pos < size:
+            end = data.find(b"\n", pos)
+            end = size if end == -1 else end + 1
+            cursor[0] = end
+            yield data[pos:end].decode("utf-8")
+            pos = end
+
+    def iter_rows(self) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """Yield ``(offset, row)`` for every data row, like ``csv.DictReader`` plus offsets."""
+        cursor = [self.__data_start]
+        reader = csv.reader(self.__lines(self.__data_start, cursor))
+        while True:
+            offset = cursor[0]
+            try:
+                fields = next(reader)
+            except StopIteration:
+                return
+            if fields:
+                yield offset, dict(zip(self.__header, fields))
+
+    def row_at(self, offset: int) -> Dict[str, str]:
+        fields = next(csv.reader(self.__lines(offset, [offset])))
+        return dict(zip(self.__header, fields))
+
+    def details(self, offset: int) -> RecipeDetails:
+        with self.__lock:
+            details = self.__cache.get(offset)
+            if details is not None:
+                self.__cache.move_to_end(offset)
+                self.__hits += 1
+                return details
+            self.__misses += 1
+
+        row = self.row_at(offset)
+        details = RecipeDetails(
+            images=ast.literal_eval(row['Images']),
+            ingredient_quantities=ast.literal_eval(row['RecipeIngredientQuantities']),
+            instructions=ast.literal_eval(row['RecipeInstructions']),
+        )
+
+        with self.__lock:
+            self.__cache[offset] = details
+            self.__cache.move_to_end(offset)
+            while len(self.__cache) > self.__cache_size:
+                self.__cache.popitem(last=False)
+        return details
+
+    @property
+    def cache_info(self) -> Dict[str, int]:
+        with self.__lock:
+            return {"hits": self.__hits, "misses": self.__misses, "size": len(self.__cache)}
+
+
+class LazyRecipe(Recipe):
+    """
+    Recipe whose images, ingredient quantities and instructions live in a CSVRowStore.
+
+    Card fields (name, author, times, description, ingredients, nutrition, thumbnail) stay
+    resident so browse and search never touch the file; the detail columns are hydrated on
+    first access.
+    """
+    __slots__ = ("__store", "__offset", "__thumbnail")
+
+    @classmethod
+    def from_row_store(cls, store: CSVRowStore, offset: int, thumbnail: Optional[str],
+                       **fields) -> "LazyRecipe":
+        # Built through Recipe.__init__ unchanged (no __init__ override), so the class stays
+        # compatible with the SQLAlchemy instrumentation Recipe gets in database mode.
+        recipe = cls(**fields)
+        # The base class's resident copies of the detail columns are never read; drop them
+        recipe._Recipe__images = recipe._Recipe__ingredient_quantities = recipe._Recipe__instructions = None
+        recipe.__store = store
+        recipe.__offset = offset
+        recipe.__thumbnail = thumbnail
+        return recipe
+
+    @property
+    def images(self) -> list[str]:
+        return list(self.__store.details(self.__offset).images)
+
+    @property
+    def thumbnail(self) -> Optional[str]:
+        return self.__thumbnail
+
+    @property
+    def ingredient_quantities(self) -> list[str]:
+        return self.__store.details(self.__offset).ingredient_quantities
+
+    @property
+    def instructions(self) -> list[str]:
+        return self.__store.details(self.__offset).instructions
@@ -0,0 +1,169 @@
+# recipe/adapters/hybrid_repository.py
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from recipe.adapters.database_repository import DatabaseRepository
+from recipe.adapters.memory_repository import MemoryRepository
+from recipe.adapters.repository import AbstractRepository
+from recipe.domainmodel.recipe import Recipe
+from recipe.domainmodel.review import Review
+from recipe.domainmodel.user import User
+
+
+def load_catalog(database: DatabaseRepository) -> MemoryRepository:
+    """Copy every recipe (with its author, category, nutrition and detail lists) into memory."""
+    catalog = MemoryRepository()
+    try:
+        for recipe in database.get_all_recipes():
+            catalog.add_recipe(recipe)
+    finally:
+        # Detach the loaded recipes; they are only read from now on
+        database.close_session()
+    return catalog
+
+
+class HybridRepository(AbstractRepository):
+    """
+    Catalog reads from memory, user data in the database.
+
+    Browse, search, detail pages and suggestions are served by a MemoryRepository loaded
+    from the database once at startup. Users, reviews and favourites are read from and
+    written to the DatabaseRepository; after each review the recipe's stored average is
+    copied back into the in-memory catalog so rating sorts and cards stay current. Reviews
+    and recipes added by other workers arrive through ``apply_changes``.
+    """
+
+    def __init__(self, database: DatabaseRepository, catalog: Optional[MemoryRepository] = None):
+        self.__database = database
+        self.__catalog = catalog if catalog is not None else load_catalog(database)
+
+    @property
+    def database(self) -> DatabaseRepository:
+        return self.__database
+
+    @property
+    def catalog(self) -> MemoryRepository:
+        return self.__catalog
+
+    def close_session(self):
+        self.__database.close_session()
+
+    def reset_session(self):
+        self.__database.reset_session()
+
+    def apply_changes(self, changes: Iterable[Tuple[str, Optional[int]]]) -> None:
+        """Bring the catalog up to date with writes made by other workers (see ChangeWatcher)."""
+        for table_name, key in changes:
+            if table_name == "reviews":
+                self.refresh_rating(key)
+            elif table_name == "recipes" and self.__catalog.get_recipe(key) is None:
+                recipe = self.__database.get_recipe(key)
+                if recipe is not None:
+                    self.__catalog.add_recipe(recipe)
+            elif table_name == "*":
+                self.__catalog = load_catalog(self.__database)
+                return
+
+    # ---------- Recipes (memory) ----------
+    def add_recipe(self, recipe: Recipe):
+        self.__database.add_recipe(recipe)
+        self.__catalog.add_recipe(recipe)
+
+    def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
+        return self.__catalog.get_recipe(recipe_id)
+
+    def get_recipe_by_id(self, recipe_id: int) -> Optional[Recipe]:
+        return self.get_recipe(recipe_id)
+
+    def get_all_recipes(self) -> List[Recipe]:
+        return self.__catalog.get_all_recipes()
+
+    def get_recipes_by_page(self, page: int, per_page: int, sort_by: Optional[str] = None,
+                            sort_dir: Optional[str] = "asc") -> List[Recipe]:
+        return self.__catalog.get_recipes_by_page(page, per_page, sort_by=sort_by, sort_dir=sort_dir)
+
+    def search_recipes_paged(self, query=None, category=None, author=None, ingredient=None, page=1,
+                             per_page=12, sort_by=None, sort_dir="asc") -> Tuple[List[Recipe], int]:
+        return self.__catalog.search_recipes_paged(
+            query=query, category=category, author=author, ingredient=ingredient,
+            page=page, per_page=per_page, sort_by=sort_by, sort_dir=sort_dir,
+        )
+
+    def get_total_recipe_count(self) -> int:
+        return self.__catalog.get_total_recipe_count()
+
+    def detach_recipes(self, recipes: List[Recipe]) -> None:
+        self.__catalog.detach_recipes(recipes)
+
+    def sample_recipes(self, n: int, seed=None) -> List[Recipe]:
+        return self.__catalog.sample_recipes(n, seed)
+
+    def search_recipes(self, query: str, category: str, author: str, ingredient: str) -> List[Recipe]:
+        return self.__catalog.search_recipes(query, category, author, ingredient)
+
+    def calculate_health_star_rating(self, recipe: Recipe) -> Optional[float]:
+        return self.__catalog.calculate_health_star_rating(recipe)
+
+    def distinct_values(self, field: str, query: str = "", limit: int = 10) -> List[str]:
+        return self.__catalog.distinct_values(field, query, limit)
+
+    # ---------- Users (database) ----------
+    def add_user(self, user: User):
+        self.__database.add_user(user)
+
+    def get_user(self, user_id: int) -> Optional[User]:
+        return self.__database.get_user(user_id)
+
+    def get_user_by_id(self, user_id: int) -> Optional[User]:
+        return self.__database.get_user_by_id(user_id)
+
+    def get_user_by_username(self, username: str) -> Optional[User]:
+        return self.__database.get_user_by_username(username)
+
+    def next_user_id(self) -> int:
+        return self.__database.next_user_id()
+
+    # ---------- Favourites (database) ----------
+    def add_favourite(self, user_id: int, recipe_id: int) -> bool:
+        return self.__database.add_favourite(user_id, recipe_id)
+
+    def remove_favourite(self, user_id: int, recipe_id: int) -> bool:
+        return self.__database.remove_favourite(user_id, recipe_id)
+
+    def is_favourite(self, user_id: int, recipe_id: int) -> bool:
+        return self.__database.is_favourite(user_id, recipe_id)
+
+    def favourites_for_user(self, user_id: int) -> List[Recipe]:
+        # Hand back the catalog's objects so templates never touch detached database rows
+        recipes = []
+        for recipe in self.__database.favourites_for_user(user_id):
+            recipes.append(self.__catalog.get_recipe(recipe.id) or recipe)
+        return recipes
+
+    # ---------- Reviews (database, aggregates mirrored in memory) ----------
+    def add_review(self, recipe_id: int, user_id: int, rating: int, comment: str) -> bool:
+        updated, average = self.__database.add_review_returning_rating(recipe_id, user_id, rating, comment)
+        self.__catalog.update_rating(recipe_id, average)
+        return updated
+
+    def refresh_rating(self, recipe_id: int) -> None:
+        """Copy the database's stored average for a recipe into the in-memory catalog (for
+        reviews written by other workers; this worker's own writes return the new average)."""
+        if self.__database.rating_distribution(recipe_id):
+            rating = round(self.__database.average_rating(recipe_id), 1)
+        else:
+            rating = None
+        self.__catalog.update_rating(recipe_id, rating)
+
+    def reviews_for_recipe(self, recipe_id: int, cursor: Optional[Tuple[datetime, int]] = None,
+                           limit: Optional[int] = None) -> List[Review]:
+        return self.__database.reviews_for_recipe(recipe_id, cursor=cursor, limit=limit)
+
+    def has_reviewed(self, user_id: int, recipe_id: int) -> bool:
+        return self.__database.has_reviewed(user_id, recipe_id)
+
+    def average_rating(self, recipe_id: int) -> float:
+        return self.__database.average_rating(recipe_id)
+
+    def rating_distribution(self, recipe_id: int) -> Dict[int, int]:
+        return self.__database.rating_distribution(recipe_id)
@@ -1,7 +1,10 @@
 # recipe/adapters/memory_repository.py
 from bisect import insort_left
-from typing import List, Optional, Dict, Set
+from typing import List, Optional, Dict, FrozenSet, Set, Tuple
+import gc
 import os
+import random
+import threading
 from datetime import datetime
 
 from recipe.domainmodel.recipe import Recipe
@@ -10,13 +13,46 @@ from recipe.domainmodel.user import User
 from recipe.adapters.repository import AbstractRepository
 from recipe.adapters.datareader.csvdatareader import CSVDataReader
 from recipe.domainmodel.category import Category
+from recipe.timing import timed
+
+
+class SimpleReview:
+    """Review record used by the in-memory repository; replaced, never mutated, on upsert."""
+
+    def __init__(self, review_id, user, recipe, rating, text, timestamp):
+        self.id = review_id
+        self.user = user
+        self.recipe = recipe
+        self.rating = rating
+        self.text = text
+        self.timestamp = timestamp
 
 
 class MemoryRepository(AbstractRepository):
+    """In-memory repository that is safe to share between threads.
+
+    Readers never lock. Writers serialise on one short exclusive lock and publish
+    copy-on-write versions of anything a reader may iterate (the recipe list, a user's
+    favourites, a recipe's reviews and rating histogram), so a reader always works on a
+    consistent snapshot. Point-lookup dicts are updated in place under the lock; single
+    dict assignments are atomic for concurrent readers.
+    """
+
     def __init__(self):
+        self.__write_lock = threading.RLock()
         self.__recipe: List[Recipe] = []
-        self.__user_favourites: Dict[int, Set[int]] = {}
-        self.__reviews: Dict[int, List[Review]] = {}
+        self.__recipes_by_id: Dict[int, Recipe] = {}
+        # Lower-cased author / category name -> recipe ids. Tuples of ids rather than recipe
+        # lists keep the catalog acyclic, and the GC stops tracking tuples of plain ints.
+        self.__recipe_ids_by_author: Dict[str, Tuple[int, ...]] = {}
+        self.__recipe_ids_by_category: Dict[str, Tuple[int, ...]] = {}
+        # (sort_by, sort_dir) -> whole catalog in that order; rebuilt lazily after writes
+        self.__sort_orders: Dict[Tuple[str, str], List[Recipe]] = {}
+        self.__user_favourites: Dict[int, FrozenSet[int]] = {}
+        self.__reviews: Dict[int, Tuple[Review, ...]] = {}
+        self.__rating_counts: Dict[int, Dict[int, int]] = {}
+        self.__next_review_id: int = 1
+        self.__review_by_user: Dict[Tuple[int, int], "SimpleReview"] = {}
 
         # Users
         self.__users_by_id: Dict[int, User] = {}
@@ -25,10 +61,11 @@ class MemoryRepository(AbstractRepository):
 
     # ---------- Users ----------
     def add_user(self, user: User):
-        if user.id is None:
-            user.id = self.next_user_id()
-        self.__users_by_id[user.id] = user
-        self.__users_by_username[user.username] = user
+        with self.__write_lock:
+            if user.id is None:
+                user.id = self.next_user_id()
+            self.__users_by_id[user.id] = user
+            self.__users_by_username[user.username] = user
 
     def get_user(self, user_id: int) -> Optional[User]:
         return self.__users_by_id.get(user_id, None)
@@ -40,31 +77,89 @@ class MemoryRepository(AbstractRepository):
         return self.__users_by_username.get(username, None)
 
     def next_user_id(self) -> int:
-        user_id = self.__next_user_id
-        self.__next_user_id += 1
-        return user_id
+        with self.__write_lock:
+            user_id = self.__next_user_id
+            self.__next_user_id += 1
+            return user_id
 
     # ---------- Recipes ----------
     def add_recipe(self, recipe: Recipe):
         if isinstance(recipe, Recipe):
-            insort_left(self.__recipe, recipe)
+            with self.__write_lock:
+                recipes = list(self.__recipe)
+                insort_left(recipes, recipe)
+                if recipe.id not in self.__recipes_by_id:
+                    self.__index_recipe(self.__recipe_ids_by_author, recipe.author, recipe.id)
+                    self.__index_recipe(self.__recipe_ids_by_category, recipe.category, recipe.id)
+                self.__recipes_by_id[recipe.id] = recipe
+                self.__recipe = recipes
+                self.__sort_orders = {}
+
+    @staticmethod
+    def __index_recipe(index: Dict[str, Tuple[int, ...]], owner, recipe_id: int):
+        name = getattr(owner, "name", owner)
+        if not name:
+            return
+        key = str(name).lower()
+        # Copy-on-write like the recipe list, so lock-free readers see a complete tuple
+        index[key] = index.get(key, ()) + (recipe_id,)
+
+    def __recipes_for_names(self, index: Dict[str, Tuple[int, ...]], needle: str) -> List[Recipe]:
+        ids = set()
+        for name, recipe_ids in list(index.items()):
+            if needle in name:
+                ids.update(recipe_ids)
+        return [self.__recipes_by_id[i] for i in sorted(ids)]
 
     def get_all_recipes(self) -> List[Recipe]:
         return self.__recipe
 
     def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
-        for recipe in self.__recipe:
-            if recipe.id == recipe_id:
-                return recipe
-        return None
+        return self.__recipes_by_id.get(recipe_id)
 
     def get_recipe_by_id(self, recipe_id):
         return self.get_recipe(recipe_id)
 
-    def get_recipes_by_page(self, page: int, per_page: int) -> List[Recipe]:
+    def detach_recipes(self, recipes: List[Recipe]) -> None:
+        pass  # plain objects, never tied to a session
+
+    def sample_recipes(self, n: int, seed=None) -> List[Recipe]:
+        recipes = self.__recipe
+        positions = random.Random(seed).sample(range(len(recipes)), max(0, min(n, len(recipes))))
+        return [recipes[i] for i in positions]
+
+    def get_recipes_by_page(self, page: int, per_page: int, sort_by: Optional[str] = None,
+                            sort_dir: Optional[str] = "asc") -> List[Recipe]:
         start_index = (page - 1) * per_page
         end_index = start_index + per_page
-        return self.__recipe[start_index:end_index]
+        if not sort_by:
+            return self.__recipe[start_index:end_index]
+
+        key = (str(sort_by).lower(), "desc" if str(sort_dir or "asc").lower() == "desc" else "asc")
+        # Writers publish the new recipe list (or rating) before they replace the orders dict,
+        # so taking the dict first means the recipes sorted below are at least as new as it; an
+        # order sorted from data a writer has since replaced lands in the discarded dict.
+        sort_orders = self.__sort_orders
+        recipes = self.__recipe
+        ordered = sort_orders.get(key)
+        if ordered is None:
+            ordered = _sort_recipes(recipes, *key)
+            sort_orders[key] = ordered
+        return ordered[start_index:end_index]
+
+    def update_rating(self, recipe_id: int, rating: Optional[float]):
+        """Set a recipe's stored average (kept elsewhere, e.g. in the database) and re-sort by it."""
+        recipe = self.get_recipe(recipe_id)
+        if recipe is None:
+            return
+        with self.__write_lock:
+            recipe.rating = rating
+            self.__drop_rating_orders()
+
+    def __drop_rating_orders(self):
+        # Readers add orders without the lock; copy the items in one step rather than iterate
+        # a dict that can grow mid-loop
+        self.__sort_orders = {k: v for k, v in list(self.__sort_orders.items()) if k[0] != "rating"}
 
     def get_number_of_recipe(self):
         return len(self.__recipe)
@@ -75,12 +170,24 @@ class MemoryRepository(AbstractRepository):
     def search_recipes(self, query: str, category: str, author: str, ingredient: str) -> List[Recipe]:
         """
         Filter recipes by free-text query, category, author, and ingredient.
-        - Category may be a Category object or a string on Recipe
-        - Author may be an object with .name or a string
+        - Category may be a Category object or a string on Recipe (matched on its name)
+        - Author may be an object with .name or a string (matched on its name)
         - Ingredients may be list[str] or other shapes; here we assume list[str]
         """
         filtered_recipes = self.__recipe
 
+        # Category and author filters resolve through the name -> recipe id indexes
+        if category:
+            filtered_recipes = self.__recipes_for_names(self.__recipe_ids_by_category, category.lower())
+
+        if author:
+            by_author = self.__recipes_for_names(self.__recipe_ids_by_author, author.lower())
+            if category:
+                allowed = {r.id for r in by_author}
+                filtered_recipes = [r for r in filtered_recipes if r.id in allowed]
+            else:
+                filtered_recipes = by_author
+
         if query:
             q = query.lower()
             filtered_recipes = [
@@ -89,24 +196,6 @@ class MemoryRepository(AbstractRepository):
                 or (getattr(r, "description", "") and q in r.description.lower())
             ]
 
-        if category:
-            c = category.lower()
-            def cat_ok(r: Recipe) -> bool:
-                cat_val = getattr(r, "category", None)
-                if isinstance(cat_val, Category):
-                    return bool(cat_val.name) and c in cat_val.name.lower()
-                return bool(cat_val) and c in str(cat_val).lower()
-            filtered_recipes = [r for r in filtered_recipes if cat_ok(r)]
-
-        if author:
-            a = author.lower()
-            def auth_ok(r: Recipe) -> bool:
-                auth = getattr(r, "author", None)
-                if hasattr(auth, "name"):
-                    return bool(auth.name) and a in auth.name.lower()
-                return bool(auth) and a in str(auth).lower()
-            filtered_recipes = [r for r in filtered_recipes if auth_ok(r)]
-
         if ingredient:
             ing = ingredient.lower()
             def ing_ok(r: Recipe) -> bool:
@@ -123,76 +212,112 @@ class MemoryRepository(AbstractRepository):
 
     def search_recipes_paged(self, query=None, category=None, author=None, ingredient=None, page=1, per_page=12,
                              sort_by=None, sort_dir="asc"):
-        """In-memory version for tests compatibility."""
+        """In-memory version of the paged search, sorted like DatabaseRepository.search_recipes_paged."""
         results = self.search_recipes(query or "", category or "", author or "", ingredient or "")
+        if sort_by:
+            results = _sort_recipes(results, sort_by, sort_dir)
         total = len(results)
         start = (page - 1) * per_page
         end = start + per_page
         return results[start:end], total
 
-    from datetime import datetime
-
-    def add_review(self, recipe_id: int, user_id: int, rating: int, comment: str):
+    def add_review(self, recipe_id: int, user_id: int, rating: int, comment: str) -> bool:
         user = self.get_user_by_id(user_id)
         recipe = self.get_recipe(recipe_id)
         if not user or not recipe:
             raise ValueError("User or Recipe not found")
 
-
-        class SimpleReview:
-            def __init__(self, review_id, user, recipe, rating, text, timestamp):
-                self.id = review_id
-                self.user = user
-                self.recipe = recipe
-                self.rating = rating
-                self.text = text
-                self.timestamp = timestamp
-
-        review = SimpleReview(
-            review_id=len(self.__reviews) + 1,
-            user=user,
-            recipe=recipe,
-            rating=rating,
-            text=comment,
-            timestamp=datetime.now()
-        )
-
-        if recipe_id not in self.__reviews:
-            self.__reviews[recipe_id] = []
-        self.__reviews[recipe_id].append(review)
-
-    def reviews_for_recipe(self, recipe_id: int) -> List[Review]:
-        reviews = self.__reviews.get(recipe_id, [])
-        return [review for review in reviews if review is not None]
+        with self.__write_lock:
+            counts = dict(self.__rating_counts.get(recipe_id, {}))
+            existing = self.__review_by_user.get((recipe_id, user_id))
+
+            if existing is not None:
+                # Upsert: a fresh record replaces the user's earlier review, keeping its id
+                counts[existing.rating] -= 1
+                if not counts[existing.rating]:
+                    del counts[existing.rating]
+                review = SimpleReview(existing.id, user, recipe, rating, comment, datetime.now())
+                self.__reviews[recipe_id] = tuple(
+                    review if r is existing else r for r in self.__reviews.get(recipe_id, ())
+                )
+            else:
+                review = SimpleReview(
+                    review_id=self.__next_review_id,
+                    user=user,
+                    recipe=recipe,
+                    rating=rating,
+                    text=comment,
+                    timestamp=datetime.now()
+                )
+                self.__next_review_id += 1
+                self.__reviews[recipe_id] = self.__reviews.get(recipe_id, ()) + (review,)
+            self.__review_by_user[(recipe_id, user_id)] = review
+
+            # Keep the per-recipe histogram up to date so stats never rescan reviews
+            counts[rating] = counts.get(rating, 0) + 1
+            self.__rating_counts[recipe_id] = counts
+            recipe.rating = round(self.average_rating(recipe_id), 1)
+            self.__drop_rating_orders()
+        return existing is not None
+
+    def reviews_for_recipe(
+            self,
+            recipe_id: int,
+            cursor: Optional[Tuple[datetime, int]] = None,
+            limit: Optional[int] = None,
+    ) -> List[Review]:
+        reviews = [review for review in self.__reviews.get(recipe_id, ()) if review is not None]
+        reviews.sort(key=lambda r: (r.timestamp, r.id), reverse=True)
+        if cursor is not None:
+            reviews = [r for r in reviews if (r.timestamp, r.id) < tuple(cursor)]
+        if limit is not None:
+            reviews = reviews[:max(0, int(limit))]
+        return reviews
+
+    def has_reviewed(self, user_id: int, recipe_id: int) -> bool:
+        return (recipe_id, user_id) in self.__review_by_user
 
     def average_rating(self, recipe_id: int) -> float:
-        reviews = self.reviews_for_recipe(recipe_id)
-        if not reviews:
+        counts = self.__rating_counts.get(recipe_id)
+        if not counts:
             return 0.0
-        total_rating = sum([review.rating for review in reviews])
-        return total_rating / len(reviews)
+        return sum(rating * n for rating, n in counts.items()) / sum(counts.values())
 
-    # ---------- Favourites ----------
-    def add_favourite(self, user_id: int, recipe_id: int):
-        if user_id not in self.__user_favourites:
-            self.__user_favourites[user_id] = set()
-        self.__user_favourites[user_id].add(recipe_id)
+    def rating_distribution(self, recipe_id: int) -> Dict[int, int]:
+        return dict(self.__rating_counts.get(recipe_id, {}))
 
-    def remove_favourite(self, user_id: int, recipe_id: int):
-        if user_id in self.__user_favourites and recipe_id in self.__user_favourites[user_id]:
-            self.__user_favourites[user_id].remove(recipe_id)
+    # ---------- Favourites ----------
+    def add_favourite(self, user_id: int, recipe_id: int) -> bool:
+        with self.__write_lock:
+            if user_id not in self.__users_by_id or self.get_recipe(recipe_id) is None:
+                raise ValueError("User or Recipe not found")
+            favourites = self.__user_favourites.get(user_id, frozenset())
+            if recipe_id in favourites:
+                return False
+            self.__user_favourites[user_id] = favourites | {recipe_id}
+            return True
+
+    def remove_favourite(self, user_id: int, recipe_id: int) -> bool:
+        with self.__write_lock:
+            favourites = self.__user_favourites.get(user_id, frozenset())
+            if recipe_id not in favourites:
+                return False
+            self.__user_favourites[user_id] = favourites - {recipe_id}
+            return True
+
+    def is_favourite(self, user_id: int, recipe_id: int) -> bool:
+        return recipe_id in self.__user_favourites.get(user_id, frozenset())
 
     def favourites_for_user(self, user_id: int) -> List[Recipe]:
-        if user_id not in self.__user_favourites:
-            return []
         recipes: List[Recipe] = []
-        for recipe_id in self.__user_favourites[user_id]:
+        for recipe_id in self.__user_favourites.get(user_id, frozenset()):
             recipe = self.get_recipe(recipe_id)
             if recipe is not None:
                 recipes.append(recipe)
         return recipes
 
     # ---------- Health Star ----------
+    @timed("health")
     def calculate_health_star_rating(self, recipe: Recipe) -> Optional[float]:
         nutrition = getattr(recipe, "nutrition", None)
         required = ["calories", "fat", "saturated_fat", "protein", "fiber"]
@@ -273,13 +398,16 @@ class MemoryRepository(AbstractRepository):
 
 
 # --------- Populate helper (unchanged except for imports) ---------
-def populate(repo: AbstractRepository):
+def populate(repo: AbstractRepository, lazy_details: bool = False):
     """
     Load recipes from CSV and add a few demo users.
+
+    With ``lazy_details`` the recipes keep only card fields resident; images, quantities and
+    instructions are read back from the memory-mapped CSV when a detail page needs them.
     """
     dir_name = os.path.dirname(os.path.abspath(__file__))
     recipe_file_name = os.path.join(dir_name, "data", "recipes.csv")
-    reader = CSVDataReader(recipe_file_name)
+    reader = CSVDataReader(recipe_file_name, lazy_details=lazy_details)
     reader.read_csv_file()
 
     for recipe in reader.recipes:
@@ -295,3 +423,41 @@ def populate(repo: AbstractRepository):
     repo.add_user(demo_user)
     repo.add_user(admin_user)
     repo.add_user(test_user)
+
+
+def _name_of(value) -> str:
+    return str(getattr(value, "name", value) or "").lower()
+
+
+def _sort_recipes(recipes: List[Recipe], sort_by: Optional[str], sort_dir: Optional[str]) -> List[Recipe]:
+    """Order recipes the way DatabaseRepository does: sort key in `sort_dir`, then a tie-breaker ascending."""
+    sb = (sort_by or "").lower()
+    reverse = str(sort_dir or "asc").lower() == "desc"
+
+    if sb in ("name", "title"):
+        primary, secondary = (lambda r: r.name.lower()), (lambda r: r.id)
+    elif sb == "rating":
+        primary, secondary = (lambda r: r.rating or 0.0), (lambda r: r.name.lower())
+    elif sb == "author":
+        primary, secondary = (lambda r: _name_of(r.author)), (lambda r: r.name.lower())
+    elif sb in ("category", "categories"):
+        primary, secondary = (lambda r: _name_of(r.category)), (lambda r: r.name.lower())
+    else:
+        primary, secondary = (lambda r: r.id), (lambda r: r.name.lower())
+
+    # Two stable passes: tie-breaker first, then the (possibly reversed) primary key
+    ordered = sorted(recipes, key=secondary)
+    ordered.sort(key=primary, reverse=reverse)
+    return ordered
+
+
+def freeze_catalog():
+    """
+    Move everything allocated so far (the loaded catalog) into the permanent GC generation.
+
+    Call this in the master process before workers fork (e.g. ``gunicorn --preload``). The
+    collector in each worker then never traverses the catalog objects, so their memory pages
+    stay shared copy-on-write between workers instead of being copied into every one.
+    """
+    gc.collect()
+    gc.freeze()
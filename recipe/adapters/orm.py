@@ -1,5 +1,5 @@
 # recipe/adapters/orm.py
-from sqlalchemy import Table, Column, Integer, Float, String, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import Table, Column, Integer, Float, String, DateTime, ForeignKey, Text, UniqueConstraint, inspect, text
 from sqlalchemy.orm import registry, relationship
 
 from recipe.domainmodel.recipe import Recipe
@@ -57,7 +57,10 @@ recipes_table = Table(
     Column('created_date', DateTime),
     Column('servings', String(50)),
     Column('recipe_yield', String(50)),
-    Column('rating', Float)
+    Column('rating', Float),
+    # Running totals maintained by DatabaseRepository.add_review so averages are O(1)
+    Column('rating_sum', Integer, nullable=False, default=0, server_default='0'),
+    Column('rating_count', Integer, nullable=False, default=0, server_default='0')
 )
 
 recipe_images_table = Table(
@@ -96,7 +99,7 @@ reviews_table = Table(
     'reviews', metadata,
     Column('id', Integer, primary_key=True, autoincrement=True),
     Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
-    Column('recipe_id', Integer, ForeignKey('recipes.id'), nullable=False),
+    Column('recipe_id', Integer, ForeignKey('recipes.id'), nullable=False, index=True),
     Column('rating', Integer, nullable=False),
     Column('text', Text, nullable=False),
     Column('timestamp', DateTime, nullable=False),
@@ -111,6 +114,36 @@ favourites_table = Table(
     UniqueConstraint('user_id', 'recipe_id', name='uq_fav_user_recipe')
 )
 
+# Append-only log of writes that process-local caches must see (one row per write, pruned
+# to the most recent entries); read by recipe.adapters.change_watcher.ChangeWatcher
+cache_changes_table = Table(
+    'cache_changes', metadata,
+    Column('seq', Integer, primary_key=True, autoincrement=True),
+    Column('table_name', String(32), nullable=False),
+    Column('row_key', Integer, nullable=True),
+)
+
+
+def upgrade_schema(engine):
+    """
+    Bring a database built from an older schema up to date (``create_all`` only adds tables):
+    add the recipes' running rating totals, filled from the reviews already stored, and the
+    index on reviews.recipe_id.
+    """
+    with engine.begin() as conn:
+        columns = {column["name"] for column in inspect(conn).get_columns("recipes")}
+        missing = [name for name in ("rating_sum", "rating_count") if name not in columns]
+        for name in missing:
+            conn.execute(text(f"ALTER TABLE recipes ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"))
+        if missing:
+            conn.execute(text(
+                "UPDATE recipes SET"
+                " rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM reviews WHERE recipe_id = recipes.id),"
+                " rating_count = (SELECT COUNT(*) FROM reviews WHERE recipe_id = recipes.id)"
+            ))
+        for index in reviews_table.indexes:
+            index.create(conn, checkfirst=True)
+
 
 def map_model_to_tables():
     """Map YOUR domain models to database tables."""
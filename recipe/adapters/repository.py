@@ -1,9 +1,10 @@
 # recipe/adapters/repository.py
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import List, Optional
 from recipe.domainmodel.recipe import Recipe
 from recipe.domainmodel.review import Review
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 
@@ -48,17 +49,32 @@ class AbstractRepository(ABC):
     def get_total_recipe_count(self) -> int:
         raise NotImplementedError
 
+    @abstractmethod
+    def sample_recipes(self, n: int, seed=None) -> List[Recipe]:
+        """Return up to `n` distinct recipes chosen at random, in O(n) whatever the catalog size.
+        The same `seed` gives the same sample for the same catalog; None draws a fresh one."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def detach_recipes(self, recipes: List[Recipe]) -> None:
+        """Make `recipes` safe to keep past the current request and share between threads (e.g. in
+        a cache): fully loaded and independent of any database session."""
+        raise NotImplementedError
+
     # NOTE: Keeping your project’s existing search signature.
     @abstractmethod
     def search_recipes(self, query: str, category: str, author: str, ingredient: str) -> List[Recipe]:
         raise NotImplementedError
 
     @abstractmethod
-    def add_favourite(self, user_id: int, recipe_id: int):
+    def add_favourite(self, user_id: int, recipe_id: int) -> bool:
+        """Idempotently favourite a recipe. Returns True if it was added, False if it already was a favourite.
+        Raises ValueError if the recipe (or, where the backend tracks it, the user) does not exist."""
         raise NotImplementedError
 
     @abstractmethod
-    def remove_favourite(self, user_id: int, recipe_id: int):
+    def remove_favourite(self, user_id: int, recipe_id: int) -> bool:
+        """Returns True if a favourite was removed, False if there was nothing to remove."""
         raise NotImplementedError
 
     @abstractmethod
@@ -66,17 +82,43 @@ class AbstractRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def add_review(self, recipe_id: int, user_id: int, rating: int, comment: str):
+    def is_favourite(self, user_id: int, recipe_id: int) -> bool:
+        """True if the user has favourited the recipe; never loads the user's other favourites."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_review(self, recipe_id: int, user_id: int, rating: int, comment: str) -> bool:
+        """Insert or replace the user's review of a recipe.
+        Returns True if an existing review was updated, False if a new one was inserted.
+        Raises ValueError if the user or recipe does not exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def reviews_for_recipe(
+            self,
+            recipe_id: int,
+            cursor: Optional[Tuple[datetime, int]] = None,
+            limit: Optional[int] = None,
+    ) -> List[Review]:
+        """Return reviews newest first, ordered by (timestamp, id) descending.
+        `cursor` is the (timestamp, id) of the last review already seen; only older reviews are returned.
+        `limit` caps the number of reviews (None = all)."""
         raise NotImplementedError
 
     @abstractmethod
-    def reviews_for_recipe(self, recipe_id: int) -> List[Review]:
+    def has_reviewed(self, user_id: int, recipe_id: int) -> bool:
+        """True if the user has a review of the recipe; never loads the recipe's reviews."""
         raise NotImplementedError
 
     @abstractmethod
     def average_rating(self, recipe_id: int) -> float:
         raise NotImplementedError
 
+    @abstractmethod
+    def rating_distribution(self, recipe_id: int) -> Dict[int, int]:
+        """Return {rating: number of reviews} for a recipe (ratings with no reviews may be omitted)."""
+        raise NotImplementedError
+
     @abstractmethod
     def calculate_health_star_rating(self, recipe: Recipe) -> Optional[float]:
         raise NotImplementedError
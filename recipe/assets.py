@@ -0,0 +1,182 @@
+# recipe/assets.py
+"""
+Build step and serving for static assets.
+
+Run from the project root after changing anything under ``recipe/static``:
+
+    python -m recipe.assets
+
+For every static file this writes a fingerprinted copy named after its content hash
+(``css/main.css`` -> ``css/main.1a2b3c4d5e.css``) and records the mapping in
+``manifest.json``; ``url_for('static', filename='css/main.css')`` then links the fingerprinted
+name, which is served with a one-year ``immutable`` Cache-Control since its content can never
+change. It also writes a gzip-compressed ``<file>.gz`` beside every compressible file, which the
+static route sends as-is (``Content-Encoding: gzip``) to clients that accept gzip, so CSS is
+never compressed per request.
+
+Without a manifest (a fresh checkout) files are linked and served under their own names.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+from typing import Dict, List
+
+from flask import Flask, request, send_from_directory
+from werkzeug.security import safe_join
+
+from recipe.compression import is_compressible, negotiate_encoding
+
+PRECOMPRESSED_SUFFIX = ".gz"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{10}(\.[^./]+)?$")
+
+
+def _is_build_output(relative: str) -> bool:
+    return (relative == MANIFEST_NAME or relative.endswith(PRECOMPRESSED_SUFFIX)
+            or _FINGERPRINTED.search(relative) is not None)
+
+
+def _static_files(static_folder: str) -> List[str]:
+    """Paths relative to ``static_folder`` of every source file (build outputs excluded)."""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        dirnames.sort()
+        for name in sorted(filenames):
+            relative = os.path.relpath(os.path.join(dirpath, name), static_folder).replace(os.sep, "/")
+            if not _is_build_output(relative):
+                files.append(relative)
+    return files
+
+
+def fingerprinted_name(relative: str, data: bytes) -> str:
+    """``css/main.css`` -> ``css/main.<first 10 hex digits of its sha256>.css``."""
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    stem, ext = os.path.splitext(relative)
+    return f"{stem}.{digest}{ext}"
+
+
+def fingerprint(static_folder: str) -> Dict[str, str]:
+    """Write a content-addressed copy of every static file and ``manifest.json``; returns the manifest.
+
+    Copies from earlier builds are left in place, so pages rendered by the previous release
+    can still load the assets they link while a deploy rolls out.
+    """
+    manifest = {}
+    for relative in _static_files(static_folder):
+        with open(os.path.join(static_folder, relative), "rb") as file:
+            data = file.read()
+        target = fingerprinted_name(relative, data)
+        target_path = os.path.join(static_folder, target)
+        if not os.path.exists(target_path):
+            with open(target_path, "wb") as file:
+                file.write(data)
+        manifest[relative] = target
+    with open(os.path.join(static_folder, MANIFEST_NAME), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+        file.write("\n")
+    return manifest
+
+
+def load_manifest(static_folder: str) -> Dict[str, str]:
+    """The build's ``manifest.json``, without entries whose fingerprinted file is missing."""
+    try:
+        with open(os.path.join(static_folder, MANIFEST_NAME), encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return {source: target for source, target in manifest.items()
+            if os.path.isfile(os.path.join(static_folder, target))}
+
+
+def precompress(static_folder: str, include_fingerprinted: bool = False) -> List[str]:
+    """Write ``<file>.gz`` for every compressible static file; returns the files compressed."""
+    written = []
+    files = _static_files(static_folder)
+    if include_fingerprinted:
+        files += sorted(set(load_manifest(static_folder).values()))
+    for relative in files:
+        mimetype = mimetypes.guess_type(relative)[0] or ""
+        if not is_compressible(mimetype):
+            continue
+        source = os.path.join(static_folder, relative)
+        with open(source, "rb") as file:
+            data = file.read()
+        # mtime=0 keeps the output byte-identical across builds
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        target = source + PRECOMPRESSED_SUFFIX
+        if len(compressed) < len(data):
+            with open(target, "wb") as file:
+                file.write(compressed)
+            written.append(relative)
+        elif os.path.exists(target):
+            os.remove(target)
+    return written
+
+
+def build(static_folder: str) -> Dict[str, str]:
+    """The whole build step: fingerprint, then precompress sources and fingerprinted copies."""
+    manifest = fingerprint(static_folder)
+    precompress(static_folder, include_fingerprinted=True)
+    return manifest
+
+
+def init_static(app: Flask) -> None:
+    """
+    Link static files by their fingerprinted names from the build manifest, serve those with
+    far-future immutable caching, and serve ``<file>.gz`` instead of ``<file>`` when the client
+    accepts gzip.
+    """
+    serve_original = app.view_functions["static"]
+    static_folder = app.static_folder
+    manifest = load_manifest(static_folder) if app.config.get("STATIC_FINGERPRINTS", True) else {}
+    immutable = set(manifest.values())
+    app.extensions["static_manifest"] = manifest
+
+    @app.url_defaults
+    def fingerprinted_url(endpoint, values):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = manifest[values["filename"]]
+
+    def static(filename):
+        response = None
+        if negotiate_encoding(request.headers.get("Accept-Encoding", ""), offered=("gzip",)):
+            precompressed = safe_join(static_folder, filename + PRECOMPRESSED_SUFFIX)
+            if precompressed is not None and os.path.isfile(precompressed):
+                response = send_from_directory(
+                    static_folder, filename + PRECOMPRESSED_SUFFIX,
+                    mimetype=mimetypes.guess_type(filename)[0],
+                    max_age=app.get_send_file_max_age(filename),
+                )
+                response.headers["Content-Encoding"] = "gzip"
+                response.vary.add("Accept-Encoding")
+
+        if response is None:
+            response = serve_original(filename=filename)
+            if is_compressible(response.mimetype or ""):
+                response.vary.add("Accept-Encoding")
+
+        if filename in immutable and response.status_code in (200, 304):
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+    app.view_functions["static"] = static
+
+
+def main(argv=None) -> int:
+    static_folder = os.path.join(os.path.dirname(__file__), "static")
+    for source, target in sorted(build(static_folder).items()):
+        print(f"{source} -> {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,9 +1,12 @@
 # recipe/browse/api.py
 from flask import Blueprint, request, jsonify, current_app
 
+from recipe.conditional import conditional, content_versions
+
 api = Blueprint("browse_api", __name__)
 
 @api.get("/options")
+@conditional(lambda: content_versions().options(), anonymous_only=False)
 def options():
     """
     GET /api/browse/options?field=author&q=an&limit=10
@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, request, current_app, abort
 
+from recipe.conditional import conditional, content_versions
+
 bp = Blueprint("browse", __name__)
 DEFAULT_PAGE_SIZE = 20
 MAX_PAGE_SIZE = 100
@@ -23,6 +25,7 @@ def _str_arg(name: str, default: str = "") -> str:
     return (request.args.get(name, default) or "").strip()
 
 @bp.route("/", methods=["GET"])
+@conditional(lambda: content_versions().browse())
 def browse():
     repo = getattr(current_app, "repository", None)
     if repo is None:
@@ -104,7 +107,7 @@ def browse():
             "total_time": total_time,
             "prep_time": prep,
             "calories": calories,
-            "images": getattr(r, "images", []) or [],
+            "thumbnail": getattr(r, "thumbnail", None),
             "desc": desc,
             "health_star": health_star,
             "rating": getattr(r, "rating", None),
@@ -0,0 +1,100 @@
+# recipe/compression.py
+import gzip
+import itertools
+import zlib
+from typing import Callable, Iterable, Optional
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+# Response types worth compressing; images and fonts are compressed already
+COMPRESSIBLE_MIMETYPES = {
+    "text/html", "text/css", "text/plain", "text/javascript", "text/xml",
+    "application/json", "application/javascript", "application/xml", "image/svg+xml",
+}
+DEFAULT_MIN_SIZE = 500
+DEFAULT_LEVEL = 6
+
+
+def negotiate_encoding(accept_encoding: str, offered=("gzip", "deflate")) -> Optional[str]:
+    """The best of ``offered`` the client accepts (honouring q-values), or None."""
+    if not accept_encoding:
+        return None
+    return parse_accept_header(accept_encoding).best_match(offered)
+
+
+def is_compressible(mimetype: str) -> bool:
+    return mimetype.split(";", 1)[0].strip().lower() in COMPRESSIBLE_MIMETYPES
+
+
+class CompressionMiddleware:
+    """
+    WSGI middleware that gzip- or deflate-encodes text responses for clients that accept it.
+
+    Runs outside Flask, so page caches and ETag checks always see the uncompressed response.
+    Only successful responses of a compressible type of at least ``min_size`` bytes are
+    encoded; responses that already carry a Content-Encoding (precompressed static files)
+    or ``Cache-Control: no-transform`` pass through untouched.
+    """
+
+    def __init__(self, app: Callable, min_size: int = DEFAULT_MIN_SIZE, level: int = DEFAULT_LEVEL):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+
+    def __call__(self, environ, start_response):
+        encoding = negotiate_encoding(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None or environ.get("REQUEST_METHOD") == "HEAD":
+            return self.app(environ, start_response)
+
+        captured = {}
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured.update(status=status, headers=headers, exc_info=exc_info)
+            return written.append  # legacy write() callable; Flask never uses it
+
+        app_iter = self.app(environ, capture)
+        status, headers = captured["status"], Headers(captured["headers"])
+        if not self.__wants_compression(status, headers):
+            start_response(status, captured["headers"], captured["exc_info"])
+            return itertools.chain(written, app_iter) if written else app_iter
+
+        body = b"".join(written) + self.__read(app_iter)
+        self.__add_vary(headers)
+        if len(body) >= self.min_size:
+            body = gzip.compress(body, self.level) if encoding == "gzip" else zlib.compress(body, self.level)
+            headers["Content-Encoding"] = encoding
+            etag = headers.get("ETag")
+            if etag and not etag.startswith("W/"):
+                # The encoded bytes differ, so a strong validator no longer describes them
+                headers["ETag"] = "W/" + etag
+        headers["Content-Length"] = str(len(body))
+        start_response(status, headers.to_wsgi_list(), captured["exc_info"])
+        return [body]
+
+    def __wants_compression(self, status: str, headers: Headers) -> bool:
+        code = int(status.split(" ", 1)[0])
+        if code < 200 or code >= 300 or code in (204, 206):
+            return False
+        if "Content-Encoding" in headers or "no-transform" in headers.get("Cache-Control", ""):
+            return False
+        if not is_compressible(headers.get("Content-Type", "")):
+            return False
+        length = headers.get("Content-Length")
+        return length is None or int(length) >= self.min_size
+
+    @staticmethod
+    def __add_vary(headers: Headers) -> None:
+        values = [v.strip() for v in headers.get("Vary", "").split(",") if v.strip()]
+        if "accept-encoding" not in (v.lower() for v in values):
+            headers["Vary"] = ", ".join(values + ["Accept-Encoding"])
+
+    @staticmethod
+    def __read(app_iter: Iterable[bytes]) -> bytes:
+        try:
+            return b"".join(app_iter)
+        finally:
+            close = getattr(app_iter, "close", None)
+            if close is not None:
+                close()
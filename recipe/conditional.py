@@ -0,0 +1,112 @@
+# recipe/conditional.py
+import datetime
+import hashlib
+import os
+import threading
+import uuid
+from functools import wraps
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from flask import current_app, make_response, request, session
+
+
+def release_token(root: str) -> str:
+    """Short hash of the templates' and static files' names, sizes and mtimes.
+
+    Part of every ETag, so a deploy that changes page markup never answers 304 for a page
+    rendered by the previous release.
+    """
+    digest = hashlib.sha1()
+    for folder in ("templates", "static"):
+        for dirpath, dirnames, filenames in sorted(os.walk(os.path.join(root, folder))):
+            dirnames.sort()
+            for name in sorted(filenames):
+                stat = os.stat(os.path.join(dirpath, name))
+                digest.update(f"{dirpath}/{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:10]
+
+
+class ContentVersions:
+    """
+    Version numbers of what the pages show, used to build ETags without rendering anything.
+
+    With a ChangeWatcher the versions are sequence numbers from the shared ``cache_changes``
+    log, so workers of the same release agree on them: a recipe's version is the sequence of
+    the last change to it (or the sequence this worker started at, if later). Without one
+    (memory mode, where every worker has its own data) versions count local writes and are
+    scoped to this process by a random token.
+    """
+
+    def __init__(self, release: str, current_seq: Optional[Callable[[], int]] = None):
+        self.__current_seq = current_seq
+        self.__scope = release if current_seq else f"{release}.{uuid.uuid4().hex[:8]}"
+        self.__lock = threading.Lock()
+        self.__local = 0
+        start = current_seq() if current_seq else 0
+        self.__baseline = start
+        self.__catalog = start
+        self.__reviews = start
+        self.__recipes: Dict[int, int] = {}
+
+    def __next_version(self) -> int:
+        if self.__current_seq is not None:
+            return self.__current_seq()
+        self.__local += 1
+        return self.__local
+
+    def apply_changes(self, changes: Iterable[Tuple[str, Optional[int]]]) -> None:
+        with self.__lock:
+            version = self.__next_version()
+            for table_name, key in changes:
+                if table_name == "reviews":
+                    self.__reviews = version
+                    self.__recipes[key] = version
+                elif table_name == "recipes":
+                    self.__catalog = version
+                elif table_name == "*":
+                    self.__baseline = self.__catalog = self.__reviews = version
+                    self.__recipes.clear()
+
+    def home(self) -> str:
+        return f"home-{self.__scope}-{self.__catalog}-{datetime.date.today().isoformat()}"
+
+    def browse(self) -> str:
+        return f"browse-{self.__scope}-{self.__catalog}-{self.__reviews}"
+
+    def recipe(self, recipe_id: int) -> str:
+        return f"recipe-{self.__scope}-{self.__recipes.get(recipe_id, self.__baseline)}"
+
+    def options(self) -> str:
+        return f"options-{self.__scope}-{self.__catalog}"
+
+
+def conditional(etag: Callable[..., str], anonymous_only: bool = True):
+    """
+    Give a GET view a weak ETag from ``etag(**view_args)`` and answer a matching
+    If-None-Match with 304 before the view runs.
+
+    With ``anonymous_only`` logged-in requests (and ones with a pending flash message) get
+    no validator: their pages carry per-session content such as CSRF tokens.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if anonymous_only and ("username" in session or "_flashes" in session):
+                return view(*args, **kwargs)
+
+            tag = etag(**kwargs)
+            if request.if_none_match.contains_weak(tag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(tag, weak=True)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapped
+    return decorator
+
+
+def content_versions() -> ContentVersions:
+    return current_app.extensions["content_versions"]
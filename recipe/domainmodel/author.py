@@ -1,4 +1,6 @@
 class Author:
+    __slots__ = ("__id", "__name", "__recipes", "__dict__", "__weakref__")
+
     def __init__(self, author_id: int, name: str, recipes: list["Recipe"] = None):
         self.__id = author_id
         self.__name = name
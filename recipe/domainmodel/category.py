@@ -1,6 +1,8 @@
 from recipe.domainmodel.recipe import Recipe
 
 class Category:
+    __slots__ = ("__id", "__name", "__recipes", "__dict__", "__weakref__")
+
     def __init__(self, name: str, recipes: list[Recipe] = None, category_id: int = None):
         self.__id = category_id
         self.__name = name
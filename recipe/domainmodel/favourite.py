@@ -1,4 +1,6 @@
 class Favourite:
+    __slots__ = ("__id", "__user", "__recipe", "__dict__", "__weakref__")
+
     def __init__(self, favourite_id: int, user: "User", recipe: "Recipe"):
         self.__id = favourite_id
         self.__user = user
@@ -0,0 +1,70 @@
+# recipe/domainmodel/image_urls.py
+from collections.abc import Sequence
+from typing import Dict, Iterable, List
+
+# Shared URL prefixes, indexed by prefix id. Append-only; filled while the catalog loads.
+_prefixes: List[str] = []
+_prefix_ids: Dict[str, int] = {}
+
+
+def _split(url: str) -> tuple[str, str]:
+    """Split a URL before its first all-digit path segment (or its last segment)."""
+    scheme, sep, rest = url.partition("://")
+    if not sep:
+        return "", url
+    parts = rest.split("/")
+    for i in range(1, len(parts) - 1):
+        if parts[i].isdigit():
+            break
+    else:
+        i = len(parts) - 1
+    prefix = scheme + sep + "/".join(parts[:i]) + "/"
+    return prefix, url[len(prefix):]
+
+
+class CompactImageUrls(Sequence):
+    """
+    Read-only list of image URLs stored as (prefix id, suffix) pairs.
+
+    Catalog image URLs share a handful of long CDN prefixes, so each URL keeps only its
+    suffix plus the id of its prefix; items are expanded back to full strings on access.
+    """
+    __slots__ = ("__pairs",)
+
+    def __init__(self, urls: Iterable[str]):
+        pairs = []
+        for url in urls:
+            prefix, suffix = _split(url)
+            prefix_id = _prefix_ids.get(prefix)
+            if prefix_id is None:
+                prefix_id = _prefix_ids.setdefault(prefix, len(_prefixes))
+                if prefix_id == len(_prefixes):
+                    _prefixes.append(prefix)
+            pairs.append(prefix_id)
+            pairs.append(suffix)
+        self.__pairs = tuple(pairs)
+
+    def __len__(self) -> int:
+        return len(self.__pairs) // 2
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("image index out of range")
+        return _prefixes[self.__pairs[2 * index]] + self.__pairs[2 * index + 1]
+
+    def __iter__(self):
+        pairs = self.__pairs
+        for i in range(0, len(pairs), 2):
+            yield _prefixes[pairs[i]] + pairs[i + 1]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (CompactImageUrls, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CompactImageUrls({list(self)!r})"
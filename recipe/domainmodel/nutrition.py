@@ -1,4 +1,7 @@
 class Nutrition:
+    __slots__ = ("__id", "__calories", "__fat", "__saturated_fat", "__cholesterol", "__sodium",
+                 "__carbohydrates", "__fiber", "__sugar", "__protein", "__dict__", "__weakref__")
+
     def __init__(self, nutrition_id: int, calories: float, fat: float,
                  saturated_fat: float, cholesterol: float, sodium: float,
                  carbohydrates: float, fiber: float, sugar: float, protein: float):
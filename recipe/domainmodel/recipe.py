@@ -7,16 +7,24 @@ if TYPE_CHECKING:
 
 from datetime import datetime
 
+from recipe.domainmodel.image_urls import CompactImageUrls
 from recipe.domainmodel.nutrition import Nutrition
 from recipe.domainmodel.review import Review
 
 class Recipe:
+    # Slots keep catalog recipes compact; "__dict__" and "__weakref__" stay so orm.py can still
+    # map the class (SQLAlchemy keeps its instance state there once mapped).
+    __slots__ = ("__id", "__name", "__author", "__cook_time", "__preparation_time", "__date",
+                 "__description", "__images", "__category", "__ingredient_quantities",
+                 "__ingredients", "__rating", "__nutrition", "__servings", "__recipe_yield",
+                 "__instructions", "__reviews", "__dict__", "__weakref__")
+
     def __init__(self, recipe_id: int, name: str, author: "Author",
                  cook_time: int = 0,
                  preparation_time: int = 0,
                  created_date: datetime = None,
                  description: str = "",
-                 images: list[str] = None,
+                 images: list[str] | CompactImageUrls = None,
                  category: "Category" = None,
                  ingredient_quantities: list[str] = None,
                  ingredients: list[str] = None,
@@ -49,7 +57,7 @@ class Recipe:
         self.__servings = servings if servings else "Not specified"
         self.__recipe_yield = recipe_yield if recipe_yield else "Not specified"
         self.__instructions = instructions if instructions else []
-        self.__reviews = []
+        # __reviews is only allocated once a review is added; catalog recipes never need it
 
     def __repr__(self) -> str:
         return (f"<Recipe {self.__name} with id: {self.id} was created by {self.__author.name} "
@@ -120,7 +128,16 @@ class Recipe:
 
     @property
     def images(self) -> list[str]:
-        return self.__images
+        images = self.__images
+        if isinstance(images, CompactImageUrls):
+            return list(images)
+        return images
+
+    @property
+    def thumbnail(self) -> str | None:
+        """First image URL, used by recipe cards."""
+        images = self.__images
+        return images[0] if images else None
 
     @images.setter
     def images(self, value: list[str]):
@@ -190,25 +207,32 @@ class Recipe:
 
     @property
     def reviews(self) -> list[Review]:
-        return self.__reviews
+        try:
+            return self.__reviews
+        except AttributeError:
+            return []
 
     def add_review(self, review: Review) -> None:
         if isinstance(review, Review):
-            self.__reviews.append(review)
+            try:
+                reviews = self.__reviews
+            except AttributeError:
+                reviews = self.__reviews = []
+            reviews.append(review)
             self.__update_rating()
         else:
             raise TypeError("Expected a Review instance")
 
     def remove_review(self, review: Review) -> None:
-        if review in self.__reviews:
+        if review in self.reviews:
             self.__reviews.remove(review)
             self.__update_rating()
         else:
             raise ValueError("Review not found in recipe's reviews")
 
     def __update_rating(self) -> None:
-        if self.__reviews:
-            ratings = [r.rating for r in self.__reviews if
+        if self.reviews:
+            ratings = [r.rating for r in self.reviews if
                        hasattr(r, "rating") and r.rating is not None]
             if ratings:
                 average_rating = sum(ratings) / len(ratings)
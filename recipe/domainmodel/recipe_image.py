@@ -1,5 +1,7 @@
 # recipe/domainmodel/recipe_image.py
 class RecipeImage:
+    __slots__ = ("__recipe_id", "__url", "__position", "__dict__", "__weakref__")
+
     def __init__(self, recipe_id: int, url: str, position: int):
         self.__recipe_id = recipe_id
         self.__url = url
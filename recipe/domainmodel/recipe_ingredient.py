@@ -1,5 +1,8 @@
 # recipe/domainmodel/recipe_ingredient.py
 class RecipeIngredient:
+    __slots__ = ("__recipe_id", "__quantity", "__ingredient", "__position", "__dict__",
+                 "__weakref__")
+
     def __init__(self, recipe_id: int, quantity: str, ingredient: str, position: int):
         self.__recipe_id = recipe_id
         self.__quantity = quantity
@@ -1,5 +1,7 @@
 # recipe/domainmodel/recipe_instruction.py
 class RecipeInstruction:
+    __slots__ = ("__recipe_id", "__step", "__position", "__dict__", "__weakref__")
+
     def __init__(self, recipe_id: int, step: str, position: int):
         self.__recipe_id = recipe_id
         self.__step = step
@@ -4,6 +4,9 @@ from datetime import datetime
 
 
 class Review:
+    __slots__ = ("__id", "__user", "__recipe", "__timestamp", "__rating", "__text", "__dict__",
+                 "__weakref__")
+
     def __init__(self, review_id: int, user: "User", recipe: 'Recipe', timestamp: datetime, rating: int, text: str = ""):
         self.__id = review_id
         self.__user = user
@@ -69,6 +69,30 @@ def remove_favourite(recipe_id):
     return redirect(request.referrer or url_for('favourites.list'))
 
 
+@favourites_bp.route('/toggle/<int:recipe_id>', methods=['POST'])
+def toggle_favourite(recipe_id):
+    """JSON endpoint: flip a favourite, or set it with {"favourite": true|false}. No redirect, no page render."""
+    user_id = session.get('user_id')
+    if not user_id and session.get('username'):
+        user = current_app.repository.get_user_by_username(session['username'])
+        user_id = user.id if user else None
+
+    if not user_id:
+        return jsonify({'success': False, 'message': 'Please log in to manage favourites.'}), 401
+
+    payload = request.get_json(silent=True) or {}
+    desired = payload.get('favourite')
+    if desired is not None and not isinstance(desired, bool):
+        return jsonify({'success': False, 'message': '"favourite" must be true or false'}), 400
+
+    try:
+        favourite = favourites_services.toggle_favourite(user_id, recipe_id, current_app.repository, desired)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
+
+    return jsonify({'success': True, 'recipe_id': recipe_id, 'favourite': favourite})
+
+
 @favourites_bp.route('/list')
 @login_required
 def list():
@@ -102,7 +126,7 @@ def list():
                     'category': getattr(recipe.category, 'name', 'Uncategorized') if hasattr(recipe,
                                                                                              'category') and recipe.category else 'Uncategorized',
                     'desc': getattr(recipe, 'description', 'No description available'),
-                    'images': getattr(recipe, 'images', []),
+                    'thumbnail': getattr(recipe, 'thumbnail', None),
                     'nutrition': {
                         'calories': getattr(recipe.nutrition, 'calories', 0) if hasattr(recipe,
                                                                                         'nutrition') and recipe.nutrition else 0,
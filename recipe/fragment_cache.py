@@ -0,0 +1,74 @@
+# recipe/fragment_cache.py
+import time
+from typing import Callable, Hashable, Iterable, Optional, Tuple
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from recipe.adapters.caching_repository import CachePolicy, TTLCache
+
+DEFAULT_FRAGMENT_CACHE_SIZE = 4096
+
+
+class FragmentCache:
+    """
+    Rendered template fragments keyed by ``(catalog generation, *key)``.
+
+    Keys name the fragment and the content it shows (e.g. ``"browse-card", recipe.id``);
+    anything a fragment displays that can change must be part of its key. The catalog
+    generation is the implicit content version: a new recipe (or a pruned change log, see
+    ChangeWatcher) bumps it, so every fragment rendered before is never looked up again.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_FRAGMENT_CACHE_SIZE):
+        self.__cache = TTLCache(CachePolicy(maxsize), time.monotonic)
+        self.__generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    def render(self, key: Tuple[Hashable, ...], render: Callable[[], str]) -> Markup:
+        full_key = (self.__generation,) + key
+        html = self.__cache.get(full_key, None)
+        if html is None:
+            html = Markup(render())
+            self.__cache.put(full_key, html)
+        return html
+
+    def clear(self) -> None:
+        self.__generation += 1
+        self.__cache.clear()
+
+    def apply_changes(self, changes: Iterable[Tuple[str, Optional[int]]]) -> None:
+        if any(table_name in ("recipes", "*") for table_name, _ in changes):
+            self.clear()
+
+    def stats(self) -> dict:
+        return self.__cache.stats()
+
+
+class FragmentCacheExtension(Extension):
+    """
+    ``{% cache "browse-card", r.id %}...{% endcache %}``: render the body once per key.
+
+    The body must not contain per-request or per-user output (CSRF tokens, session data).
+    """
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        call = self.call_method("_render_cached", [nodes.Tuple(key, "load")])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, key, caller):
+        return self.environment.fragment_cache.render(key, caller)
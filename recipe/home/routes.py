@@ -1,14 +1,17 @@
 from flask import Blueprint, render_template, current_app
-from recipe.services.recipe_services import get_featured_recipes, get_recipe_of_the_day
+from recipe.conditional import conditional, content_versions
+from recipe.services.recipe_services import get_daily_picks
 
 bp = Blueprint("home", __name__)
 
 @bp.route("/")
+@conditional(lambda: content_versions().home())
 def index():
     repo = current_app.repository
 
-    featured_recipes = get_featured_recipes(repo, count=6)
-    recipe_of_day = get_recipe_of_the_day(repo)
+    picks = get_daily_picks(repo, count=6)
+    featured_recipes = picks.featured
+    recipe_of_day = picks.recipe_of_the_day
 
     featured = []
     for recipe in featured_recipes:
@@ -19,7 +22,7 @@ def index():
             'time': f"{(recipe.cook_time or 0) + (recipe.preparation_time or 0)} min",
             'category': recipe.category.name if recipe.category else 'Uncategorized',
             'desc': recipe.description,
-            'images': recipe.images,
+            'thumbnail': recipe.thumbnail,
             'nutrition': {
                 'calories': recipe.nutrition.calories if recipe.nutrition else 0,
                 'protein': recipe.nutrition.protein if recipe.nutrition else 0,
@@ -37,7 +40,7 @@ def index():
             'time': f"{(recipe_of_day.cook_time or 0) + (recipe_of_day.preparation_time or 0)} min",
             'category': recipe_of_day.category.name if recipe_of_day.category else 'Uncategorized',
             'desc': recipe_of_day.description,
-            'images': recipe_of_day.images,
+            'thumbnail': recipe_of_day.thumbnail,
             'nutrition': {
                 'calories': recipe_of_day.nutrition.calories if recipe_of_day.nutrition else 0,
                 'protein': recipe_of_day.nutrition.protein if recipe_of_day.nutrition else 0,
@@ -0,0 +1,393 @@
+# recipe/metrics.py
+"""
+Request, repository, cache and database metrics in the Prometheus text format.
+
+Enable with ``METRICS=1``; ``GET /metrics`` then serves:
+
+- ``recipe_http_requests_total`` / ``recipe_http_request_duration_seconds``: per endpoint
+- ``recipe_repository_calls_total`` / ``recipe_repository_call_duration_seconds``: per method
+- ``recipe_cache_hits_total`` / ``recipe_cache_misses_total``: per cache
+- ``recipe_db_connections_in_use``, ``recipe_db_checkouts_total``, ``recipe_db_pool_size``
+- ``recipe_catalog_recipes``
+
+Each worker keeps its own counters. With ``METRICS_DIR`` set, workers also write them to
+``<METRICS_DIR>/metrics-<pid>.json`` (at most once a second, and on every scrape), and
+``/metrics`` sums the counters and histograms of every file in the directory, so any worker can
+answer the scrape for all of them. Gauges always describe the worker that answers. Empty the
+directory when the server restarts.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import Flask, Response, request
+
+from recipe.adapters.repository import AbstractRepository
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REPOSITORY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+FLUSH_INTERVAL = 1.0
+
+Labels = Tuple[str, ...]
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.__lock = threading.Lock()
+        self.__values: Dict[Labels, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self.__lock:
+            self.__values[labelvalues] = self.__values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> Dict[Labels, float]:
+        with self.__lock:
+            return dict(self.__values)
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.__lock = threading.Lock()
+        # per label set: a count per bucket (the last one is +Inf), then the sum
+        self.__values: Dict[Labels, List[float]] = {}
+
+    def observe(self, *labelvalues: str, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self.__lock:
+            counts = self.__values.get(labelvalues)
+            if counts is None:
+                counts = self.__values[labelvalues] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self) -> Dict[Labels, List[float]]:
+        with self.__lock:
+            return {labels: list(counts) for labels, counts in self.__values.items()}
+
+
+class Family:
+    """Samples of one metric computed at collection time (see ``MetricsRegistry.add_collector``)."""
+
+    def __init__(self, name: str, type: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.type = type
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def add(self, *labelvalues: str, value: float) -> "Family":
+        self.values[labelvalues] = self.values.get(labelvalues, 0.0) + value
+        return self
+
+    def samples(self) -> Dict[Labels, float]:
+        return self.values
+
+
+class MetricsRegistry:
+    """This process's metrics, as JSON-able snapshots that can be merged across processes."""
+
+    def __init__(self):
+        self.__metrics: List = []
+        self.__collectors: List[Tuple[Callable[[], Iterable[Family]], bool]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.__metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = REQUEST_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.__metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]], gauges_only: bool = False) -> None:
+        """``collector()`` is called on every snapshot, or only for ones with gauges if ``gauges_only``."""
+        self.__collectors.append((collector, gauges_only))
+
+    def snapshot(self, include_gauges: bool = True) -> Dict[str, dict]:
+        families = list(self.__metrics)
+        for collector, gauges_only in self.__collectors:
+            if include_gauges or not gauges_only:
+                families.extend(collector())
+        snapshot = {}
+        for family in families:
+            if family.type == "gauge" and not include_gauges:
+                continue
+            entry = snapshot.setdefault(family.name, {
+                "type": family.type,
+                "help": family.documentation,
+                "labelnames": list(family.labelnames),
+                "buckets": list(getattr(family, "buckets", ())),
+                "samples": [],
+            })
+            entry["samples"].extend([list(labels), value] for labels, value in family.samples().items())
+        return snapshot
+
+
+def merge(snapshots: Iterable[Dict[str, dict]]) -> Dict[str, dict]:
+    """Sum counters and histograms of several snapshots, sample by sample."""
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            target = merged.setdefault(name, {**family, "samples": {}})
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif isinstance(value, list):
+                    target["samples"][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target["samples"][key] = current + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(merged: Dict[str, dict]) -> str:
+    """The Prometheus text exposition format (version 0.0.4) of a merged snapshot."""
+    lines = []
+    for name in sorted(merged):
+        family = merged[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        names = family["labelnames"]
+        for labels, value in sorted(family["samples"].items()):
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            cumulative = 0.0
+            bounds = [repr(float(b)) for b in family["buckets"]] + ["+Inf"]
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(names, labels, [('le', bound)])} {_number(cumulative)}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, labels)} {_number(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiProcessStore:
+    """One snapshot file per worker process in a shared directory."""
+
+    def __init__(self, directory: str):
+        self.__directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def __path(self, pid: int) -> str:
+        return os.path.join(self.__directory, f"metrics-{pid}.json")
+
+    def write(self, snapshot: Dict[str, dict]) -> None:
+        path = self.__path(os.getpid())
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(snapshot, file)
+        os.replace(temporary, path)  # readers never see a partly written file
+
+    def read_others(self) -> List[Dict[str, dict]]:
+        own = self.__path(os.getpid())
+        snapshots = []
+        for path in sorted(glob.glob(os.path.join(self.__directory, "metrics-*.json"))):
+            if path == own:
+                continue
+            try:
+                with open(path, encoding="utf-8") as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                continue  # a worker replacing its file right now; counted on the next scrape
+        return snapshots
+
+
+class MeteredRepository:
+    """Proxy that counts and times every call to the repository it wraps."""
+
+    def __init__(self, repo, calls: Counter, durations: Histogram):
+        self.__repo = repo
+        self.__calls = calls
+        self.__durations = durations
+        self.__methods: Dict[str, Callable] = {}
+
+    @property
+    def wrapped(self):
+        return self.__repo
+
+    def __getattr__(self, name):
+        method = self.__methods.get(name)
+        if method is None:
+            attribute = getattr(self.__repo, name)
+            if not callable(attribute):
+                return attribute
+            method = self.__methods[name] = self.__metered(name, attribute)
+        return method
+
+    def __metered(self, name: str, method: Callable) -> Callable:
+        calls, durations = self.__calls, self.__durations
+
+        def metered(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                calls.inc(name)
+                durations.observe(name, value=time.perf_counter() - start)
+        return metered
+
+
+def unwrap_repository(repo) -> AbstractRepository:
+    """The repository behind any instrumentation proxies (MeteredRepository, TimedRepository)."""
+    while not isinstance(repo, AbstractRepository):
+        repo = repo.wrapped
+    return repo
+
+
+def _cache_collector(app: Flask) -> Callable[[], List[Family]]:
+    def collect():
+        hits = Family("recipe_cache_hits_total", "counter", "Cache lookups answered from the cache.", ["cache"])
+        misses = Family("recipe_cache_misses_total", "counter", "Cache lookups that missed.", ["cache"])
+        caches: Dict[str, dict] = {}
+        repo = unwrap_repository(app.repository)
+        if hasattr(type(repo), "cache_stats"):
+            caches.update((f"repository.{name}", stats) for name, stats in repo.cache_stats().items())
+        caches["fragments"] = app.jinja_env.fragment_cache.stats()
+        caches["recipe_detail_views"] = app.extensions["recipe_detail_views"].stats()
+        page_cache = app.extensions.get("page_cache")
+        if page_cache is not None:
+            caches.update((f"page.{endpoint}", stats) for endpoint, stats in page_cache.stats().items())
+        for cache, stats in caches.items():
+            hits.add(cache, value=stats["hits"])
+            misses.add(cache, value=stats["misses"])
+        return [hits, misses]
+    return collect
+
+
+def _database_collector(engine) -> Callable[[], List[Family]]:
+    from sqlalchemy import event
+
+    pool = engine.pool
+    lock = threading.Lock()
+    state = {"in_use": 0, "checkouts": 0}
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        with lock:
+            state["in_use"] += 1
+            state["checkouts"] += 1
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        with lock:
+            state["in_use"] -= 1
+
+    def collect():
+        families = [
+            Family("recipe_db_connections_in_use", "gauge",
+                   "Database connections checked out of the pool.").add(value=state["in_use"]),
+            Family("recipe_db_checkouts_total", "counter",
+                   "Database connections handed out by the pool.").add(value=state["checkouts"]),
+        ]
+        size = getattr(pool, "size", None)
+        if callable(size):  # QueuePool; SQLite's NullPool keeps no connections
+            families.append(Family("recipe_db_pool_size", "gauge",
+                                   "Connections the pool keeps open.").add(value=size()))
+        return families
+    return collect
+
+
+def init_app(app: Flask, engine=None, directory: Optional[str] = None) -> MetricsRegistry:
+    """
+    Serve ``/metrics`` and record request and repository metrics.
+
+    Call after everything that registers request hooks and after the repository is final:
+    requests are timed from before every other ``before_request`` hook to after every other
+    ``after_request`` hook, and ``app.repository`` is wrapped in a MeteredRepository.
+    """
+    registry = MetricsRegistry()
+    app.extensions["metrics"] = registry
+
+    requests = registry.counter("recipe_http_requests_total", "HTTP requests served.",
+                                ["endpoint", "method", "status"])
+    latency = registry.histogram("recipe_http_request_duration_seconds", "Time to serve HTTP requests.",
+                                 ["endpoint"], REQUEST_BUCKETS)
+    calls = registry.counter("recipe_repository_calls_total", "Repository method calls.", ["method"])
+    call_latency = registry.histogram("recipe_repository_call_duration_seconds",
+                                      "Time spent in repository methods.", ["method"], REPOSITORY_BUCKETS)
+    app.repository = MeteredRepository(app.repository, calls, call_latency)
+
+    registry.add_collector(_cache_collector(app))
+    if engine is not None:
+        registry.add_collector(_database_collector(engine))
+
+    def catalog():
+        return [Family("recipe_catalog_recipes", "gauge", "Recipes in the catalog.")
+                .add(value=unwrap_repository(app.repository).get_total_recipe_count())]
+    registry.add_collector(catalog, gauges_only=True)
+
+    store = MultiProcessStore(directory) if directory else None
+    last_flush = [0.0]
+
+    def flush(force: bool = False) -> None:
+        now = time.monotonic()
+        if store is not None and (force or now - last_flush[0] >= FLUSH_INTERVAL):
+            last_flush[0] = now
+            store.write(registry.snapshot(include_gauges=False))
+
+    if store is not None:
+        atexit.register(flush, True)
+
+    def start_timer():
+        request.environ["recipe.metrics_start"] = time.perf_counter()
+
+    def record(response):
+        start = request.environ.get("recipe.metrics_start")
+        if start is not None:
+            endpoint = request.endpoint or "unmatched"
+            requests.inc(endpoint, request.method, str(response.status_code))
+            latency.observe(endpoint, value=time.perf_counter() - start)
+            flush()
+        return response
+
+    # before_request hooks run in registration order, after_request hooks in reverse
+    app.before_request_funcs.setdefault(None, []).insert(0, start_timer)
+    app.after_request_funcs.setdefault(None, []).insert(0, record)
+
+    @app.route("/metrics")
+    def metrics():
+        own = registry.snapshot()
+        snapshots = [own]
+        if store is not None:
+            flush(force=True)
+            snapshots.extend(store.read_others())
+        return Response(render(merge(snapshots)), content_type=CONTENT_TYPE)
+
+    return registry
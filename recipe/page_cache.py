@@ -0,0 +1,106 @@
+# recipe/page_cache.py
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from flask import Flask, current_app, g, request, session
+
+from recipe.adapters.caching_repository import CachePolicy, TTLCache
+
+# Cached endpoints and the query arguments that change their output; anything else in the
+# query string (tracking parameters, typos) maps to the same cache entry
+CACHED_ENDPOINTS: Dict[str, Tuple[str, ...]] = {
+    "home.index": (),
+    "browse.browse": ("query", "category", "author", "ingredient", "page", "size", "sort", "dir"),
+    "recipes.detail": (),
+}
+
+# Writes that change what an anonymous visitor sees for the recipe in the URL
+INVALIDATING_ENDPOINTS = {"reviews.add_review"}
+
+# Response headers never replayed from the cache
+_PER_SESSION_HEADERS = {"set-cookie"}
+
+
+class PageCache:
+    """
+    Whole-response cache for anonymous GET requests to the home, browse and recipe pages.
+
+    A request is anonymous when nobody is logged in and no flash message is waiting, so
+    its page contains no per-session state (no CSRF token, no favourites, no review form).
+    Responses that write to the session are never stored, and Set-Cookie headers are never
+    replayed. A review invalidates that recipe's page and the browse pages (which show and
+    sort by ratings); a new recipe clears everything. Writes from other workers arrive
+    through ``apply_changes`` (see ChangeWatcher).
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        policy = CachePolicy(maxsize, ttl)
+        self.__caches: Dict[str, TTLCache] = {
+            endpoint: TTLCache(policy, clock) for endpoint in CACHED_ENDPOINTS
+        }
+
+    def init_app(self, app: Flask) -> None:
+        app.before_request(self.__serve_cached)
+        app.after_request(self.__store)
+        app.extensions["page_cache"] = self
+
+    # ---------- Request hooks ----------
+    @staticmethod
+    def __key() -> Optional[Tuple]:
+        if request.method != "GET" or request.endpoint not in CACHED_ENDPOINTS:
+            return None
+        if "username" in session or "_flashes" in session:
+            return None
+        args = tuple(
+            (name, tuple(value for value in request.args.getlist(name) if value))
+            for name in CACHED_ENDPOINTS[request.endpoint]
+            if any(request.args.getlist(name))
+        )
+        return tuple(sorted((request.view_args or {}).items())), args
+
+    def __serve_cached(self):
+        key = self.__key()
+        if key is None:
+            return None
+        entry = self.__caches[request.endpoint].get(key, None)
+        if entry is None:
+            g.page_cache_key = key
+            return None
+        status, headers, body = entry
+        response = current_app.response_class(body, status=status, headers=headers)
+        response.headers["X-Page-Cache"] = "HIT"
+        return response.make_conditional(request)
+
+    def __store(self, response):
+        key = g.pop("page_cache_key", None)
+        if key is not None:
+            if response.status_code == 200 and not response.direct_passthrough and not session.modified:
+                headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _PER_SESSION_HEADERS]
+                self.__caches[request.endpoint].put(key, (response.status_code, headers, response.get_data()))
+            response.headers["X-Page-Cache"] = "MISS"
+        elif (request.endpoint in INVALIDATING_ENDPOINTS and response.status_code < 400
+              and request.view_args and "recipe_id" in request.view_args):
+            self.invalidate_recipe(request.view_args["recipe_id"])
+        return response
+
+    # ---------- Invalidation ----------
+    def invalidate_recipe(self, recipe_id: int) -> None:
+        """Drop the recipe's page and every browse page (ratings are shown and sortable there)."""
+        self.__caches["recipes.detail"].invalidate(((("recipe_id", recipe_id),), ()))
+        self.__caches["browse.browse"].clear()
+
+    def clear(self) -> None:
+        for cache in self.__caches.values():
+            cache.clear()
+
+    def apply_changes(self, changes: Iterable[Tuple[str, Optional[int]]]) -> None:
+        for table_name, key in changes:
+            if table_name == "reviews":
+                self.invalidate_recipe(key)
+            elif table_name in ("recipes", "*"):
+                self.clear()
+                return
+
+    def stats(self) -> Dict[str, Dict]:
+        return {endpoint: cache.stats() for endpoint, cache in self.__caches.items()}
@@ -1,58 +1,41 @@
-from flask import Blueprint, render_template, abort, current_app
+from flask import Blueprint, render_template, abort, current_app, session
 
-from recipe.domainmodel import recipe
-from recipe.services.recipe_services import get_recipe_by_id
+from recipe.conditional import conditional, content_versions
+from recipe.services import favourites_services, reviews_services
 
 bp = Blueprint("recipes", __name__)
 
+
+def _viewer_state(recipe_id: int) -> dict:
+   """The only per-user part of the detail page: the logged-in user's favourite and review status."""
+   state = {"is_favourite": False, "has_reviewed": False}
+   if "username" not in session:
+       return state
+
+   repo = current_app.repository
+   user_id = session.get("user_id")
+   if not user_id:
+       user = repo.get_user_by_username(session.get("username"))
+       user_id = user.id if user else None
+   if user_id:
+       state["is_favourite"] = favourites_services.is_favourite(user_id, recipe_id, repo)
+       state["has_reviewed"] = reviews_services.user_has_reviewed(user_id, recipe_id, repo)
+   return state
+
+
 @bp.route("/<int:recipe_id>")
+@conditional(lambda recipe_id: content_versions().recipe(recipe_id))
 def detail(recipe_id: int):
-   """Recipe detail page."""
-   repo = current_app.repository
-   recipe = get_recipe_by_id(repo, recipe_id)
+   """Recipe detail page: the shared view model is cached per recipe, the viewer's state is not."""
+   view = current_app.extensions["recipe_detail_views"].get(current_app.repository, recipe_id)
 
-   if not recipe:
+   if not view:
        abort(404)
 
-   # Normalize fields
-   cook = getattr(recipe, "cook_time", 0) or 0
-   prep  = getattr(recipe, "preparation_time", 0) or 0
-   imgs = getattr(recipe, "images", None)
-   if isinstance(imgs, str):
-       images = [imgs] if imgs.strip() else []
-   elif isinstance(imgs, (list, tuple)):
-       images = [s for s in imgs if isinstance(s, str) and s.strip()]
-   else:
-       images = []
-
-   instructions = recipe.instructions if isinstance(recipe.instructions, list) else []
-   ingredient_quantities = recipe.ingredient_quantities if isinstance(recipe.ingredient_quantities, list) else []
-   nutri = recipe.nutrition
-
-   # Calculate Health Star Rating
-   health_star = repo.calculate_health_star_rating(recipe)
-
-   # Convert to dict format for template
-   recipe_data = {
-       "id": recipe.id,
-       "name": recipe.name,
-       "author": recipe.author.name if recipe.author else "Unknown",
-       "time": f"{cook + prep} min",
-       "prep_time": prep,
-       "cook_time": cook,
-       "category": recipe.category.name if recipe.category else "Uncategorized",
-       "desc": recipe.description,
-       "ingredients": recipe.ingredients,
-       "ingredient_quantities": ingredient_quantities,  # Added ingredient quantities
-       "instructions": instructions,
-       "images": images,
-       "nutrition": {
-           "calories": getattr(nutri, "calories", 0) if nutri else 0,
-           "protein": getattr(nutri, "protein", 0)  if nutri else 0,
-           "fat": getattr(nutri, "fat", 0)          if nutri else 0,
-           "carbs": getattr(nutri, "carbohydrates", 0) if nutri else 0,
-       },
-       "health_star": health_star  # Added health star rating
-   }
-
-   return render_template("recipe_detail.html", recipe=recipe_data)
+   return render_template(
+       "recipe_detail.html",
+       recipe=view.recipe,
+       stats=view.review_stats,
+       review_page=view.review_page,
+       viewer=_viewer_state(recipe_id),
+   )
@@ -70,6 +70,8 @@ def add_review(recipe_id):
 
         # Add the review
         updated = reviews_services.add_review(user_id, recipe_id, rating, comment, current_app.repository)
+        for listener in current_app.extensions["local_change_listeners"]:
+            listener.apply_changes([("reviews", recipe_id)])
 
         if updated:
             flash("Your review has been updated!", "success")
@@ -85,6 +87,26 @@ def add_review(recipe_id):
     return redirect(request.referrer or url_for('recipes.detail', recipe_id=recipe_id))
 
 
+@reviews_bp.route('/list/<int:recipe_id>')
+def list_reviews(recipe_id):
+    """JSON page of reviews for a recipe: ?cursor=<next_cursor>&limit=<n>"""
+    try:
+        reviews, next_cursor = reviews_services.get_reviews_page(
+            recipe_id,
+            current_app.repository,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', reviews_services.REVIEWS_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    formatted = reviews_services.format_reviews_for_display(reviews)
+    for review in formatted:
+        ts = review.get('timestamp')
+        review['timestamp'] = ts.isoformat() if ts else None
+    return jsonify({'reviews': formatted, 'next_cursor': next_cursor})
+
+
 # Helper functions for templates
 @reviews_bp.app_context_processor
 def inject_review_helpers():
@@ -119,12 +141,15 @@ def inject_review_helpers():
         return False
 
     def get_reviews_for_display(recipe_id):
-        """Get formatted reviews for display"""
+        """Get the first page of formatted reviews plus the cursor for the next page"""
         try:
-            reviews = reviews_services.get_reviews_for_recipe(recipe_id, current_app.repository)
-            return reviews_services.format_reviews_for_display(reviews)
+            reviews, next_cursor = reviews_services.get_reviews_page(recipe_id, current_app.repository)
+            return {
+                'reviews': reviews_services.format_reviews_for_display(reviews),
+                'next_cursor': next_cursor
+            }
         except:
-            return []
+            return {'reviews': [], 'next_cursor': None}
 
     def render_stars(rating):
         """Render star rating as HTML"""
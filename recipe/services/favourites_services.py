@@ -1,36 +1,37 @@
 # recipe/services/favourites_services.py
 from recipe.adapters.repository import AbstractRepository
-from typing import List
+from typing import List, Optional
 from recipe.domainmodel.recipe import Recipe
 
 
 def add_favourite(user_id: int, recipe_id: int, repo: AbstractRepository) -> bool:
     """Add a recipe to user's favourites.
-    Returns True if newly added, False if it was already a favourite."""
-    # Verify user and recipe exist
-    user = repo.get_user(user_id)
-    recipe = repo.get_recipe(recipe_id)
-    if not user or not recipe:
-        raise ValueError("User or Recipe not found")
-
-    # Check existing to give accurate UI feedback (DB uniqueness also protects)
-    current = repo.favourites_for_user(user_id)
-    if any(r.id == recipe_id for r in current if r):
-        return False  # already favourited
-
-    repo.add_favourite(user_id, recipe_id)
-    return True
+    Returns True if newly added, False if it was already a favourite.
+    Raises ValueError if the user or recipe does not exist."""
+    return repo.add_favourite(user_id, recipe_id)
 
 
 def remove_favourite(user_id: int, recipe_id: int, repo: AbstractRepository) -> bool:
     """Remove a recipe from user's favourites.
     Returns True if removed, False if it wasn't a favourite."""
-    current = repo.favourites_for_user(user_id)
-    if not any(r.id == recipe_id for r in current if r):
-        return False  # nothing to remove
-
+    return repo.remove_favourite(user_id, recipe_id)
+
+
+def toggle_favourite(user_id: int, recipe_id: int, repo: AbstractRepository,
+                     favourite: Optional[bool] = None) -> bool:
+    """Set (favourite=True/False) or flip (favourite=None) a recipe's favourite status.
+    Returns the resulting status. Setting an explicit status is idempotent."""
+    if favourite is None:
+        if repo.add_favourite(user_id, recipe_id):
+            return True
+        repo.remove_favourite(user_id, recipe_id)
+        return False
+
+    if favourite:
+        repo.add_favourite(user_id, recipe_id)
+        return True
     repo.remove_favourite(user_id, recipe_id)
-    return True
+    return False
 
 
 def get_user_favourites(user_id: int, repo: AbstractRepository) -> List[Recipe]:
@@ -39,8 +40,7 @@ def get_user_favourites(user_id: int, repo: AbstractRepository) -> List[Recipe]:
 
 
 def is_favourite(user_id: int, recipe_id: int, repo: AbstractRepository) -> bool:
-    favourites = repo.favourites_for_user(user_id)
-    return any(recipe and recipe.id == recipe_id for recipe in favourites)
+    return repo.is_favourite(user_id, recipe_id)
 
 
 def get_favourites_count(user_id: int, repo: AbstractRepository) -> int:
@@ -1,8 +1,12 @@
-import random
 import datetime
-from typing import Optional, List
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from recipe.adapters.caching_repository import CachePolicy, TTLCache
 from recipe.adapters.repository import AbstractRepository
 from recipe.domainmodel.recipe import Recipe
+from recipe.services import reviews_services
 
 def get_recipe_by_id(repo: AbstractRepository, recipe_id: int) -> Optional[Recipe]:
     return repo.get_recipe(recipe_id)
@@ -11,22 +15,143 @@ def get_all_recipes(repo: AbstractRepository) -> List[Recipe]:
     return repo.get_all_recipes()
 
 
-def get_featured_recipes(repo: AbstractRepository, count: int = 3) -> List[Recipe]:
-    all_recipes = repo.get_all_recipes()
-    if not all_recipes:
-        return []
+class DailyPicks(NamedTuple):
+    day: datetime.date
+    recipe_of_the_day: Optional[Recipe]
+    featured: List[Recipe]
+
+
+# Per repository: (day, featured count) -> picks; entries from earlier days are dropped
+_daily_picks: "weakref.WeakKeyDictionary[AbstractRepository, Dict[Tuple[datetime.date, int], DailyPicks]]" = \
+    weakref.WeakKeyDictionary()
+_daily_picks_lock = threading.Lock()
+
+
+def _pick_for_day(repo: AbstractRepository, day: datetime.date, count: int) -> DailyPicks:
+    # Seeded by the date: the same picks on every worker, all day, without touching the
+    # process-wide random module
+    rod = repo.sample_recipes(1, seed=day.isoformat())
+    featured = repo.sample_recipes(count, seed=day.isoformat() + "featured")
+    # Shared by every request (and thread) for the rest of the day
+    repo.detach_recipes(rod + featured)
+    return DailyPicks(day, rod[0] if rod else None, featured)
+
 
-    today = datetime.date.today().isoformat()
-    random.seed(today + "featured")
+def get_daily_picks(repo: AbstractRepository, count: int = 3, today: Optional[datetime.date] = None) -> DailyPicks:
+    """Today's recipe of the day and featured recipes, computed once per day and shared by all requests."""
+    day = today or datetime.date.today()
+    key = (day, count)
+    with _daily_picks_lock:
+        picks = _daily_picks.get(repo, {}).get(key)
+        if picks is None:
+            picks = _pick_for_day(repo, day, count)
+            by_key = {k: v for k, v in _daily_picks.get(repo, {}).items() if k[0] == day}
+            by_key[key] = picks
+            _daily_picks[repo] = by_key
+    return picks
+
+
+def get_featured_recipes(repo: AbstractRepository, count: int = 3) -> List[Recipe]:
+    return list(get_daily_picks(repo, count).featured)
 
-    return random.sample(all_recipes, min(count, len(all_recipes)))
 
 def get_recipe_of_the_day(repo: AbstractRepository) -> Optional[Recipe]:
-    all_recipes = repo.get_all_recipes()
-    if not all_recipes:
+    return get_daily_picks(repo).recipe_of_the_day
+
+
+class RecipeDetailView(NamedTuple):
+    """Everything on a recipe's detail page that is the same for every visitor."""
+    recipe: dict
+    review_stats: dict
+    review_page: dict
+
+
+def build_recipe_detail_view(repo: AbstractRepository, recipe_id: int) -> Optional[RecipeDetailView]:
+    recipe = repo.get_recipe(recipe_id)
+    if not recipe:
         return None
 
-    today = datetime.date.today().isoformat()
-    random.seed(today)
+    # Normalize fields
+    cook = getattr(recipe, "cook_time", 0) or 0
+    prep = getattr(recipe, "preparation_time", 0) or 0
+    imgs = getattr(recipe, "images", None)
+    if isinstance(imgs, str):
+        images = [imgs] if imgs.strip() else []
+    elif isinstance(imgs, (list, tuple)):
+        images = [s for s in imgs if isinstance(s, str) and s.strip()]
+    else:
+        images = []
+
+    instructions = recipe.instructions if isinstance(recipe.instructions, list) else []
+    ingredient_quantities = recipe.ingredient_quantities if isinstance(recipe.ingredient_quantities, list) else []
+    nutri = recipe.nutrition
+
+    recipe_data = {
+        "id": recipe.id,
+        "name": recipe.name,
+        "author": recipe.author.name if recipe.author else "Unknown",
+        "time": f"{cook + prep} min",
+        "prep_time": prep,
+        "cook_time": cook,
+        "category": recipe.category.name if recipe.category else "Uncategorized",
+        "desc": recipe.description,
+        "ingredients": list(recipe.ingredients or []),
+        "ingredient_quantities": list(ingredient_quantities),
+        "instructions": list(instructions),
+        "images": images,
+        "nutrition": {
+            "calories": getattr(nutri, "calories", 0) if nutri else 0,
+            "protein": getattr(nutri, "protein", 0) if nutri else 0,
+            "fat": getattr(nutri, "fat", 0) if nutri else 0,
+            "carbs": getattr(nutri, "carbohydrates", 0) if nutri else 0,
+        },
+        "health_star": repo.calculate_health_star_rating(recipe),
+    }
+
+    reviews, next_cursor = reviews_services.get_reviews_page(recipe_id, repo)
+    return RecipeDetailView(
+        recipe=recipe_data,
+        review_stats=reviews_services.get_review_stats(recipe_id, repo),
+        review_page={
+            "reviews": reviews_services.format_reviews_for_display(reviews),
+            "next_cursor": next_cursor,
+        },
+    )
+
+
+class RecipeDetailViewCache:
+    """
+    Per-recipe cache of RecipeDetailView, shared by all visitors.
+
+    Entries expire after ``ttl`` seconds and are dropped when the recipe gets a review
+    (``invalidate``, or ``apply_changes`` for writes made by other workers).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.__cache = TTLCache(CachePolicy(maxsize, ttl), clock)
+
+    def get(self, repo: AbstractRepository, recipe_id: int) -> Optional[RecipeDetailView]:
+        view = self.__cache.get(recipe_id, None)
+        if view is None:
+            view = build_recipe_detail_view(repo, recipe_id)
+            if view is not None:
+                self.__cache.put(recipe_id, view)
+        return view
+
+    def invalidate(self, recipe_id: int) -> None:
+        self.__cache.invalidate(recipe_id)
+
+    def clear(self) -> None:
+        self.__cache.clear()
+
+    def apply_changes(self, changes: Iterable[Tuple[str, Optional[int]]]) -> None:
+        for table_name, key in changes:
+            if table_name == "reviews":
+                self.invalidate(key)
+            elif table_name == "*":
+                self.clear()
+                return
 
-    return random.choice(all_recipes)
\ No newline at end of file
+    def stats(self) -> dict:
+        return self.__cache.stats()
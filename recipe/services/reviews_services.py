@@ -1,36 +1,56 @@
 # recipe/services/reviews_services.py
 from recipe.adapters.repository import AbstractRepository
-from typing import List
+from typing import List, Optional, Tuple
 from recipe.domainmodel.review import Review
 from datetime import datetime
 
+REVIEWS_PAGE_SIZE = 10
+MAX_REVIEWS_PAGE_SIZE = 50
+
 
 def add_review(user_id: int, recipe_id: int, rating: int, comment: str, repo: AbstractRepository) -> bool:
     # Validate rating
     if not isinstance(rating, int) or rating < 1 or rating > 5:
         raise ValueError("Rating must be an integer between 1 and 5")
 
-    # Verify user and recipe exist
-    user = repo.get_user(user_id)
-    recipe = repo.get_recipe(recipe_id)
-    if not user or not recipe:
-        raise ValueError("User or Recipe not found")
+    # The repository upserts and raises ValueError if the user or recipe does not exist.
+    # True if we updated an existing review, False if we inserted new
+    return repo.add_review(recipe_id=recipe_id, user_id=user_id, rating=rating, comment=comment)
 
-    # Detect whether this user has already reviewed this recipe
-    existing = next((r for r in repo.reviews_for_recipe(recipe_id) if getattr(r.user, "id", None) == user_id), None)
 
-    # Delegate to repository (your DB repo now upserts internally)
-    repo.add_review(recipe_id=recipe_id, user_id=user_id, rating=rating, comment=comment)
+def get_reviews_for_recipe(recipe_id: int, repo: AbstractRepository) -> List[Review]:
+    """Get all reviews for a recipe, sorted by most recent (the repository already orders them)"""
+    return repo.reviews_for_recipe(recipe_id)
 
-    # True if we updated an existing review, False if we inserted new
-    return existing is not None
 
+def encode_review_cursor(review: Review) -> str:
+    """Opaque keyset cursor pointing just after `review` in newest-first order."""
+    return f"{review.timestamp.isoformat()}_{review.id}"
+
+
+def decode_review_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Inverse of encode_review_cursor. Raises ValueError for malformed cursors."""
+    if not cursor:
+        return None
+    timestamp, _, review_id = cursor.rpartition("_")
+    try:
+        return datetime.fromisoformat(timestamp), int(review_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid review cursor")
 
-def get_reviews_for_recipe(recipe_id: int, repo: AbstractRepository) -> List[Review]:
-    """Get all reviews for a recipe, sorted by most recent"""
-    reviews = repo.reviews_for_recipe(recipe_id)
-    # Sort by timestamp, most recent first
-    return sorted(reviews, key=lambda r: r.timestamp, reverse=True)
+
+def get_reviews_page(recipe_id: int, repo: AbstractRepository, cursor: Optional[str] = None,
+                     limit: int = REVIEWS_PAGE_SIZE) -> Tuple[List[Review], Optional[str]]:
+    """Get one page of reviews, most recent first.
+    Returns (reviews, next_cursor); next_cursor is None on the last page."""
+    limit = max(1, min(int(limit or REVIEWS_PAGE_SIZE), MAX_REVIEWS_PAGE_SIZE))
+
+    # Fetch one extra row to learn whether another page exists without a COUNT query
+    reviews = repo.reviews_for_recipe(recipe_id, cursor=decode_review_cursor(cursor), limit=limit + 1)
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        return reviews, encode_review_cursor(reviews[-1])
+    return reviews, None
 
 
 def get_average_rating(recipe_id: int, repo: AbstractRepository) -> float:
@@ -39,30 +59,24 @@ def get_average_rating(recipe_id: int, repo: AbstractRepository) -> float:
 
 
 def get_review_stats(recipe_id: int, repo: AbstractRepository) -> dict:
-    """Get review statistics for a recipe."""
-    reviews = repo.reviews_for_recipe(recipe_id)
+    """Get review statistics for a recipe from a single aggregate (no review rows are loaded)."""
+    rating_counts = {5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
+    for rating, count in repo.rating_distribution(recipe_id).items():
+        if rating in rating_counts:
+            rating_counts[rating] += count
 
-    if not reviews:
+    total = sum(rating_counts.values())
+    if not total:
         return {
             "total_reviews": 0,
             "average_rating": 0.0,
-            "rating_distribution": {5: 0, 4: 0, 3: 0, 2: 0, 1: 0},
+            "rating_distribution": rating_counts,
         }
 
-    # Use repo's average (DB-backed) to match what's stored on recipe
-    avg = float(repo.average_rating(recipe_id) or 0.0)
-
-    # Distribution
-    rating_counts = {5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-    for r in reviews:
-        try:
-            rating_counts[int(r.rating)] += 1
-        except Exception:
-            # ignore malformed ratings
-            pass
+    avg = sum(rating * count for rating, count in rating_counts.items()) / total
 
     return {
-        "total_reviews": len(reviews),
+        "total_reviews": total,
         "average_rating": avg,
         "rating_distribution": rating_counts,
     }
@@ -70,8 +84,7 @@ def get_review_stats(recipe_id: int, repo: AbstractRepository) -> dict:
 
 def user_has_reviewed(user_id: int, recipe_id: int, repo: AbstractRepository) -> bool:
     """Check if a user has already reviewed a recipe"""
-    reviews = repo.reviews_for_recipe(recipe_id)
-    return any(review.user.id == user_id for review in reviews)
+    return repo.has_reviewed(user_id, recipe_id)
 
 
 def format_reviews_for_display(reviews: List[Review]) -> List[dict]:
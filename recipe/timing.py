@@ -0,0 +1,239 @@
+# recipe/timing.py
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+from typing import Deque, Dict, List, Optional
+
+from flask import Flask, current_app, jsonify, request
+
+# Phases reported in the Server-Timing header, in order, with their descriptions. ``repo``
+# includes ``db``, ``populate`` and ``health`` when those run inside repository calls;
+# ``view`` is the request's time outside the repository, templates and SQL (routes, services,
+# hooks), so a query issued directly by a hook, such as the change watcher's poll, counts
+# towards ``db`` only.
+PHASES: Dict[str, str] = {
+    "total": "request",
+    "view": "routes and services",
+    "repo": "repository",
+    "db": "SQL",
+    "populate": "bulk-load recipe data",
+    "health": "health star scoring",
+    "template": "templates",
+}
+
+DEFAULT_WINDOW = 256
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Accumulated seconds (and call counts) per phase for the request being served."""
+    __slots__ = ("started", "durations", "counts", "render_starts", "repo_depth", "unattributed_db")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.render_starts: List[float] = []
+        self.repo_depth = 0
+        # SQL run outside any repository call or template, which ``view`` must not include
+        self.unattributed_db = 0.0
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+
+    def finish(self) -> Dict[str, float]:
+        """Milliseconds per phase, including the derived ``total`` and ``view``."""
+        total = time.perf_counter() - self.started
+        ms = {phase: seconds * 1000 for phase, seconds in self.durations.items()}
+        ms["total"] = total * 1000
+        outside_view = ms.get("repo", 0.0) + ms.get("template", 0.0) + self.unattributed_db * 1000
+        ms["view"] = max(0.0, ms["total"] - outside_view)
+        return ms
+
+
+def timed(phase: str):
+    """
+    Add the decorated function's run time to ``phase`` of the current request.
+
+    Outside a timed request (timing disabled, or no request at all) this costs one
+    ContextVar lookup per call.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            if phase == "repo":
+                timings.repo_depth += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timings.add(phase, time.perf_counter() - start)
+                if phase == "repo":
+                    timings.repo_depth -= 1
+        return wrapped
+    return decorator
+
+
+class TimedRepository:
+    """
+    Proxy that adds every repository call's run time to the ``repo`` phase.
+
+    Only the outermost repository is wrapped, so calls a CachingRepository or
+    HybridRepository makes to the repository behind it are not counted twice.
+    """
+
+    def __init__(self, repo):
+        self.__repo = repo
+        self.__methods: Dict[str, object] = {}
+
+    @property
+    def wrapped(self):
+        return self.__repo
+
+    def __getattr__(self, name):
+        method = self.__methods.get(name)
+        if method is None:
+            attribute = getattr(self.__repo, name)
+            if not callable(attribute):
+                return attribute
+            method = self.__methods[name] = timed("repo")(attribute)
+        return method
+
+
+class TimingSummary:
+    """Per-endpoint phase durations of the last ``window`` requests, summarised on demand."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.__window = window
+        self.__lock = threading.Lock()
+        self.__samples: Dict[str, Deque[Dict[str, float]]] = {}
+        self.__requests: Dict[str, int] = {}
+
+    def record(self, endpoint: str, durations: Dict[str, float]) -> None:
+        with self.__lock:
+            samples = self.__samples.get(endpoint)
+            if samples is None:
+                samples = self.__samples[endpoint] = deque(maxlen=self.__window)
+            samples.append(durations)
+            self.__requests[endpoint] = self.__requests.get(endpoint, 0) + 1
+
+    def stats(self) -> Dict[str, Dict]:
+        with self.__lock:
+            snapshot = {endpoint: list(samples) for endpoint, samples in self.__samples.items()}
+            requests = dict(self.__requests)
+        summary = {}
+        for endpoint, samples in sorted(snapshot.items()):
+            phases = {}
+            for phase in PHASES:
+                values = sorted(sample.get(phase, 0.0) for sample in samples)
+                phases[phase] = {
+                    "mean": round(sum(values) / len(values), 3),
+                    "p50": round(_percentile(values, 0.50), 3),
+                    "p95": round(_percentile(values, 0.95), 3),
+                    "max": round(values[-1], 3),
+                }
+            summary[endpoint] = {"requests": requests[endpoint], "window": len(samples), "ms": phases}
+        return summary
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def server_timing_header(durations: Dict[str, float], counts: Dict[str, int]) -> str:
+    entries = []
+    for phase, description in PHASES.items():
+        if phase not in durations:
+            continue
+        if phase in counts and phase in ("db", "repo", "health"):
+            calls = counts[phase]
+            description = f"{description} ({calls} call{'' if calls == 1 else 's'})"
+        entries.append(f'{phase};dur={durations[phase]:.2f};desc="{description}"')
+    return ", ".join(entries)
+
+
+def _time_sql(engine) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("request_timing_starts", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timings = _current.get()
+        starts = conn.info.get("request_timing_starts")
+        if timings is not None and starts:
+            seconds = time.perf_counter() - starts.pop()
+            timings.add("db", seconds)
+            if not timings.repo_depth and not timings.render_starts:
+                timings.unattributed_db += seconds
+
+
+def init_app(app: Flask, engine=None, window: int = DEFAULT_WINDOW) -> TimingSummary:
+    """
+    Time every request's repository, SQL, template and remaining (view) work, send it as a
+    ``Server-Timing`` header and keep a rolling per-endpoint summary at ``/debug/timings``.
+
+    Call after everything that registers request hooks: the timer starts before every other
+    ``before_request`` hook and the header is added after every other ``after_request`` hook
+    (so the page cache never stores it).
+    """
+    from flask.signals import before_render_template, template_rendered
+
+    summary = TimingSummary(window)
+    app.extensions["request_timings"] = summary
+    app.repository = TimedRepository(app.repository)
+    if engine is not None:
+        _time_sql(engine)
+
+    def start_timer():
+        request.environ["recipe.timing_token"] = _current.set(RequestTimings())
+
+    def add_header(response):
+        timings = _current.get()
+        if timings is not None:
+            durations = timings.finish()
+            response.headers["Server-Timing"] = server_timing_header(durations, timings.counts)
+            if request.endpoint is not None:
+                summary.record(request.endpoint, durations)
+        return response
+
+    def stop_timer(exception=None):
+        token = request.environ.pop("recipe.timing_token", None)
+        if token is not None:
+            _current.reset(token)
+
+    # before_request hooks run in registration order, after_request hooks in reverse
+    app.before_request_funcs.setdefault(None, []).insert(0, start_timer)
+    app.after_request_funcs.setdefault(None, []).insert(0, add_header)
+    app.teardown_request(stop_timer)
+
+    def render_started(sender, template, context, **extra):
+        timings = _current.get()
+        if timings is not None:
+            timings.render_starts.append(time.perf_counter())
+
+    def render_finished(sender, template, context, **extra):
+        timings = _current.get()
+        if timings is not None and timings.render_starts:
+            timings.add("template", time.perf_counter() - timings.render_starts.pop())
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    @app.route("/debug/timings")
+    def debug_timings():
+        """Rolling per-endpoint latency breakdown (milliseconds)."""
+        return jsonify(current_app.extensions["request_timings"].stats())
+
+    return summary
@@ -87,3 +87,150 @@ def test_search_and_favourite_flow(client, app):
     r = client.get("/favourites/list", follow_redirects=True)
     assert r.status_code == 200
     assert recipe_name in r.get_data(as_text=True)
+
+def test_review_list_json_endpoint(client, app):
+    recipe_id, _ = _first_recipe_id(app)
+
+    r = client.get(f"/reviews/list/{recipe_id}?limit=1")
+    assert r.status_code == 200
+    data = r.get_json()
+    assert "reviews" in data and "next_cursor" in data
+    assert len(data["reviews"]) <= 1
+
+    r = client.get(f"/reviews/list/{recipe_id}?cursor=garbage")
+    assert r.status_code == 400
+
+def test_favourite_toggle_json_endpoint(client, app):
+    recipe_id, _ = _first_recipe_id(app)
+
+    r = client.post(f"/favourites/toggle/{recipe_id}", json={})
+    assert r.status_code == 401
+
+    client.post("/authentication/register",
+                data={"username": "e2e_toggle", "password": "ValidPass123", "confirm": "ValidPass123"},
+                follow_redirects=True)
+    client.post("/authentication/login",
+                data={"username": "e2e_toggle", "password": "ValidPass123"},
+                follow_redirects=True)
+
+    r = client.post(f"/favourites/toggle/{recipe_id}", json={"favourite": True})
+    assert r.status_code == 200 and r.get_json()["favourite"] is True
+    r = client.post(f"/favourites/toggle/{recipe_id}", json={"favourite": True})
+    assert r.get_json()["favourite"] is True
+    r = client.post(f"/favourites/toggle/{recipe_id}")
+    assert r.get_json()["favourite"] is False
+
+def test_concurrent_requests_share_one_app(app):
+    from concurrent.futures import ThreadPoolExecutor
+    recipe_id, recipe_name = _first_recipe_id(app)
+
+    def fetch(path):
+        with app.test_client() as c:
+            r = c.get(path)
+            return r.status_code, r.get_data(as_text=True)
+
+    paths = [f"/recipes/{recipe_id}", "/browse/?query=a", "/"] * 8
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(fetch, paths))
+
+    assert all(status == 200 for status, _ in results)
+    assert all(recipe_name in body for (status, body), path in zip(results, paths) if path.startswith("/recipes/"))
+
+def test_anonymous_page_cache(monkeypatch):
+    monkeypatch.setenv("REPOSITORY", "memory")
+    app = create_app({"TESTING": True, "WTF_CSRF_ENABLED": False, "PAGE_CACHE": True})
+    client = app.test_client()
+    recipe_id, _ = _first_recipe_id(app)
+
+    assert client.get(f"/recipes/{recipe_id}").headers["X-Page-Cache"] == "MISS"
+    r = client.get(f"/recipes/{recipe_id}")
+    assert r.headers["X-Page-Cache"] == "HIT" and "Set-Cookie" not in r.headers
+    assert client.get("/browse/?sort=rating&utm_source=x").headers["X-Page-Cache"] == "MISS"
+    assert client.get("/browse/?sort=rating").headers["X-Page-Cache"] == "HIT"
+
+    client.post("/authentication/register",
+                data={"username": "e2e_cached", "password": "ValidPass123", "confirm": "ValidPass123"},
+                follow_redirects=True)
+    client.post("/authentication/login",
+                data={"username": "e2e_cached", "password": "ValidPass123"},
+                follow_redirects=True)
+    assert "X-Page-Cache" not in client.get(f"/recipes/{recipe_id}").headers
+    client.post(f"/reviews/add/{recipe_id}", data={"rating": "4", "comment": "Cached page refreshed"},
+                follow_redirects=True)
+    client.get("/authentication/logout", follow_redirects=True)
+
+    r = client.get(f"/recipes/{recipe_id}")
+    assert r.headers["X-Page-Cache"] == "MISS"
+    assert "Cached page refreshed" in r.get_data(as_text=True)
+    assert client.get("/browse/?sort=rating").headers["X-Page-Cache"] == "MISS"
+
+def test_conditional_get_with_etags(monkeypatch):
+    monkeypatch.setenv("REPOSITORY", "memory")
+    app = create_app({"TESTING": True, "WTF_CSRF_ENABLED": False})
+    client = app.test_client()
+    recipe_id, _ = _first_recipe_id(app)
+
+    for path in ["/", "/browse/?sort=rating", f"/recipes/{recipe_id}", "/api/browse/options?field=author&q=a"]:
+        r = client.get(path)
+        etag = r.headers["ETag"]
+        assert r.status_code == 200 and etag.startswith('W/"')
+        r = client.get(path, headers={"If-None-Match": etag})
+        assert r.status_code == 304 and r.headers["ETag"] == etag and not r.data
+
+    detail_etag = client.get(f"/recipes/{recipe_id}").headers["ETag"]
+    other_etag = client.get(f"/recipes/{recipe_id + 1}").headers.get("ETag")
+    browse_etag = client.get("/browse/").headers["ETag"]
+
+    client.post("/authentication/register",
+                data={"username": "e2e_etag", "password": "ValidPass123", "confirm": "ValidPass123"},
+                follow_redirects=True)
+    client.post("/authentication/login",
+                data={"username": "e2e_etag", "password": "ValidPass123"},
+                follow_redirects=True)
+    assert "ETag" not in client.get(f"/recipes/{recipe_id}").headers
+    client.post(f"/reviews/add/{recipe_id}", data={"rating": "3", "comment": "Changes the ETag"},
+                follow_redirects=True)
+    client.get("/authentication/logout", follow_redirects=True)
+
+    assert client.get(f"/recipes/{recipe_id}", headers={"If-None-Match": detail_etag}).status_code == 200
+    assert client.get("/browse/", headers={"If-None-Match": browse_etag}).status_code == 200
+    if other_etag:
+        assert client.get(f"/recipes/{recipe_id + 1}", headers={"If-None-Match": other_etag}).status_code == 304
+
+def test_server_timing_breakdown(monkeypatch):
+    monkeypatch.setenv("REPOSITORY", "memory")
+    app = create_app({"TESTING": True, "SERVER_TIMING": True})
+    client = app.test_client()
+
+    r = client.get("/browse/?size=12")
+    assert r.status_code == 200
+    phases = {entry.split(";")[0].strip() for entry in r.headers["Server-Timing"].split(",")}
+    assert {"total", "view", "repo", "health", "template"} <= phases
+
+    client.get("/browse/?size=12")
+    summary = client.get("/debug/timings").get_json()
+    browse = summary["browse.browse"]
+    assert browse["requests"] == 2
+    assert browse["ms"]["total"]["max"] >= browse["ms"]["template"]["max"] > 0
+    assert "Server-Timing" not in create_app({"TESTING": True}).test_client().get("/").headers
+
+def test_prometheus_metrics(monkeypatch, tmp_path):
+    monkeypatch.setenv("REPOSITORY", "memory")
+    app = create_app({"TESTING": True, "METRICS": True, "METRICS_DIR": str(tmp_path)})
+    client = app.test_client()
+
+    client.get("/browse/")
+    client.get("/browse/")
+    client.get("/no-such-page")
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.mimetype == "text/plain"
+    text = r.get_data(as_text=True)
+    assert 'recipe_http_requests_total{endpoint="browse.browse",method="GET",status="200"} 2' in text
+    assert 'recipe_http_requests_total{endpoint="unmatched",method="GET",status="404"} 1' in text
+    assert 'recipe_http_request_duration_seconds_count{endpoint="browse.browse"} 2' in text
+    assert 'recipe_repository_calls_total{method="get_recipes_by_page"} 2' in text
+    assert 'recipe_cache_hits_total{cache="fragments"}' in text
+    assert f"recipe_catalog_recipes {app.repository.get_total_recipe_count()}" in text
+    assert list(tmp_path.glob("metrics-*.json"))
+
+    assert client.get("/debug/repository").status_code == 200
@@ -13,8 +13,6 @@ from recipe.adapters.database_populate import populate as db_populate
 # Paths
 THIS_DIR = Path(__file__).parent
 CSV_EXCERPT = THIS_DIR / "data" / "recipes-excerpt.csv"
-TEST_DB_PATH = THIS_DIR / "recipes-test.db"
-TEST_DB_URI = f"sqlite:///{TEST_DB_PATH}"
 MEM_DB_URI = "sqlite://"
 
 def _wipe_all(engine):
@@ -30,10 +28,12 @@ def _populate_from_excerpt(engine):
     db_populate(engine, str(tmpdir))
 
 @pytest.fixture(scope="session")
-def engine():
+def engine(tmp_path_factory):
     clear_mappers()
     orm.map_model_to_tables()
-    engine = create_engine(TEST_DB_URI, connect_args={"check_same_thread": False})
+    # A file (not :memory:) so threads get their own connections to the same database
+    test_db_path = tmp_path_factory.mktemp("tests_db") / "recipes-test.db"
+    engine = create_engine(f"sqlite:///{test_db_path}", connect_args={"check_same_thread": False})
     orm.mapper_registry.metadata.create_all(engine)
     yield engine
 
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from recipe.domainmodel.user import User
+
+THREADS = 16
+
+
+def test_concurrent_writers_get_distinct_ids(repo, engine):
+    recipes = repo.get_recipes_by_page(page=1, per_page=3, sort_by="id", sort_dir="asc")
+    recipe_ids = [r.id for r in recipes]
+
+    def write(i):
+        try:
+            user = User(f"threaded_user_{i}", "hash")
+            repo.add_user(user)
+            for recipe_id in recipe_ids:
+                repo.add_review(recipe_id, user.id, 1 + i % 5, f"thread {i} says hi")
+                repo.add_favourite(user.id, recipe_id)
+            return user.id
+        finally:
+            repo.close_session()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        user_ids = list(pool.map(write, range(THREADS)))
+
+    assert None not in user_ids
+    assert len(set(user_ids)) == THREADS
+
+    with engine.connect() as conn:
+        for table in ("users", "reviews", "favourites"):
+            ids = [row[0] for row in conn.execute(text(f"SELECT id FROM {table}"))]
+            assert len(ids) == len(set(ids)), f"duplicate ids in {table}"
+        assert conn.execute(text("SELECT COUNT(*) FROM reviews")).scalar_one() == THREADS * len(recipe_ids)
+        assert conn.execute(text("SELECT COUNT(*) FROM favourites")).scalar_one() == THREADS * len(recipe_ids)
+
+    for recipe_id in recipe_ids:
+        assert sum(repo.rating_distribution(recipe_id).values()) == THREADS
@@ -67,3 +67,356 @@ def test_repo_add_review_and_average(repo):
     avg = repo.average_rating(recipe.id)
     assert avg >= 4.0
 
+
+def test_repo_rating_distribution(repo):
+    recipe = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0]
+    for name, rating in [("dist_a", 5), ("dist_b", 3), ("dist_c", 5)]:
+        u = User(name, "hash", None)
+        repo.add_user(u)
+        repo.add_review(recipe.id, u.id, rating, "rated")
+    assert repo.rating_distribution(recipe.id) == {5: 2, 3: 1}
+
+def test_repo_reviews_keyset_pages(repo):
+    recipe = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0]
+    for i in range(3):
+        u = User(f"page_user_{i}", "hash", None)
+        repo.add_user(u)
+        repo.add_review(recipe.id, u.id, 4, f"review {i}")
+
+    first = repo.reviews_for_recipe(recipe.id, limit=2)
+    assert len(first) == 2
+    assert all(r.user is not None for r in first)
+    rest = repo.reviews_for_recipe(recipe.id, cursor=(first[-1].timestamp, first[-1].id), limit=2)
+    assert len(rest) == 1
+    assert {r.id for r in first}.isdisjoint({r.id for r in rest})
+
+def test_repo_add_review_upserts_and_maintains_totals(repo):
+    recipe = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0]
+    a, b = User("upsert_a", "hash", None), User("upsert_b", "hash", None)
+    repo.add_user(a)
+    repo.add_user(b)
+
+    assert repo.add_review(recipe.id, a.id, 2, "meh") is False
+    assert repo.add_review(recipe.id, b.id, 4, "good") is False
+    assert repo.add_review(recipe.id, a.id, 5, "grew on me") is True
+
+    reviews = repo.reviews_for_recipe(recipe.id)
+    assert len(reviews) == 2
+    assert repo.average_rating(recipe.id) == 4.5
+    assert repo.rating_distribution(recipe.id) == {5: 1, 4: 1}
+    assert repo.get_recipe(recipe.id).rating == 4.5
+
+def test_repo_add_review_unknown_recipe_or_user(repo):
+    import pytest
+    recipe = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0]
+    u = User("upsert_missing", "hash", None)
+    repo.add_user(u)
+    with pytest.raises(ValueError):
+        repo.add_review(123456789, u.id, 3, "no such recipe")
+    with pytest.raises(ValueError):
+        repo.add_review(recipe.id, 987654, 3, "no such user")
+    assert repo.reviews_for_recipe(recipe.id) == []
+
+def test_upgrade_schema_fills_rating_totals_from_existing_reviews(engine, tmp_path):
+    from sqlalchemy import create_engine, inspect, text
+    from sqlalchemy.orm import sessionmaker
+    from recipe.adapters import orm
+    from recipe.adapters.database_repository import DatabaseRepository
+
+    # A database created before the recipes table had its running rating totals
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    orm.metadata.create_all(old_engine)
+    with old_engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_reviews_recipe_id"))
+        conn.execute(text("ALTER TABLE recipes DROP COLUMN rating_sum"))
+        conn.execute(text("ALTER TABLE recipes DROP COLUMN rating_count"))
+        conn.execute(text("INSERT INTO authors (id, name) VALUES (1, 'author')"))
+        conn.execute(text("INSERT INTO recipes (id, name, author_id, rating) VALUES"
+                          " (1, 'Apple pie', 1, 5.0), (2, 'Banana bread', 1, 3.0)"))
+        conn.execute(text("INSERT INTO users (id, username, password) VALUES"
+                          " (1, 'ann', 'x'), (2, 'bob', 'x'), (3, 'cat', 'x')"))
+        conn.execute(text("INSERT INTO reviews (user_id, recipe_id, rating, text, timestamp) VALUES"
+                          " (1, 1, 5, 'a', '2024-01-01'), (2, 1, 5, 'b', '2024-01-01'),"
+                          " (1, 2, 3, 'c', '2024-01-01')"))
+
+    orm.upgrade_schema(old_engine)
+    orm.upgrade_schema(old_engine)  # already current: nothing changes
+
+    assert "ix_reviews_recipe_id" in {index["name"] for index in inspect(old_engine).get_indexes("reviews")}
+    old_repo = DatabaseRepository(sessionmaker(bind=old_engine, expire_on_commit=False))
+    assert old_repo.average_rating(1) == 5.0
+    assert old_repo.average_rating(2) == 3.0
+
+    # The next review moves the totals on from the migrated values: 11 / 3 keeps pie ahead
+    assert old_repo.add_review(1, 3, 1, "d") is False
+    assert round(old_repo.average_rating(1), 1) == 3.7
+    ranked = old_repo.get_recipes_by_page(1, 2, sort_by="rating", sort_dir="desc")
+    assert [recipe.id for recipe in ranked] == [1, 2]
+    old_repo.close_session()
+    old_engine.dispose()
+
+
+def test_repo_concurrent_reviews_keep_totals_consistent(repo):
+    from concurrent.futures import ThreadPoolExecutor
+    recipe = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0]
+    users = []
+    for i in range(8):
+        u = User(f"concurrent_reviewer_{i}", "hash", None)
+        repo.add_user(u)
+        users.append(u.id)
+
+    def post(user_id):
+        for rating in (1, 3, 5):  # same user re-rates: one review per user survives
+            repo.add_review(recipe.id, user_id, rating, "changing my mind")
+        repo.close_session()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(post, users))
+
+    assert repo.rating_distribution(recipe.id) == {5: 8}
+    assert repo.average_rating(recipe.id) == 5.0
+
+def test_repo_favourites_are_idempotent(repo):
+    import pytest
+    recipe = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0]
+    u = User("fav_user", "hash", None)
+    repo.add_user(u)
+
+    assert repo.add_favourite(u.id, recipe.id) is True
+    assert repo.add_favourite(u.id, recipe.id) is False
+    assert [r.id for r in repo.favourites_for_user(u.id)] == [recipe.id]
+
+    assert repo.remove_favourite(u.id, recipe.id) is True
+    assert repo.remove_favourite(u.id, recipe.id) is False
+    assert repo.favourites_for_user(u.id) == []
+
+    with pytest.raises(ValueError):
+        repo.add_favourite(u.id, 123456789)
+
+def test_duplicate_favourite_does_not_expire_loaded_recipes(repo):
+    recipe = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0]
+    name = recipe.name
+    u = User("double_submit", "hash", None)
+    repo.add_user(u)
+    loaded = repo.get_recipe(recipe.id)
+
+    repo.add_favourite(u.id, recipe.id)
+    assert repo.add_favourite(u.id, recipe.id) is False  # double submit
+    repo.close_session()
+
+    assert loaded.name == name and loaded.author.name
+
+def test_cached_recipes_survive_a_rollback_of_the_loading_session(repo):
+    from recipe.adapters.caching_repository import CachingRepository
+    from recipe.services.recipe_services import get_daily_picks
+    cached = CachingRepository(repo)
+    recipe_id = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0].id
+
+    name = cached.get_recipe(recipe_id).name
+    page = cached.get_recipes_by_page(1, 3, sort_by="name", sort_dir="asc")
+    picks = get_daily_picks(repo, count=2)
+    repo._session_cm.rollback()  # e.g. a failed write later in the same request
+    repo.close_session()
+
+    assert cached.get_recipe(recipe_id).name == name
+    assert cached.get_recipe(recipe_id).author.name
+    assert all(r.name and r.category.name for r in cached.get_recipes_by_page(1, 3, sort_by="name", sort_dir="asc"))
+    assert [r.id for r in page] == [r.id for r in cached.get_recipes_by_page(1, 3, sort_by="name", sort_dir="asc")]
+    assert all(r.name and r.author.name for r in picks.featured + [picks.recipe_of_the_day])
+
+
+def test_caching_repository_shares_recipes_across_sessions(repo):
+    from concurrent.futures import ThreadPoolExecutor
+    from recipe.adapters.caching_repository import CachingRepository
+    cached = CachingRepository(repo)
+    recipe_id = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0].id
+
+    first = cached.get_recipe(recipe_id)
+    cached.close_session()  # forwarded to DatabaseRepository; the cached recipe is now detached
+
+    def read_in_other_thread():
+        recipe = cached.get_recipe(recipe_id)
+        return recipe is first, recipe.author.name, recipe.category.name, recipe.nutrition.calories
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        same, author, category, _ = pool.submit(read_in_other_thread).result()
+    assert same and author and category
+
+    u = User("cache_reviewer", "hash", None)
+    cached.add_user(u)
+    cached.add_review(recipe_id, u.id, 3, "fine")
+    assert cached.get_recipe(recipe_id).rating == 3.0
+    assert cached.average_rating(recipe_id) == 3.0
+
+
+def test_is_favourite_and_has_reviewed_probes(repo):
+    recipe_id = repo.get_recipes_by_page(page=1, per_page=1)[0].id
+    u = User("prober", "hash", None)
+    repo.add_user(u)
+    assert not repo.is_favourite(u.id, recipe_id)
+    assert not repo.has_reviewed(u.id, recipe_id)
+
+    repo.add_favourite(u.id, recipe_id)
+    repo.add_review(recipe_id, u.id, 2, "meh")
+    assert repo.is_favourite(u.id, recipe_id)
+    assert repo.has_reviewed(u.id, recipe_id)
+
+
+def test_sample_recipes_seeks_random_ids(repo):
+    total = repo.get_total_recipe_count()
+    sample = repo.sample_recipes(5, seed="fixed")
+    assert len(set(r.id for r in sample)) == 5
+    assert all(r.author is not None for r in sample)
+    assert [r.id for r in repo.sample_recipes(5, seed="fixed")] == [r.id for r in sample]
+    assert len(set(r.id for r in repo.sample_recipes(total + 5, seed=1))) == total
+    assert repo.sample_recipes(0) == []
+
+
+def test_hybrid_review_uses_the_average_returned_by_the_write(repo, monkeypatch):
+    from recipe.adapters.hybrid_repository import HybridRepository
+    hybrid = HybridRepository(repo)
+    recipe_id = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0].id
+    users = [User(f"returning{i}", "hash", None) for i in range(2)]
+    for u in users:
+        hybrid.add_user(u)
+
+    def no_extra_reads(*args, **kwargs):
+        raise AssertionError("the rating is returned by the review write")
+    monkeypatch.setattr(repo, "average_rating", no_extra_reads)
+    monkeypatch.setattr(repo, "rating_distribution", no_extra_reads)
+
+    assert repo.add_review_returning_rating(recipe_id, users[0].id, 5, "great") == (False, 5.0)
+    assert hybrid.add_review(recipe_id, users[1].id, 2, "meh") is False
+    assert hybrid.get_recipe(recipe_id).rating == 3.5
+    assert hybrid.add_review(recipe_id, users[1].id, 4, "better on reflection") is True
+    assert hybrid.get_recipe(recipe_id).rating == 4.5
+
+
+def test_hybrid_repository_reads_catalog_from_memory(repo):
+    from recipe.adapters.hybrid_repository import HybridRepository
+    hybrid = HybridRepository(repo)
+    assert hybrid.get_total_recipe_count() == repo.get_total_recipe_count()
+
+    recipe_id = repo.get_recipes_by_page(page=1, per_page=1, sort_by="name", sort_dir="asc")[0].id
+    recipe = hybrid.get_recipe(recipe_id)
+    assert recipe is hybrid.catalog.get_recipe(recipe_id)
+    assert recipe.author.name and recipe.category.name
+
+    page = hybrid.get_recipes_by_page(1, 3, sort_by="name", sort_dir="asc")
+    assert [r.id for r in page] == [r.id for r in repo.get_recipes_by_page(1, 3, sort_by="name", sort_dir="asc")]
+
+    u = User("hybrid_reviewer", "hash", None)
+    hybrid.add_user(u)
+    assert hybrid.get_user_by_username("hybrid_reviewer").id == u.id
+    hybrid.add_review(recipe_id, u.id, 4, "good")
+    assert hybrid.rating_distribution(recipe_id) == {4: 1}
+    assert hybrid.get_recipe(recipe_id).rating == 4.0
+    assert hybrid.get_recipes_by_page(1, 1, sort_by="rating", sort_dir="desc")[0].id == recipe_id
+
+    assert hybrid.add_favourite(u.id, recipe_id)
+    assert hybrid.favourites_for_user(u.id) == [recipe]
+
+
+def test_change_watcher_keeps_worker_caches_coherent(session_factory):
+    from recipe.adapters.caching_repository import CachingRepository
+    from recipe.adapters.change_watcher import ChangeWatcher
+    from recipe.adapters.database_repository import DatabaseRepository
+    from recipe.adapters.hybrid_repository import HybridRepository
+
+    # Two "workers" with their own caches over the same database file
+    engine = session_factory.kw["bind"]
+    writer = CachingRepository(DatabaseRepository(session_factory))
+    reader = CachingRepository(HybridRepository(DatabaseRepository(session_factory)))
+    watcher = ChangeWatcher(engine, reader)
+
+    recipe_id = reader.get_recipes_by_page(1, 1, sort_by="name", sort_dir="asc")[0].id
+    assert reader.average_rating(recipe_id) == 0.0
+    assert watcher.poll() == 0
+
+    u = User("other_worker", "hash", None)
+    writer.add_user(u)
+    writer.add_review(recipe_id, u.id, 5, "great")
+    writer.close_session()
+    assert reader.average_rating(recipe_id) == 0.0  # stale until the next poll
+
+    assert watcher.poll() == 1
+    assert reader.average_rating(recipe_id) == 5.0
+    assert reader.get_recipe(recipe_id).rating == 5.0
+    assert watcher.poll() == 0
+    watcher.close()
+
+
+def test_change_watcher_rereads_sequence_gaps_until_they_expire(session_factory):
+    from recipe.adapters.change_watcher import GAP_TIMEOUT, ChangeWatcher
+    from recipe.adapters.orm import cache_changes_table
+
+    class Listener:
+        def __init__(self):
+            self.changes = []
+
+        def apply_changes(self, changes):
+            self.changes.extend(changes)
+
+    engine = session_factory.kw["bind"]
+    now = [0.0]
+    listener = Listener()
+
+    def commit(seq, key):
+        with engine.begin() as connection:
+            connection.execute(cache_changes_table.insert().values(seq=seq, table_name="recipes", row_key=key))
+
+    with engine.begin() as connection:
+        connection.execute(cache_changes_table.insert().values(table_name="recipes", row_key=0))
+    watcher = ChangeWatcher(engine, listener, clock=lambda: now[0])
+    base = watcher.last_seq
+
+    # seq base+3 commits before base+1 and base+2, as concurrent writers can on PostgreSQL
+    commit(base + 3, 3)
+    assert watcher.poll() == 1
+    assert watcher.last_seq == base + 3
+
+    commit(base + 1, 1)
+    assert watcher.poll() == 1
+    assert listener.changes == [("recipes", 3), ("recipes", 1)]
+
+    # base+2 never commits within the timeout, so a row with that number is no longer looked for
+    now[0] += GAP_TIMEOUT
+    commit(base + 4, 4)
+    assert watcher.poll() == 1
+    commit(base + 2, 2)
+    assert watcher.poll() == 0
+    assert listener.changes == [("recipes", 3), ("recipes", 1), ("recipes", 4)]
+    watcher.close()
+
+
+def test_change_watcher_does_not_hold_its_lock_while_listeners_run(session_factory):
+    import threading
+    from recipe.adapters.change_watcher import ChangeWatcher
+    from recipe.adapters.orm import cache_changes_table
+
+    entered, release = threading.Event(), threading.Event()
+
+    class SlowListener:  # e.g. a hybrid catalog reloading itself
+        def apply_changes(self, changes):
+            entered.set()
+            release.wait(5)
+
+    engine = session_factory.kw["bind"]
+    watcher = ChangeWatcher(engine, SlowListener())
+    with engine.begin() as connection:
+        connection.execute(cache_changes_table.insert().values(table_name="recipes", row_key=1))
+
+    applying = threading.Thread(target=watcher.poll)
+    applying.start()
+    try:
+        assert entered.wait(5)
+        results = []
+        other = threading.Thread(target=lambda: results.append(watcher.poll()))
+        other.start()
+        other.join(2)
+        assert not other.is_alive()
+        assert results == [0]
+    finally:
+        release.set()
+        applying.join()
+    watcher.close()
@@ -0,0 +1,46 @@
+from recipe.timing import RequestTimings, TimedRepository, _current, _time_sql
+
+
+def test_sql_populate_and_repository_time_are_recorded(engine, repo):
+    _time_sql(engine)
+    timed_repo = TimedRepository(repo)
+    assert timed_repo.wrapped is repo
+
+    timed_repo.get_recipes_by_page(1, 5)  # outside a request: nothing to record
+
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        recipes = timed_repo.get_recipes_by_page(1, 5)
+        for recipe in recipes:
+            timed_repo.calculate_health_star_rating(recipe)
+    finally:
+        _current.reset(token)
+
+    assert timings.counts["repo"] == 1 + len(recipes)
+    assert timings.counts["health"] == len(recipes)
+    assert timings.counts["populate"] == 1
+    assert timings.counts["db"] >= 4  # the page, then images, ingredients and instructions
+    assert timings.durations["repo"] >= timings.durations["populate"]
+
+
+def test_sql_outside_repository_calls_is_not_counted_as_view(engine, repo):
+    from sqlalchemy import text
+
+    _time_sql(engine)
+    timed_repo = TimedRepository(repo)
+
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        with engine.connect() as connection:  # as the change watcher polls, before any repository call
+            connection.execute(text("SELECT 1")).all()
+        outside = timings.durations["db"]
+        timed_repo.get_recipes_by_page(1, 5)
+    finally:
+        _current.reset(token)
+
+    assert timings.unattributed_db == outside > 0
+    assert timings.durations["db"] > outside
+    ms = timings.finish()
+    assert ms["view"] <= ms["total"] - ms["repo"] - outside * 1000 + 1e-6
@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_each_thread_gets_its_own_session(repo):
+    barrier = threading.Barrier(4)
+
+    def grab(_):
+        session = repo._session_cm.session()
+        barrier.wait()  # keep all four sessions alive at once
+        return id(session)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        ids = list(pool.map(grab, range(4)))
+    assert len(set(ids)) == 4
+
+
+def test_reset_in_one_thread_leaves_other_threads_alone(repo):
+    held = threading.Event()
+    reset_done = threading.Event()
+    result = {}
+
+    def reader():
+        session = repo._session_cm.session()
+        held.set()
+        reset_done.wait(timeout=5)
+        result["same_session"] = repo._session_cm.session() is session
+        result["count"] = repo.get_total_recipe_count()
+
+    def resetter():
+        held.wait(timeout=5)
+        repo.reset_session()
+        repo.close_session()
+        reset_done.set()
+
+    threads = [threading.Thread(target=reader), threading.Thread(target=resetter)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert result["same_session"] is True
+    assert result["count"] > 0
+
+
+def test_reset_starts_a_fresh_session_for_the_caller(repo):
+    before = repo._session_cm.session()
+    repo.reset_session()
+    after = repo._session_cm.session()
+    assert before is not after
+    assert repo.get_total_recipe_count() > 0
@@ -0,0 +1,83 @@
+import gzip
+import json
+
+from flask import Flask, render_template_string
+
+from recipe.assets import IMMUTABLE_MAX_AGE, build, init_static, load_manifest
+
+CSS = "body { color: red; }\n" * 100
+
+
+def _static_app(static_folder, **config):
+    app = Flask(__name__, static_folder=str(static_folder), static_url_path="/static")
+    app.config.update(config)
+    init_static(app)
+    return app
+
+
+def _write_css(folder, css=CSS):
+    (folder / "css").mkdir(exist_ok=True)
+    (folder / "css" / "site.css").write_text(css)
+
+
+def test_build_writes_fingerprinted_copies_and_manifest(tmp_path):
+    _write_css(tmp_path)
+    manifest = build(str(tmp_path))
+
+    target = manifest["css/site.css"]
+    assert target.startswith("css/site.") and target.endswith(".css") and target != "css/site.css"
+    assert (tmp_path / target).read_text() == CSS
+    assert (tmp_path / (target + ".gz")).exists()
+    assert json.loads((tmp_path / "manifest.json").read_text()) == manifest
+
+    # Rebuilding leaves the manifest stable and does not fingerprint build outputs
+    assert build(str(tmp_path)) == manifest
+
+    # Changed content gets a new name; the old copy stays for pages already rendered
+    _write_css(tmp_path, CSS + "p { margin: 0; }\n")
+    rebuilt = build(str(tmp_path))
+    assert rebuilt["css/site.css"] != target
+    assert (tmp_path / target).exists()
+
+
+def test_url_for_links_fingerprinted_name_served_immutable(tmp_path):
+    _write_css(tmp_path)
+    target = build(str(tmp_path))["css/site.css"]
+    app = _static_app(tmp_path)
+    client = app.test_client()
+
+    with app.test_request_context():
+        url = render_template_string("{{ url_for('static', filename='css/site.css') }}")
+    assert url == f"/static/{target}"
+
+    r = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(r.data).decode() == CSS
+    assert r.cache_control.immutable and r.cache_control.public
+    assert r.cache_control.max_age == IMMUTABLE_MAX_AGE
+    r.close()
+
+    # The unversioned name still works but is not cached for long
+    r = client.get("/static/css/site.css")
+    assert r.get_data(as_text=True) == CSS
+    assert not r.cache_control.immutable
+    r.close()
+
+
+def test_without_manifest_or_disabled_links_plain_names(tmp_path):
+    _write_css(tmp_path)
+    app = _static_app(tmp_path)
+    with app.test_request_context():
+        assert render_template_string("{{ url_for('static', filename='css/site.css') }}") == "/static/css/site.css"
+
+    build(str(tmp_path))
+    app = _static_app(tmp_path, STATIC_FINGERPRINTS=False)
+    with app.test_request_context():
+        assert render_template_string("{{ url_for('static', filename='css/site.css') }}") == "/static/css/site.css"
+
+
+def test_manifest_entries_without_files_are_ignored(tmp_path):
+    _write_css(tmp_path)
+    target = build(str(tmp_path))["css/site.css"]
+    (tmp_path / target).unlink()
+    assert load_manifest(str(tmp_path)) == {}
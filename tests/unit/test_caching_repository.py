@@ -0,0 +1,130 @@
+import pytest
+
+from recipe.adapters.caching_repository import CachingRepository, CachePolicy
+from recipe.adapters.memory_repository import MemoryRepository
+from recipe.domainmodel.author import Author
+from recipe.domainmodel.category import Category
+from recipe.domainmodel.recipe import Recipe
+from recipe.domainmodel.user import User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingRepository(MemoryRepository):
+    def __init__(self):
+        super().__init__()
+        self.calls = {}
+
+    def get_recipe(self, recipe_id):
+        self.calls["get_recipe"] = self.calls.get("get_recipe", 0) + 1
+        return super().get_recipe(recipe_id)
+
+    def average_rating(self, recipe_id):
+        self.calls["average_rating"] = self.calls.get("average_rating", 0) + 1
+        return super().average_rating(recipe_id)
+
+
+@pytest.fixture
+def backend():
+    repo = CountingRepository()
+    author, category = Author(1, "Chef"), Category("Mains", [], 1)
+    for recipe_id in (1, 2, 3):
+        repo.add_recipe(Recipe(recipe_id, f"Recipe {recipe_id}", author, category=category))
+    repo.add_user(User("reviewer", "hash"))
+    return repo
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_repeated_reads_are_served_from_cache(backend, clock):
+    repo = CachingRepository(backend, clock=clock)
+
+    assert repo.get_recipe(1) is repo.get_recipe(1)
+    assert repo.get_recipe(404) is None and repo.get_recipe(404) is None
+
+    assert backend.calls["get_recipe"] == 2
+    assert repo.cache_stats()["get_recipe"]["hits"] == 2
+    assert repo.cache_stats()["get_recipe"]["misses"] == 2
+
+
+def test_lru_size_limit_and_ttl(backend, clock):
+    repo = CachingRepository(backend, {"get_recipe": CachePolicy(maxsize=2, ttl=10)}, clock=clock)
+
+    repo.get_recipe(1)
+    repo.get_recipe(2)
+    repo.get_recipe(1)          # 1 becomes most recently used
+    repo.get_recipe(3)          # evicts 2
+    assert repo.cache_stats()["get_recipe"]["size"] == 2
+    repo.get_recipe(2)
+    assert backend.calls["get_recipe"] == 4
+
+    clock.now = 11
+    repo.get_recipe(2)
+    assert backend.calls["get_recipe"] == 5
+
+
+def test_disabled_policy_never_stores(backend, clock):
+    repo = CachingRepository(backend, {"get_recipe": CachePolicy(maxsize=0)}, clock=clock)
+    repo.get_recipe(1)
+    repo.get_recipe(1)
+    assert backend.calls["get_recipe"] == 2
+
+
+def test_review_invalidates_rating_caches(backend, clock):
+    repo = CachingRepository(backend, clock=clock)
+    user = repo.get_user_by_username("reviewer")  # forwarded to the wrapped repository
+
+    assert repo.average_rating(1) == 0.0
+    assert repo.rating_distribution(1) == {}
+    repo.add_review(1, user.id, 4, "Good")
+
+    assert repo.average_rating(1) == 4.0
+    assert repo.average_rating(1) == 4.0
+    assert repo.rating_distribution(1) == {4: 1}
+    stats = repo.cache_stats()["average_rating"]
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_health_scores_of_recipes_without_an_id_are_not_shared(backend, clock):
+    from recipe.domainmodel.nutrition import Nutrition
+
+    repo = CachingRepository(backend, clock=clock)
+    lean = Recipe(10, "Lean", Author(1, "Chef"), nutrition=Nutrition(1, 100, 1, 1, 0, 0, 0, 6, 0, 20))
+    rich = Recipe(11, "Rich", Author(1, "Chef"), nutrition=Nutrition(2, 900, 50, 20, 0, 0, 0, 0, 0, 1))
+    for unsaved in (lean, rich):
+        unsaved._Recipe__id = None  # as a database recipe is before its first flush
+
+    assert repo.calculate_health_star_rating(lean) == 5.0
+    assert repo.calculate_health_star_rating(rich) == 0.0
+    assert repo.cache_stats()["calculate_health_star_rating"]["size"] == 0
+
+
+def test_add_recipe_clears_catalog_caches(backend, clock):
+    repo = CachingRepository(backend, clock=clock)
+    assert repo.get_total_recipe_count() == 3
+    repo.add_recipe(Recipe(4, "Recipe 4", Author(1, "Chef")))
+    assert repo.get_total_recipe_count() == 4
+    assert repo.distinct_values("name", "recipe 4") == ["Recipe 4"]
+
+
+def test_apply_changes_from_other_workers(backend, clock):
+    repo = CachingRepository(backend, clock=clock)
+    repo.get_recipe(1)
+    repo.get_recipe(2)
+    assert repo.get_total_recipe_count() == 3
+
+    repo.apply_changes([("reviews", 1), ("favourites", 1)])
+    assert repo.cache_stats()["get_recipe"]["size"] == 1
+    assert repo.cache_stats()["get_total_recipe_count"]["size"] == 1
+
+    repo.apply_changes([("*", None)])
+    assert all(stats["size"] == 0 for stats in repo.cache_stats().values())
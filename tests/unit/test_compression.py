@@ -0,0 +1,80 @@
+import gzip
+import zlib
+
+from flask import Flask, jsonify
+
+from recipe.assets import init_static, precompress
+from recipe.compression import CompressionMiddleware, negotiate_encoding
+
+PAGE = "<p>" + "recipe " * 200 + "</p>"
+
+
+def _app(static_folder=None):
+    app = Flask(__name__, static_folder=static_folder, static_url_path="/static")
+
+    @app.route("/page")
+    def page():
+        return PAGE
+
+    @app.route("/tiny")
+    def tiny():
+        return "<p>hi</p>"
+
+    @app.route("/json")
+    def json():
+        return jsonify(["x" * 1000])
+
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, min_size=500)
+    return app
+
+
+def test_negotiate_encoding_honours_q_values():
+    assert negotiate_encoding("gzip, deflate, br") == "gzip"
+    assert negotiate_encoding("deflate") == "deflate"
+    assert negotiate_encoding("gzip;q=0, deflate") == "deflate"
+    assert negotiate_encoding("br") is None
+    assert negotiate_encoding("") is None
+
+
+def test_compresses_large_text_responses():
+    client = _app().test_client()
+
+    r = client.get("/page", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert gzip.decompress(r.data).decode() == PAGE
+    assert int(r.headers["Content-Length"]) == len(r.data)
+
+    r = client.get("/json", headers={"Accept-Encoding": "deflate"})
+    assert r.headers["Content-Encoding"] == "deflate"
+    assert zlib.decompress(r.data).startswith(b'["xxx')
+
+
+def test_small_or_unaccepted_responses_pass_through():
+    client = _app().test_client()
+    r = client.get("/tiny", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in r.headers and r.data == b"<p>hi</p>"
+    r = client.get("/page")
+    assert "Content-Encoding" not in r.headers and r.get_data(as_text=True) == PAGE
+
+
+def test_precompressed_static_files(tmp_path):
+    (tmp_path / "css").mkdir()
+    css = "body { color: red; }\n" * 100
+    (tmp_path / "css" / "site.css").write_text(css)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + b"\0" * 600)
+    assert precompress(str(tmp_path)) == ["css/site.css"]
+
+    app = _app(static_folder=str(tmp_path))
+    init_static(app)
+    client = app.test_client()
+
+    r = client.get("/static/css/site.css", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert r.mimetype == "text/css"
+    assert gzip.decompress(r.data).decode() == css
+    r.close()
+
+    r = client.get("/static/css/site.css")
+    assert "Content-Encoding" not in r.headers and r.get_data(as_text=True) == css
+    r.close()
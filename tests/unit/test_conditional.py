@@ -0,0 +1,31 @@
+from recipe.conditional import ContentVersions
+
+
+def test_workers_sharing_a_change_log_agree_on_versions():
+    seq = [10]
+    first = ContentVersions("rel", lambda: seq[0])
+    seq[0] = 12
+    second = ContentVersions("rel", lambda: seq[0])  # started later
+
+    seq[0] = 13
+    for worker in (first, second):
+        worker.apply_changes([("reviews", 5)])
+    assert first.recipe(5) == second.recipe(5)
+    assert first.recipe(6) != second.recipe(6)  # different baselines: a miss, never a wrong 304
+    assert first.options() != second.options()
+
+    seq[0] = 14
+    before = second.options()
+    second.apply_changes([("recipes", 99)])
+    assert second.options() != before
+
+
+def test_memory_mode_versions_are_scoped_to_the_process():
+    a, b = ContentVersions("rel"), ContentVersions("rel")
+    assert a.recipe(1) != b.recipe(1)
+
+    before = a.recipe(1)
+    a.apply_changes([("reviews", 2)])
+    assert a.recipe(1) == before
+    a.apply_changes([("reviews", 1)])
+    assert a.recipe(1) != before
@@ -31,4 +31,53 @@ def test_get_create_category():
     cat2 = reader._get_create_category("Italian")  # Same name
 
     assert cat1 == cat2  # Should return same category
-    assert cat1.name == "Italian"
\ No newline at end of file
+    assert cat1.name == "Italian"
+
+def test_memory_mode_compacts_images_and_interns_strings():
+    from pathlib import Path
+    csv_path = Path(__file__).parents[1] / "tests_db" / "data" / "recipes-excerpt.csv"
+
+    memory_reader = CSVDataReader(str(csv_path))
+    memory_reader.read_csv_file()
+    database_reader = CSVDataReader(str(csv_path), database_mode=True)
+    database_reader.read_csv_file()
+
+    for compact, plain in zip(memory_reader.recipes, database_reader.recipes):
+        assert isinstance(compact.images, list)
+        assert compact.images == plain.images
+
+    # Helper rows are only built for the database populate step
+    assert memory_reader.recipe_images == []
+    assert database_reader.recipe_images
+
+    ingredients = [i for r in memory_reader.recipes for i in r.ingredients]
+    by_value = {}
+    for ingredient in ingredients:
+        assert by_value.setdefault(ingredient, ingredient) is ingredient
+
+
+def test_lazy_details_match_eager_reader_and_cache_is_bounded():
+    from pathlib import Path
+    from recipe.adapters.datareader.csvrowstore import CSVRowStore
+    csv_path = Path(__file__).parents[1] / "tests_db" / "data" / "recipes-excerpt.csv"
+
+    eager = CSVDataReader(str(csv_path))
+    eager.read_csv_file()
+    lazy = CSVDataReader(str(csv_path), lazy_details=True)
+    lazy.read_csv_file()
+
+    assert [r.id for r in lazy.recipes] == [r.id for r in eager.recipes]
+    for lazy_recipe, eager_recipe in zip(lazy.recipes, eager.recipes):
+        assert lazy_recipe.thumbnail == eager_recipe.thumbnail
+        assert lazy_recipe.ingredients == eager_recipe.ingredients
+        assert lazy_recipe.images == eager_recipe.images
+        assert lazy_recipe.instructions == eager_recipe.instructions
+        assert lazy_recipe.ingredient_quantities == eager_recipe.ingredient_quantities
+
+    store = CSVRowStore(str(csv_path), cache_size=2)
+    offsets = [offset for offset, _ in store.iter_rows()]
+    for offset in offsets:
+        store.details(offset)
+    store.details(offsets[-1])
+    assert store.cache_info == {"hits": 1, "misses": len(offsets), "size": 2}
+    assert store.row_at(offsets[0])["RecipeId"] == str(eager.recipes[0].id)
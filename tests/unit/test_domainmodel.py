@@ -125,6 +125,14 @@ def test_author_add_duplicate_recipe(my_author, my_recipe):
 
 
 
+def test_recipe_reviews_allocated_on_first_review(my_user, my_recipe):
+    assert my_recipe.reviews == []
+    review = Review(1, my_user, my_recipe, datetime(2024, 1, 2), 4, "Nice")
+    my_recipe.add_review(review)
+    assert review in my_recipe.reviews
+    assert my_recipe.rating == 4
+
+
 # Category tests
 def test_category_construction():
     category = Category("Desserts", [], 1)
@@ -328,3 +336,20 @@ def test_review_hash(my_user, my_recipe):
     r2 = Review(1, my_user, my_recipe, ts, 4, "Ok")
     review_set = {r1, r2}
     assert len(review_set) == 1
+
+
+def test_compact_image_urls_round_trip():
+    from recipe.domainmodel.image_urls import CompactImageUrls
+    urls = [
+        "https://img.sndimg.com/food/image/upload/w_555,h_416,c_fit/v1/img/recipes/38/YUeirxMLQaeE1h3v3qnM_229%20berry%20blue%20frzn%20dess.jpg",
+        "https://img.sndimg.com/food/image/upload/v1/img/feed/5170/pic.jpg",
+        "not-a-url.jpg",
+    ]
+    compact = CompactImageUrls(urls)
+    assert list(compact) == urls
+    assert compact[1] == urls[1] and compact[-1] == urls[-1]
+    assert compact[:2] == urls[:2]
+    assert len(compact) == 3
+
+    recipe = Recipe(5, "Berry dessert", Author(1, "Chef"), images=compact)
+    assert recipe.images == urls
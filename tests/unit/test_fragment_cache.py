@@ -0,0 +1,40 @@
+from jinja2 import Environment
+
+from recipe.fragment_cache import FragmentCache, FragmentCacheExtension
+
+
+def _environment(maxsize=16):
+    env = Environment(extensions=[FragmentCacheExtension], autoescape=True)
+    env.fragment_cache = FragmentCache(maxsize)
+    return env
+
+
+def test_fragment_rendered_once_per_key():
+    env = _environment()
+    template = env.from_string('{% cache "card", r.id %}<b>{{ r.name }}</b>{% endcache %}')
+
+    assert template.render(r={"id": 1, "name": "Pie & Mash"}) == "<b>Pie &amp; Mash</b>"
+    # Same key: the cached HTML is reused even though the (unkeyed) name changed
+    assert template.render(r={"id": 1, "name": "Other"}) == "<b>Pie &amp; Mash</b>"
+    assert template.render(r={"id": 2, "name": "Soup"}) == "<b>Soup</b>"
+    assert env.fragment_cache.stats()["hits"] == 1
+
+
+def test_catalog_change_bumps_generation():
+    env = _environment()
+    template = env.from_string('{% cache "card", r.id %}{{ r.name }}{% endcache %}')
+    template.render(r={"id": 1, "name": "Old"})
+
+    env.fragment_cache.apply_changes([("reviews", 1)])
+    assert template.render(r={"id": 1, "name": "New"}) == "Old"
+
+    env.fragment_cache.apply_changes([("recipes", 7)])
+    assert env.fragment_cache.generation == 1
+    assert template.render(r={"id": 1, "name": "New"}) == "New"
+
+
+def test_zero_size_disables_caching():
+    env = _environment(maxsize=0)
+    template = env.from_string('{% cache "card", 1 %}{{ name }}{% endcache %}')
+    assert template.render(name="a") == "a"
+    assert template.render(name="b") == "b"
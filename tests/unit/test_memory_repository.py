@@ -139,6 +139,24 @@ def test_get_all_recipes_sorted(repository, sample_author, sample_category):
     assert all_recipes[2] == recipe3
 
 
+def test_sort_order_racing_a_write_is_not_kept(repository, sample_author, sample_category, monkeypatch):
+    import recipe.adapters.memory_repository as memory_repository
+    for i in range(1, 4):
+        repository.add_recipe(Recipe(i, f"Recipe {i:02d}", sample_author, category=sample_category))
+
+    sort_recipes = memory_repository._sort_recipes
+
+    def sort_while_a_recipe_is_added(recipes, sort_by, sort_dir):
+        # Another thread adds a recipe after this reader took its snapshot
+        monkeypatch.setattr(memory_repository, "_sort_recipes", sort_recipes)
+        repository.add_recipe(Recipe(4, "Recipe 04", sample_author, category=sample_category))
+        return sort_recipes(recipes, sort_by, sort_dir)
+
+    monkeypatch.setattr(memory_repository, "_sort_recipes", sort_while_a_recipe_is_added)
+    assert [r.id for r in repository.get_recipes_by_page(1, 10, sort_by="name")] == [1, 2, 3]
+    assert [r.id for r in repository.get_recipes_by_page(1, 10, sort_by="name")] == [1, 2, 3, 4]
+
+
 def test_get_recipes_by_page_first_page(repository, sample_author, sample_category):
     for i in range(1, 6):
         recipe = Recipe(i, f"Recipe {i:02d}", sample_author, category=sample_category)
@@ -184,6 +202,37 @@ def test_get_recipes_by_page_empty_repository(repository):
     assert len(page1_recipes) == 0
 
 
+def test_get_recipes_by_page_sorted(repository, sample_author, sample_category):
+    for i, name in enumerate(["banana", "Apple", "cherry"], start=1):
+        repository.add_recipe(Recipe(i, name, sample_author, category=sample_category))
+
+    assert [r.name for r in repository.get_recipes_by_page(1, 3, sort_by="name")] == ["Apple", "banana", "cherry"]
+    assert [r.name for r in repository.get_recipes_by_page(1, 2, sort_by="name", sort_dir="desc")] == ["cherry", "banana"]
+
+
+def test_sample_recipes(repository, sample_author, sample_category):
+    for i in range(1, 21):
+        repository.add_recipe(Recipe(i, f"Recipe {i}", sample_author, category=sample_category))
+
+    sample = repository.sample_recipes(5, seed="fixed")
+    assert len(set(r.id for r in sample)) == 5
+    assert [r.id for r in repository.sample_recipes(5, seed="fixed")] == [r.id for r in sample]
+    assert len(repository.sample_recipes(50)) == 20
+    assert MemoryRepository().sample_recipes(3) == []
+
+
+def test_update_rating_resorts_by_rating(repository, sample_author, sample_category):
+    for i in range(1, 4):
+        repository.add_recipe(Recipe(i, f"Recipe {i}", sample_author, category=sample_category))
+    repository.update_rating(1, 2.0)
+    repository.update_rating(3, 4.5)
+    assert [r.id for r in repository.get_recipes_by_page(1, 2, sort_by="rating", sort_dir="desc")] == [3, 1]
+
+    repository.update_rating(1, 5.0)
+    assert repository.get_recipe(1).rating == 5.0
+    assert [r.id for r in repository.get_recipes_by_page(1, 2, sort_by="rating", sort_dir="desc")] == [1, 3]
+
+
 def test_get_total_recipe_count_empty(repository):
     assert repository.get_total_recipe_count() == 0
 
@@ -210,6 +259,7 @@ def test_add_and_retrieve_recipe(repository, sample_author, sample_category):
 
 def test_add_favourite(repository, sample_recipe):
     user_id = 1
+    repository.add_user(MockUser(user_id=user_id, username="testuser", name="Test User"))
     repository.add_recipe(sample_recipe)
 
     repository.add_favourite(user_id, sample_recipe.id)
@@ -220,8 +270,30 @@ def test_add_favourite(repository, sample_recipe):
     assert sample_recipe.id in [recipe.id for recipe in favourites]
 
 
+def test_add_favourite_rejects_unknown_user(repository, sample_recipe):
+    repository.add_recipe(sample_recipe)
+
+    with pytest.raises(ValueError):
+        repository.add_favourite(99, sample_recipe.id)
+    assert repository.favourites_for_user(99) == []
+
+
+def test_is_favourite_and_has_reviewed(repository, sample_recipe):
+    repository.add_user(MockUser(user_id=1, username="testuser", name="Test User"))
+    repository.add_recipe(sample_recipe)
+    assert not repository.is_favourite(1, sample_recipe.id)
+    assert not repository.has_reviewed(1, sample_recipe.id)
+
+    repository.add_favourite(1, sample_recipe.id)
+    repository.add_review(sample_recipe.id, 1, 5, "Lovely")
+    assert repository.is_favourite(1, sample_recipe.id)
+    assert repository.has_reviewed(1, sample_recipe.id)
+    assert not repository.has_reviewed(2, sample_recipe.id)
+
+
 def test_remove_favourite(repository, sample_recipe):
     user_id = 1
+    repository.add_user(MockUser(user_id=user_id, username="testuser", name="Test User"))
     repository.add_recipe(sample_recipe)
 
     repository.add_favourite(user_id, sample_recipe.id)
@@ -313,3 +385,124 @@ def test_calculate_health_star_rating_missing_nutrition(repository, sample_recip
     health_star = repository.calculate_health_star_rating(sample_recipe)
 
     assert health_star == "Health star rating unavailable"
+
+
+def test_rating_distribution(repository, sample_recipe):
+    for user_id, rating in [(1, 5), (2, 5), (3, 2)]:
+        repository.add_user(MockUser(user_id=user_id, username=f"user{user_id}", name="User"))
+        repository.add_recipe(sample_recipe)
+        repository.add_review(sample_recipe.id, user_id, rating, "Rated it!")
+
+    assert repository.rating_distribution(sample_recipe.id) == {5: 2, 2: 1}
+    assert repository.rating_distribution(999) == {}
+
+
+def test_add_review_upserts(repository, sample_recipe):
+    repository.add_user(MockUser(user_id=1, username="testuser", name="Test User"))
+    repository.add_recipe(sample_recipe)
+
+    assert repository.add_review(sample_recipe.id, 1, 2, "Not for me") is False
+    assert repository.add_review(sample_recipe.id, 1, 5, "Actually great") is True
+
+    reviews = repository.reviews_for_recipe(sample_recipe.id)
+    assert len(reviews) == 1
+    assert reviews[0].rating == 5 and reviews[0].text == "Actually great"
+    assert repository.rating_distribution(sample_recipe.id) == {5: 1}
+    assert repository.average_rating(sample_recipe.id) == 5.0
+    assert sample_recipe.rating == 5.0
+
+
+def test_add_review_unknown_recipe(repository):
+    repository.add_user(MockUser(user_id=1, username="testuser", name="Test User"))
+    with pytest.raises(ValueError):
+        repository.add_review(42, 1, 3, "Where is it?")
+
+
+def test_concurrent_readers_and_writers(repository, sample_recipe):
+    import threading
+
+    repository.add_recipe(sample_recipe)
+    users = [MockUser(user_id=None, username=f"user{i}", name="User") for i in range(16)]
+    errors = []
+    done = threading.Event()
+
+    def writer(user):
+        try:
+            repository.add_user(user)
+            for rating in (1, 3, 5):
+                repository.add_review(sample_recipe.id, user.id, rating, "Again")
+            repository.add_favourite(user.id, sample_recipe.id)
+        except Exception as exc:  # pragma: no cover - surfaced by the assertion below
+            errors.append(exc)
+
+    def reader():
+        try:
+            while not done.is_set():
+                reviews = repository.reviews_for_recipe(sample_recipe.id)
+                assert len({r.id for r in reviews}) == len(reviews)
+                assert sum(repository.rating_distribution(sample_recipe.id).values()) >= 0
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    writers = [threading.Thread(target=writer, args=(u,)) for u in users]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    done.set()
+    for t in readers:
+        t.join()
+
+    assert not errors
+    assert len({u.id for u in users}) == len(users)
+    assert len(repository.reviews_for_recipe(sample_recipe.id)) == len(users)
+    assert repository.rating_distribution(sample_recipe.id) == {5: len(users)}
+    assert all(repository.favourites_for_user(u.id) == [sample_recipe] for u in users)
+
+
+def test_freeze_catalog_moves_objects_to_permanent_generation():
+    import gc
+    from recipe.adapters.memory_repository import freeze_catalog
+
+    repo = MemoryRepository()
+    populate(repo)
+    try:
+        freeze_catalog()
+        assert gc.get_freeze_count() > repo.get_total_recipe_count()
+    finally:
+        gc.unfreeze()
+
+
+_ACYCLIC_CATALOG_CHECK = """
+import gc
+from recipe.adapters.datareader.csvdatareader import CSVDataReader
+from recipe.adapters.memory_repository import MemoryRepository
+
+reader = CSVDataReader("tests/tests_db/data/recipes-excerpt.csv")
+reader.read_csv_file()
+repo = MemoryRepository()
+for recipe in reader.recipes:
+    repo.add_recipe(recipe)
+
+some_recipe = reader.recipes[0]
+assert reader.authors[0].recipes == []
+assert repo.search_recipes("", "", some_recipe.author.name, "")[0].author == some_recipe.author
+assert some_recipe in repo.search_recipes("", some_recipe.category.name, "", "")
+
+gc.collect()
+del reader, repo, some_recipe
+assert gc.collect() == 0
+"""
+
+
+def test_catalog_graph_is_acyclic():
+    # In a fresh interpreter: once another test has mapped the ORM (as the database and e2e
+    # tests do), its relationships add back-references that memory mode never has
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    result = subprocess.run([sys.executable, "-c", _ACYCLIC_CATALOG_CHECK], cwd=Path(__file__).parents[2],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
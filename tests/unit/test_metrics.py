@@ -0,0 +1,54 @@
+import json
+import os
+
+from recipe.metrics import Family, MetricsRegistry, MultiProcessStore, merge, render
+
+
+def _registry():
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Requests.", ["endpoint"])
+    latency = registry.histogram("app_latency_seconds", "Latency.", ["endpoint"], buckets=(0.1, 1.0))
+    registry.add_collector(lambda: [Family("app_items", "gauge", "Items.").add(value=7)], gauges_only=True)
+    return registry, requests, latency
+
+
+def test_render_counters_histograms_and_gauges():
+    registry, requests, latency = _registry()
+    requests.inc("home.index")
+    requests.inc("home.index")
+    requests.inc('odd"name')
+    for seconds in (0.05, 0.5, 3.0):
+        latency.observe("home.index", value=seconds)
+
+    text = render(merge([registry.snapshot()]))
+    assert "# TYPE app_requests_total counter" in text
+    assert 'app_requests_total{endpoint="home.index"} 2' in text
+    assert 'app_requests_total{endpoint="odd\\"name"} 1' in text
+    assert 'app_latency_seconds_bucket{endpoint="home.index",le="0.1"} 1' in text
+    assert 'app_latency_seconds_bucket{endpoint="home.index",le="1.0"} 2' in text
+    assert 'app_latency_seconds_bucket{endpoint="home.index",le="+Inf"} 3' in text
+    assert 'app_latency_seconds_count{endpoint="home.index"} 3' in text
+    assert 'app_latency_seconds_sum{endpoint="home.index"} 3.55' in text
+    assert "# TYPE app_items gauge\napp_items 7" in text
+
+
+def test_workers_are_summed_through_the_shared_directory(tmp_path):
+    other, other_requests, other_latency = _registry()
+    other_requests.inc("home.index", amount=5)
+    other_latency.observe("home.index", value=0.2)
+    # another worker's file, as MultiProcessStore.write would leave it
+    snapshot = other.snapshot(include_gauges=False)
+    assert "app_items" not in snapshot
+    (tmp_path / "metrics-999999.json").write_text(json.dumps(snapshot))
+
+    registry, requests, latency = _registry()
+    requests.inc("home.index")
+    latency.observe("home.index", value=0.2)
+    store = MultiProcessStore(str(tmp_path))
+    store.write(registry.snapshot(include_gauges=False))
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
+
+    text = render(merge([registry.snapshot()] + store.read_others()))
+    assert 'app_requests_total{endpoint="home.index"} 6' in text
+    assert 'app_latency_seconds_count{endpoint="home.index"} 2' in text
+    assert "app_items 7" in text  # gauges only from the answering worker
@@ -7,6 +7,7 @@ from recipe.adapters.memory_repository import MemoryRepository
 from recipe.domainmodel.recipe import Recipe
 from recipe.domainmodel.author import Author
 from recipe.domainmodel.category import Category
+from recipe.domainmodel.user import User
 
 
 # Fixtures
@@ -95,6 +96,48 @@ def test_get_recipe_of_the_day_empty_repository(empty_repository):
     assert recipe_of_day is None
 
 
+def test_daily_picks_cached_per_day_without_loading_catalog(populated_repository, monkeypatch):
+    import datetime
+    import random
+    from recipe.services.recipe_services import get_daily_picks
+
+    def fail(*args, **kwargs):
+        raise AssertionError("daily picks must not load the whole catalog")
+    monkeypatch.setattr(populated_repository, "get_all_recipes", fail)
+
+    state = random.getstate()
+    monday, tuesday = datetime.date(2024, 1, 1), datetime.date(2024, 1, 2)
+    picks = get_daily_picks(populated_repository, count=3, today=monday)
+    assert random.getstate() == state
+    assert len(set(r.id for r in picks.featured)) == 3
+    assert picks.recipe_of_the_day is not None
+    assert get_daily_picks(populated_repository, count=3, today=monday) is picks
+    assert get_daily_picks(populated_repository, count=3, today=tuesday).day == tuesday
+
+
+def test_recipe_detail_view_cached_until_review(populated_repository):
+    from recipe.domainmodel.user import User
+    from recipe.services.recipe_services import RecipeDetailViewCache
+
+    views = RecipeDetailViewCache()
+    view = views.get(populated_repository, 1)
+    assert view.recipe["name"] == "Apple Pie"
+    assert view.review_stats["total_reviews"] == 0
+    assert views.get(populated_repository, 1) is view
+    assert views.get(populated_repository, 999) is None
+    # plain data, not shared with the recipe object
+    recipe = populated_repository.get_recipe(1)
+    assert view.recipe["ingredients"] == recipe.ingredients
+    assert view.recipe["ingredients"] is not recipe.ingredients
+
+    populated_repository.add_user(User("viewer", "hash", 1))
+    populated_repository.add_review(1, 1, 5, "Lovely pie")
+    views.apply_changes([("reviews", 1)])
+    refreshed = views.get(populated_repository, 1)
+    assert refreshed.review_stats["total_reviews"] == 1
+    assert refreshed.review_page["reviews"][0]["comment"] == "Lovely pie"
+
+
 # Browse services tests
 def test_get_recipes_by_page_first_page(populated_repository):
     recipes, total_pages, total_recipes = get_recipes_by_page(populated_repository, page=1, per_page=3)
@@ -125,4 +168,86 @@ def test_get_recipes_by_page_empty_repository(empty_repository):
 
     assert len(recipes) == 0
     assert total_pages == 1
-    assert total_recipes == 0
\ No newline at end of file
+    assert total_recipes == 0
+
+# Review services tests
+def test_get_review_stats_uses_distribution(populated_repository):
+    from recipe.domainmodel.user import User
+    from recipe.services.reviews_services import get_review_stats
+
+    for name, rating in [("ann", 5), ("bob", 4), ("cat", 4)]:
+        user = User(name, "hash")
+        populated_repository.add_user(user)
+        populated_repository.add_review(1, user.id, rating, "Tasty enough")
+
+    stats = get_review_stats(1, populated_repository)
+    assert stats["total_reviews"] == 3
+    assert stats["average_rating"] == pytest.approx(13 / 3)
+    assert stats["rating_distribution"] == {5: 1, 4: 2, 3: 0, 2: 0, 1: 0}
+
+
+def test_get_review_stats_no_reviews(populated_repository):
+    from recipe.services.reviews_services import get_review_stats
+
+    stats = get_review_stats(2, populated_repository)
+    assert stats["total_reviews"] == 0
+    assert stats["average_rating"] == 0.0
+
+
+def test_get_reviews_page_walks_all_reviews_once(populated_repository):
+    from recipe.domainmodel.user import User
+    from recipe.services.reviews_services import get_reviews_page
+
+    for i in range(5):
+        user = User(f"pager{i}", "hash")
+        populated_repository.add_user(user)
+        populated_repository.add_review(3, user.id, 1 + i % 5, f"Review number {i}")
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = get_reviews_page(3, populated_repository, cursor=cursor, limit=2)
+        assert len(page) <= 2
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 5
+    assert len({r.id for r in seen}) == 5
+    assert [(r.timestamp, r.id) for r in seen] == sorted(((r.timestamp, r.id) for r in seen), reverse=True)
+
+
+def test_get_reviews_page_rejects_bad_cursor(populated_repository):
+    from recipe.services.reviews_services import get_reviews_page
+
+    with pytest.raises(ValueError):
+        get_reviews_page(1, populated_repository, cursor="not-a-cursor")
+
+
+# Favourites services tests
+def test_toggle_favourite(populated_repository):
+    from recipe.services.favourites_services import toggle_favourite
+
+    populated_repository.add_user(User("toggler", "hash", 7))
+    assert toggle_favourite(7, 1, populated_repository) is True
+    assert toggle_favourite(7, 1, populated_repository) is False
+    assert toggle_favourite(7, 1, populated_repository, favourite=True) is True
+    assert toggle_favourite(7, 1, populated_repository, favourite=True) is True
+    assert [r.id for r in populated_repository.favourites_for_user(7)] == [1]
+    assert toggle_favourite(7, 1, populated_repository, favourite=False) is False
+    assert populated_repository.favourites_for_user(7) == []
+
+
+def test_add_favourite_unknown_recipe(populated_repository):
+    from recipe.services.favourites_services import add_favourite
+
+    populated_repository.add_user(User("favouriter", "hash", 7))
+    with pytest.raises(ValueError):
+        add_favourite(7, 999, populated_repository)
+
+
+def test_add_favourite_unknown_user(populated_repository):
+    from recipe.services.favourites_services import add_favourite
+
+    with pytest.raises(ValueError):
+        add_favourite(424242, 1, populated_repository)
+    assert populated_repository.favourites_for_user(424242) == []
@@ -0,0 +1,40 @@
+from recipe.timing import RequestTimings, TimingSummary, _current, server_timing_header, timed
+
+
+@timed("health")
+def _score(x):
+    return x * 2
+
+
+def test_timed_only_records_inside_a_timed_request():
+    assert _score(2) == 4  # no request being timed: plain call
+
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        _score(1)
+        _score(2)
+    finally:
+        _current.reset(token)
+    assert timings.counts == {"health": 2}
+
+    durations = timings.finish()
+    assert durations["total"] >= durations["health"] >= 0
+    header = server_timing_header(durations, timings.counts)
+    assert header.startswith("total;dur=")
+    assert 'health;dur=' in header and "(2 calls)" in header
+
+
+def test_summary_keeps_a_rolling_window_per_endpoint():
+    summary = TimingSummary(window=3)
+    for total in (1.0, 2.0, 3.0, 100.0):
+        summary.record("browse.browse", {"total": total, "view": total})
+    summary.record("home.index", {"total": 5.0})
+
+    stats = summary.stats()
+    browse = stats["browse.browse"]
+    assert browse["requests"] == 4 and browse["window"] == 3
+    assert browse["ms"]["total"]["max"] == 100.0
+    assert browse["ms"]["total"]["p50"] == 3.0
+    assert browse["ms"]["db"]["max"] == 0.0
+    assert stats["home.index"]["ms"]["total"]["mean"] == 5.0